@@ -0,0 +1,341 @@
+"""
+Load-generation benchmark for the interviewer service.
+
+Simulated candidates run complete interviews (start, one answer per
+question, report) against the interviewer, concurrently, and the latency of
+every request is recorded per endpoint.
+
+Two arrival models are supported:
+- closed loop (default): ``--candidates`` simulated candidates each run
+  interviews back to back, started evenly over ``--ramp-up`` seconds;
+- open loop (``--rate``): new candidates arrive at ``--rate`` per second
+  (ramped linearly from zero over ``--ramp-up``), at most ``--candidates``
+  interviews running at once.
+
+With ``--transport ws`` each interview runs over one WebSocket connection
+to ``/interviews/ws`` instead; the same endpoint rows then report the time
+to the questions, from each answer to its evaluation, and from the last
+evaluation to the final report.
+
+Answers come from the LLM through ``AnswerAgent`` (``--answers llm``) or are
+canned (``--answers canned``) so that only the interviewer's LLM is
+exercised. Point the interviewer at a local Ollama stand-in (OLLAMA_HOST)
+to benchmark the orchestration without a real model.
+
+Usage:
+    python candidate/benchmark.py --candidates 20 --duration 300 --answers canned
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+
+import httpx
+import websockets
+
+from models import AnswerRequest
+from test_data import test_data
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+# One INFO line per request would drown the report.
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+ENDPOINTS = ("/interviews/start", "/respond", "/reports")
+
+CANNED_ANSWERS = [
+    "I have designed and operated distributed systems in production for "
+    "several years, with a focus on observability and reliability.",
+    "I would start by measuring, define SLOs, and then iterate on the "
+    "bottlenecks the metrics point at.",
+    "I automate everything I can with infrastructure as code and CI/CD, "
+    "and keep runbooks for the rest.",
+]
+
+
+class CannedAnswerSource:
+    """Answers picked from a fixed list, optionally after a think-time delay."""
+    def __init__(self, answers=None, delay: float = 0.0):
+        self.answers = answers or CANNED_ANSWERS
+        self.delay = delay
+
+    async def answer(self, question: str) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return random.choice(self.answers)
+
+
+class LLMAnswerSource:
+    """Answers generated by the candidate's AnswerAgent."""
+    def __init__(self):
+        # Imported here so canned runs do not need the ollama client.
+        from answer_agent import AnswerAgent
+        self.agent = AnswerAgent()
+
+    async def answer(self, question: str) -> str:
+        response = await self.agent.generate_answer(AnswerRequest(question=question))
+        return response.answer
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of ``values``."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class BenchmarkStats:
+    """Latency samples and error counts per endpoint."""
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.completed = 0
+        self.failed = 0
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            samples = self.latencies[endpoint]
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": self.errors[endpoint],
+                "p50": percentile(samples, 50),
+                "p95": percentile(samples, 95),
+                "p99": percentile(samples, 99),
+                "max": max(samples) if samples else float("nan"),
+                }
+        return {
+            "elapsed_seconds": elapsed,
+            "interviews_completed": self.completed,
+            "interviews_failed": self.failed,
+            "interviews_per_minute": self.completed / elapsed * 60 if elapsed else 0.0,
+            "endpoints": endpoints,
+            }
+
+
+class InterviewBenchmark:
+    """
+    Drives simulated candidates against the interviewer.
+
+    Attributes:
+        base_url (str): Interviewer base URL.
+        answers: Answer source with an async ``answer(question)`` method.
+        stats (BenchmarkStats): Collected samples.
+    """
+    def __init__(self, base_url: str, answers, timeout: float = 600.0, transport: str = "http"):
+        self.base_url = base_url.rstrip("/")
+        self.answers = answers
+        self.timeout = timeout
+        self.transport = transport
+        self.stats = BenchmarkStats()
+
+    async def _post(self, client, endpoint: str, url: str, payload):
+        start = time.perf_counter()
+        try:
+            response = await client.post(url, json=payload)
+            response.raise_for_status()
+            return response.json()
+        except Exception:
+            self.stats.errors[endpoint] += 1
+            raise
+        finally:
+            self.stats.latencies[endpoint].append(time.perf_counter() - start)
+
+    async def run_interview(self, client, candidate: dict):
+        """Run one full interview and record its request latencies."""
+        if self.transport == "ws":
+            return await self.run_interview_ws(candidate)
+        try:
+            interview = await self._post(
+                client, "/interviews/start", f"{self.base_url}/interviews/start", candidate
+                )
+            session_id = interview["session_id"]
+            for question_id, question in interview["questions"].items():
+                answer = await self.answers.answer(question)
+                await self._post(
+                    client, "/respond", f"{self.base_url}/interviews/{session_id}/respond",
+                    {"question_id": int(question_id), "answer": answer}
+                    )
+            await self._post(
+                client, "/reports", f"{self.base_url}/reports", {"session_id": session_id}
+                )
+        except Exception as e:
+            self.stats.failed += 1
+            logger.warning("Interview failed: %r", e)
+        else:
+            self.stats.completed += 1
+
+    async def run_interview_ws(self, candidate: dict):
+        """Run one full interview over a WebSocket and record its stage latencies."""
+        url = self.base_url.replace("http", "ws", 1) + "/interviews/ws"
+        sent = {}
+        endpoint = "/interviews/start"
+        tasks = []
+
+        async def answer(ws, question_id, question):
+            text = await self.answers.answer(question)
+            sent[question_id] = time.perf_counter()
+            await ws.send(json.dumps(
+                {"type": "answer", "question_id": question_id, "answer": text}
+                ))
+
+        def answered(task):
+            # A failed answer fails the interview at once.
+            if not task.cancelled() and task.exception() is not None:
+                receiving.cancel()
+
+        async def receive(ws):
+            nonlocal endpoint
+            report_latency = None
+            start = time.perf_counter()
+            await ws.send(json.dumps({"type": "start", **candidate}))
+            async for raw in ws:
+                message = json.loads(raw)
+                now = time.perf_counter()
+                if message["type"] == "questions":
+                    self.stats.latencies[endpoint].append(now - start)
+                    endpoint = "/respond"
+                    for question_id, question in message["questions"].items():
+                        task = asyncio.create_task(answer(ws, int(question_id), question))
+                        task.add_done_callback(answered)
+                        tasks.append(task)
+                elif message["type"] == "evaluation":
+                    self.stats.latencies[endpoint].append(
+                        now - sent.pop(message["question_id"])
+                        )
+                    start = now
+                    if not sent and all(t.done() for t in tasks):
+                        endpoint = "/reports"
+                elif message["type"] == "report":
+                    report_latency = now - start
+                    if message["report"].get("status") != "provisional":
+                        break
+                elif message["type"] == "ping":
+                    await ws.send(json.dumps({"type": "pong"}))
+                elif message["type"] == "error":
+                    raise RuntimeError(f"{message['status']}: {message['detail']}")
+            if report_latency is None:
+                raise RuntimeError("Connection closed before the report")
+            # The final report, or the provisional one if validation failed.
+            self.stats.latencies["/reports"].append(report_latency)
+
+        try:
+            async with asyncio.timeout(self.timeout):
+                async with websockets.connect(url) as ws:
+                    receiving = asyncio.create_task(receive(ws))
+                    try:
+                        await receiving
+                    except asyncio.CancelledError:
+                        for task in tasks:
+                            if task.done() and not task.cancelled() and task.exception() is not None:
+                                raise task.exception()
+                        raise
+                    finally:
+                        for task in (receiving, *tasks):
+                            task.cancel()
+        except Exception as e:
+            self.stats.errors[endpoint] += 1
+            self.stats.failed += 1
+            logger.warning("Interview failed: %r", e)
+        else:
+            self.stats.completed += 1
+
+    async def closed_loop(self, client, candidates: int, ramp_up: float, deadline: float):
+        async def candidate_loop(index: int):
+            await asyncio.sleep(ramp_up * index / candidates)
+            while time.monotonic() < deadline:
+                await self.run_interview(client, random.choice(test_data))
+
+        await asyncio.gather(*(candidate_loop(i) for i in range(candidates)))
+
+    async def open_loop(
+        self, client, candidates: int, rate: float, ramp_up: float, deadline: float
+        ):
+        semaphore = asyncio.Semaphore(candidates)
+        tasks = set()
+        start = time.monotonic()
+
+        async def arrival():
+            async with semaphore:
+                await self.run_interview(client, random.choice(test_data))
+
+        while time.monotonic() < deadline:
+            elapsed = time.monotonic() - start
+            current_rate = rate * min(1.0, elapsed / ramp_up) if ramp_up else rate
+            if current_rate <= 0:
+                await asyncio.sleep(0.1)
+                continue
+            task = asyncio.create_task(arrival())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            await asyncio.sleep(random.expovariate(current_rate))
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def run(self, candidates: int, duration: float, ramp_up: float, rate: float = None):
+        limits = httpx.Limits(max_connections=candidates, max_keepalive_connections=candidates)
+        async with httpx.AsyncClient(timeout=httpx.Timeout(self.timeout), limits=limits) as client:
+            start = time.monotonic()
+            deadline = start + duration
+            if rate:
+                await self.open_loop(client, candidates, rate, ramp_up, deadline)
+            else:
+                await self.closed_loop(client, candidates, ramp_up, deadline)
+            return self.stats.report(time.monotonic() - start)
+
+
+def print_report(report: dict):
+    print(f"elapsed: {report['elapsed_seconds']:.1f}s  "
+          f"completed: {report['interviews_completed']}  "
+          f"failed: {report['interviews_failed']}  "
+          f"interviews/min: {report['interviews_per_minute']:.2f}")
+    print(f"{'endpoint':<20}{'requests':>10}{'errors':>8}"
+          f"{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for endpoint, s in report["endpoints"].items():
+        print(f"{endpoint:<20}{s['requests']:>10}{s['errors']:>8}"
+              f"{s['p50']:>10.3f}{s['p95']:>10.3f}{s['p99']:>10.3f}{s['max']:>10.3f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Interviewer load-generation benchmark")
+    parser.add_argument("--url", default="http://localhost:8765", help="interviewer base URL")
+    parser.add_argument("--candidates", type=int, default=10,
+                        help="concurrent simulated candidates (closed loop) or in-flight cap (open loop)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="open-loop arrival rate in candidates per second")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="ramp-up seconds")
+    parser.add_argument("--duration", type=float, default=60.0,
+                        help="seconds during which new interviews are started")
+    parser.add_argument("--answers", choices=("llm", "canned"), default="canned")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="delay before each canned answer, in seconds")
+    parser.add_argument("--transport", choices=("http", "ws"), default="http",
+                        help="one HTTP request per step, or one WebSocket per interview")
+    parser.add_argument("--timeout", type=float, default=600.0, help="HTTP timeout in seconds")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    answers = (
+        LLMAnswerSource() if args.answers == "llm"
+        else CannedAnswerSource(delay=args.think_time)
+        )
+    benchmark = InterviewBenchmark(
+        args.url, answers, timeout=args.timeout, transport=args.transport
+        )
+    report = await benchmark.run(args.candidates, args.duration, args.ramp_up, args.rate)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,46 @@
 from ollama import AsyncClient
 import logging
+import os
+import sys
+from pathlib import Path
+
+# cassette.py is shared with the interviewer, which owns it; candidate
+# modules still take precedence over the interviewer's on the path.
+sys.path.append(str(Path(__file__).resolve().parent.parent / "interviewer"))
+from cassette import Cassette, CassetteClient
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# "off", "record" or "replay"; see interviewer/cassette.py.
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "cassettes/candidate.jsonl.gz")
+LLM_REPLAY_LATENCY = float(os.getenv("LLM_REPLAY_LATENCY", "0"))
+LLM_REPLAY_TOKENS_PER_SECOND = float(os.getenv("LLM_REPLAY_TOKENS_PER_SECOND", "0"))
+
+_cassette = None
+
+
+def create_client():
+    """Ollama client, wrapped for recording or replay when LLM_CASSETTE_MODE is set."""
+    global _cassette  # pylint: disable=global-statement
+    client = None
+    if LLM_CASSETTE_MODE != "replay":
+        client = AsyncClient(host=os.getenv("OLLAMA_HOST", "http://localhost:11434"))
+    if LLM_CASSETTE_MODE == "off":
+        return client
+    if _cassette is None:
+        _cassette = Cassette(LLM_CASSETTE_PATH)
+    return CassetteClient(
+        _cassette, mode=LLM_CASSETTE_MODE, client=client,
+        latency=LLM_REPLAY_LATENCY, tokens_per_second=LLM_REPLAY_TOKENS_PER_SECOND
+        )
+
 
 class LLMClient:
     def __init__(self, model: str, options=None):
-        self.client = AsyncClient(host="http://localhost:11434")
+        self.client = create_client()
         self.model = model or 'llama3.2'
         self.options = options or {'temperature': 0.6, 'max_tokens': 150}
 
@@ -20,4 +52,3 @@ class LLMClient:
             format=response_format,  # Use Pydantic to generate the schema
             options=self.options  # Make responses more deterministic
         )
-
@@ -1,75 +1,203 @@
+"""
+Candidate simulator: runs the ``test_data`` candidates through interviews.
+
+One pooled HTTP client is shared by the whole process. For each interview
+the answers to all questions are generated concurrently and submitted in
+question order as soon as each is ready, so the first answer is posted while
+later ones are still being generated. Up to ``CANDIDATE_CONCURRENCY``
+candidates are interviewed at once.
+
+With ``CANDIDATE_TRANSPORT=ws`` each interview instead runs over one
+WebSocket connection to ``/interviews/ws``: answers are sent as soon as
+they are generated and evaluations and the report are pushed back.
+
+Usage:
+    INTERVIEWER_SERVICE_URL=http://localhost:8765 CANDIDATE_CONCURRENCY=4 python main.py
+    CANDIDATE_TRANSPORT=ws python main.py
+"""
 import httpx
 import asyncio
+import json
+import os
+import time
+import websockets
 from pprint import pprint as print
 from test_data import test_data
 from answer_agent import AnswerAgent
-import asyncio
 import logging
-import json
 
-from models import AnswerRequest, AnswerResponse
+from models import AnswerRequest
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-
-async def post_interview_start(data):
-    url = "http://localhost:8765/interviews/start"
-
-    headers = {"Content-Type": "application/json"}
-
-    async with httpx.AsyncClient(timeout=httpx.Timeout(300.0)) as client:
-        response = await client.post(url, json=data, headers=headers)
-        return response.json()
-
-
-
-async def submit_answer(session_id, data):
-
-    url = f"http://localhost:8765/interviews/{session_id}/respond"
-
-    headers = {"Content-Type": "application/json"}
-
-    async with httpx.AsyncClient(timeout=httpx.Timeout(600.0)) as client:
-        response = await client.post(url, json=data, headers=headers)
-        return response.json()
-
-
-
-
-
-async def runner():
-    # Run the async function
-    answer_agent = AnswerAgent()
-
-    for data in test_data:
-
-        interview = await post_interview_start(data)
-        print(interview)
-
-        print(interview['questions'])
-        for question_id in interview['questions']:
-            print(question_id)
-            print(interview['questions'][question_id])
-            request = AnswerRequest.model_validate_json(
-                json.dumps({'question': interview['questions'][question_id]})
-                )
-            print(request)
-            answer = await answer_agent.generate_answer(request)
-            print(answer)
-            r = await submit_answer(
-                interview['session_id'],
-                {'question_id': question_id, 'answer': answer.answer}
+INTERVIEWER_SERVICE_URL = os.getenv("INTERVIEWER_SERVICE_URL", "http://localhost:8765")
+# Candidates interviewed at the same time.
+CANDIDATE_CONCURRENCY = int(os.getenv("CANDIDATE_CONCURRENCY", "4"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "600"))
+# "http" (one request per answer) or "ws" (one WebSocket per interview).
+CANDIDATE_TRANSPORT = os.getenv("CANDIDATE_TRANSPORT", "http")
+
+
+def create_client(concurrency: int = CANDIDATE_CONCURRENCY) -> httpx.AsyncClient:
+    """The process-wide HTTP client; one keep-alive connection per candidate."""
+    return httpx.AsyncClient(
+        base_url=INTERVIEWER_SERVICE_URL,
+        timeout=httpx.Timeout(HTTP_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+            )
+        )
+
+
+async def post_interview_start(client: httpx.AsyncClient, data):
+    response = await client.post("/interviews/start", json=data)
+    response.raise_for_status()
+    return response.json()
+
+
+async def submit_answer(client: httpx.AsyncClient, session_id, data):
+    response = await client.post(f"/interviews/{session_id}/respond", json=data)
+    response.raise_for_status()
+    return response.json()
+
+
+async def run_interview(client: httpx.AsyncClient, answer_agent: AnswerAgent, data):
+    """
+    Run one candidate's interview.
+
+    Args:
+        client (httpx.AsyncClient): The shared HTTP client.
+        answer_agent (AnswerAgent): Generates the candidate's answers.
+        data (dict): The candidate and job posting from ``test_data``.
+
+    Returns:
+        dict: The interviewer's response to the last answer.
+    """
+    interview = await post_interview_start(client, data)
+    session_id = interview['session_id']
+    print(interview)
+
+    # Start generating every answer now; submit them in order as they finish.
+    answers = {
+        question_id: asyncio.create_task(
+            answer_agent.generate_answer(AnswerRequest(question=question))
+            )
+        for question_id, question in interview['questions'].items()
+        }
+    result = None
+    try:
+        for question_id, task in answers.items():
+            answer = await task
+            result = await submit_answer(
+                client, session_id,
+                {'question_id': int(question_id), 'answer': answer.answer}
                 )
             print(f"Answer: {question_id}, {answer}")
-            print(r)
-
-
-asyncio.run(runner())
-
-
-
-
-
-
+            print(result)
+    finally:
+        for task in answers.values():
+            task.cancel()
+    return result
+
+
+def websocket_url(base_url: str = INTERVIEWER_SERVICE_URL) -> str:
+    return base_url.replace("http", "ws", 1).rstrip("/") + "/interviews/ws"
+
+
+async def run_interview_ws(answer_agent: AnswerAgent, data):
+    """
+    Run one candidate's interview over a WebSocket connection.
+
+    Args:
+        answer_agent (AnswerAgent): Generates the candidate's answers.
+        data (dict): The candidate and job posting from ``test_data``.
+
+    Returns:
+        dict: The final report, or the provisional one if validation failed.
+    """
+    async with websockets.connect(websocket_url(), open_timeout=HTTP_TIMEOUT) as ws:
+        send_lock = asyncio.Lock()
+
+        async def send(message):
+            async with send_lock:
+                await ws.send(json.dumps(message))
+
+        async def answer(question_id, question):
+            response = await answer_agent.generate_answer(AnswerRequest(question=question))
+            await send({'type': 'answer', 'question_id': int(question_id), 'answer': response.answer})
+            print(f"Answer: {question_id}, {response}")
+
+        def answered(task):
+            # A failed answer fails the interview; the server's pings would
+            # otherwise keep the connection waiting for the report forever.
+            if not task.cancelled() and task.exception() is not None:
+                receiving.cancel()
+
+        async def receive():
+            report = None
+            # The server closes the connection after the final report.
+            async for raw in ws:
+                message = json.loads(raw)
+                kind = message['type']
+                if kind == 'questions':
+                    print(message)
+                    for question_id, question in message['questions'].items():
+                        task = asyncio.create_task(answer(question_id, question))
+                        task.add_done_callback(answered)
+                        answers.append(task)
+                elif kind == 'ping':
+                    await send({'type': 'pong'})
+                elif kind == 'evaluation':
+                    print(message)
+                elif kind == 'report':
+                    report = message['report']
+                    print(report)
+                elif kind == 'error':
+                    raise RuntimeError(f"Interviewer error {message.get('status')}: {message['detail']}")
+            if report is None:
+                raise RuntimeError("Connection closed before the report")
+            return report
+
+        await send({'type': 'start', **data})
+        answers = []
+        receiving = asyncio.create_task(receive())
+        try:
+            return await receiving
+        except asyncio.CancelledError:
+            for task in answers:
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+            raise
+        finally:
+            for task in (receiving, *answers):
+                task.cancel()
+
+
+async def runner(concurrency: int = CANDIDATE_CONCURRENCY, transport: str = CANDIDATE_TRANSPORT):
+    answer_agent = AnswerAgent()
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.monotonic()
+
+    async def interview(data):
+        async with semaphore:
+            if transport == "ws":
+                return await run_interview_ws(answer_agent, data)
+            return await run_interview(client, answer_agent, data)
+
+    async with create_client(concurrency) as client:
+        results = await asyncio.gather(
+            *(interview(data) for data in test_data), return_exceptions=True
+            )
+    failed = [r for r in results if isinstance(r, Exception)]
+    for error in failed:
+        logger.error("Interview failed: %r", error)
+    logger.info(
+        "%d interviews over %s finished in %.1fs, %d failed",
+        len(results), transport, time.monotonic() - start, len(failed)
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(runner())
@@ -0,0 +1,171 @@
+"""
+Score analytics over the ``interview_scores`` and ``question_scores`` tables.
+
+Scores are written by ``InterviewManager`` whenever a report is stored, so
+aggregates never open report files. Reports stored before the tables existed
+are loaded once with ``backfill``:
+
+    python analytics.py backfill
+"""
+import argparse
+import asyncio
+import io
+import logging
+from datetime import datetime
+
+from database import Database, QUESTION_SCORE_FIELDS, SCORE_FIELDS, SCORE_GROUPS
+
+logger = logging.getLogger(__name__)
+
+EXPORT_TABLES = {"interview_scores": SCORE_FIELDS, "question_scores": QUESTION_SCORE_FIELDS}
+
+
+def percentile(values, pct: float):
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return None
+    rank = max(1, round(pct / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+class ScoreAnalytics:
+    """
+    Aggregates, columnar export and backfill of interview scores.
+
+    Attributes:
+        db (Database): The database holding the score tables.
+        storage: The report storage, read by ``backfill``.
+    """
+    def __init__(self, db: Database, storage=None):
+        self.db = db
+        self.storage = storage
+
+    async def aggregate(self, group_by: str = None, percentiles=(50, 90), **filters) -> list:
+        """
+        Final score statistics per group.
+
+        Args:
+            group_by (str): ``job_title``, ``candidate_id``, ``day``,
+                ``month`` or ``None`` for all matching interviews.
+            percentiles (tuple): Percentiles of the final score to report.
+            **filters: ``job_title``, ``candidate_id``, ``since``, ``until``
+                and ``status``.
+
+        Returns:
+            list: One dict per group with ``count``, ``mean``, ``min``,
+                  ``max``, ``mean_question_score`` and ``p<N>`` entries.
+        """
+        if group_by is not None and group_by not in SCORE_GROUPS:
+            raise ValueError(f"Unknown group: {group_by}")
+        groups = []
+        current, scores, question_scores = None, [], []
+
+        def flush():
+            groups.append({
+                "group": current,
+                "count": len(scores),
+                "mean": sum(scores) / len(scores),
+                "min": scores[0],
+                "max": scores[-1],
+                "mean_question_score": (
+                    sum(question_scores) / len(question_scores) if question_scores else None
+                    ),
+                **{f"p{p:g}": percentile(scores, p) for p in percentiles}
+                })
+
+        # Rows arrive sorted by group then score, so each group is one run.
+        async for group, score, question_score in self.db.iter_score_groups(group_by, **filters):
+            if scores and group != current:
+                flush()
+                scores, question_scores = [], []
+            current = group
+            scores.append(score)
+            if question_score is not None:
+                question_scores.append(question_score)
+        if scores:
+            flush()
+        return groups
+
+    async def columns(self, table: str = "interview_scores", **filters) -> dict:
+        """Matching rows of ``table`` as one list per column."""
+        fields = EXPORT_TABLES[table]
+        columns = {field: [] for field in fields}
+        async for row in self.db.iter_score_rows(table, **filters):
+            for field, value in zip(fields, row):
+                columns[field].append(value)
+        return columns
+
+    async def export_npz(self, table: str = "interview_scores", **filters) -> bytes:
+        """
+        Matching rows of ``table`` as a compressed NumPy ``.npz`` archive with
+        one array per column (``numpy.load(...)["final_score"]``).
+        """
+        import numpy as np  # only needed for binary exports
+
+        arrays = {}
+        for field, values in (await self.columns(table, **filters)).items():
+            if field in ("final_score", "question_count", "question_id", "score"):
+                # -1 marks a missing score in the integer arrays.
+                arrays[field] = np.array([-1 if v is None else v for v in values], dtype=np.int32)
+            elif field == "mean_question_score":
+                arrays[field] = np.array(
+                    [np.nan if v is None else v for v in values], dtype=np.float64
+                    )
+            else:
+                arrays[field] = np.array(["" if v is None else v for v in values], dtype=np.str_)
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    async def backfill(self) -> int:
+        """
+        Write the scores of every stored report missing from the tables.
+
+        Returns:
+            int: Number of reports backfilled.
+        """
+        known = {row[0] async for row in self.db.iter_score_rows("interview_scores")}
+        session_ids = [s for s in await self.storage.report_ids() if s not in known]
+        timestamps = await self.db.get_session_timestamps(session_ids)
+        backfilled = 0
+        for session_id in session_ids:
+            report = await self.storage.read_report(session_id)
+            if report is None:
+                continue
+            await self.db.save_scores(
+                session_id, report.get("candidate_id"), report.get("job_title"),
+                timestamps.get(session_id) or datetime.now().isoformat(), report
+                )
+            backfilled += 1
+        logger.info("Backfilled scores of %d reports", backfilled)
+        return backfilled
+
+
+async def main():
+    # Imported here: the CLI builds the same storage as the service.
+    import config
+    from logging_setup import setup_logging
+    from storage import create_storage
+
+    setup_logging()
+
+    parser = argparse.ArgumentParser(description="Interview score analytics")
+    parser.add_argument("command", choices=("backfill",))
+    parser.parse_args()
+    storage = create_storage(
+        config.REPORT_STORE, file_path=config.REPORT_STORE_PATH,
+        **({"segment_size": config.REPORT_SEGMENT_SIZE, "compress": config.REPORT_COMPRESSION}
+           if config.REPORT_STORE == "segmented" else {})
+        )
+    db = Database()
+    await db.init_db()
+    await storage.connect()
+    try:
+        print(f"Backfilled {await ScoreAnalytics(db, storage).backfill()} reports")
+    finally:
+        await storage.close()
+        await db.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
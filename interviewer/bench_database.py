@@ -0,0 +1,106 @@
+"""
+Benchmark for the session log writes in database.py.
+
+Compares the original connection-per-call / commit-per-row pattern with the
+shared WAL connection and group commits of ``Database.save_session`` by
+logging N sessions from C concurrent writers. The baseline runs on its own
+database created as before, with SQLite's default rollback journal
+(journal_mode=DELETE) and none of ``SQLITE_PRAGMAS``.
+
+Usage:
+    python bench_database.py --sessions 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+import aiosqlite
+from database import Database
+from models import InterviewSession
+
+
+def make_sessions(count):
+    return [
+        InterviewSession(
+            session_id=str(uuid.uuid4()),
+            candidate_id=str(i),
+            job_title="Senior DevOps Engineer",
+            timestamp="2025-01-01T00:00:00",
+            data_path=f"local_storage/{i}.json"
+            )
+        for i in range(count)
+        ]
+
+
+async def init_baseline_db(db_path):
+    """The original schema, without the pragmas (WAL is persistent per file)."""
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("PRAGMA journal_mode=DELETE")
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS interview_sessions (
+                session_id TEXT PRIMARY KEY,
+                candidate_id TEXT,
+                job_title TEXT,
+                timestamp TEXT,
+                data_path TEXT
+            )
+        """)
+        await db.commit()
+
+
+async def save_session_per_connection(db_path, session):
+    """The pre-pooling implementation: new connection and commit per row."""
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("""
+            INSERT INTO interview_sessions (session_id, candidate_id, job_title, timestamp, data_path)
+            VALUES (?, ?, ?, ?, ?)
+        """, (
+            session.session_id,
+            session.candidate_id,
+            session.job_title,
+            session.timestamp,
+            session.data_path
+            ))
+        await db.commit()
+
+
+async def run(save, sessions, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(session):
+        async with semaphore:
+            await save(session)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(s) for s in sessions))
+    return len(sessions) / (time.perf_counter() - start)
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_path = os.path.join(tmp, "baseline.db")
+        await init_baseline_db(baseline_path)
+        baseline = await run(
+            lambda s: save_session_per_connection(baseline_path, s),
+            make_sessions(args.sessions), args.concurrency
+            )
+
+        db = Database(db_path=os.path.join(tmp, "pooled.db"))
+        await db.init_db()
+        pooled = await run(db.save_session, make_sessions(args.sessions), args.concurrency)
+        await db.close()
+
+    print(f"sessions={args.sessions} concurrency={args.concurrency}")
+    print(f"per-connection commit : {baseline:10.1f} sessions/sec")
+    print(f"pooled group commit   : {pooled:10.1f} sessions/sec")
+    print(f"speedup               : {pooled / baseline:10.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,211 @@
+"""
+Record/replay of Ollama chat calls for deterministic, offline runs.
+
+A cassette is an append-only JSON-lines file (gzip compressed when the path
+ends in ``.gz``) mapping a hash of the request (model, messages, format and
+options) to the recorded response content and Ollama's token counters.
+
+``CassetteClient`` has the same ``chat`` signature as ``ollama.AsyncClient``:
+- in ``record`` mode it forwards calls to the real client and appends every
+  response to the cassette;
+- in ``replay`` mode it answers from the cassette with a synthetic latency
+  (``latency`` seconds plus ``eval_count / tokens_per_second``) and raises
+  ``CassetteMissError`` for unknown requests.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+from ollama import ChatResponse, Message
+
+logger = logging.getLogger(__name__)
+
+# Response fields kept in the cassette besides the message content.
+RECORDED_FIELDS = (
+    "prompt_eval_count", "prompt_eval_duration", "eval_count",
+    "eval_duration", "load_duration", "total_duration", "done_reason"
+)
+
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+def request_key(model: str, messages, response_format=None, options=None) -> str:
+    """Stable hash of everything that determines an LLM response."""
+    payload = json.dumps(
+        {"model": model, "messages": list(messages or []),
+         "format": response_format, "options": dict(options or {})},
+        sort_keys=True, default=str
+        )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class Cassette:
+    """
+    On-disk store of recorded responses.
+
+    Attributes:
+        path (Path): The cassette file.
+        entries (dict): Recorded responses by request key.
+    """
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries = {}
+        self._write_lock = threading.Lock()
+        if self.path.exists():
+            with self._open("rt") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.entries[record["key"]] = record["response"]
+            logger.info("Loaded %d recorded LLM responses from %s", len(self.entries), self.path)
+
+    def _open(self, mode: str):
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    async def add(self, key: str, response: dict):
+        """Record a response; the file append runs in a thread, off the event loop."""
+        if key in self.entries:
+            return
+        self.entries[key] = response
+        line = json.dumps({"key": key, "response": response}, separators=(",", ":")) + "\n"
+        await asyncio.to_thread(self._append, line)
+
+    def _append(self, line: str):
+        # One append at a time: concurrent gzip members would interleave.
+        with self._write_lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._open("at") as f:
+                f.write(line)
+
+
+def to_record(response) -> dict:
+    """Compact, JSON-serializable form of an Ollama chat response."""
+    record = {"content": response.message.content}
+    for field in RECORDED_FIELDS:
+        value = getattr(response, field, None)
+        if value is not None:
+            record[field] = value
+    return record
+
+
+def from_record(model: str, record: dict, content: str = None, done: bool = True) -> ChatResponse:
+    """Rebuild an Ollama chat response (or stream chunk) from a record."""
+    fields = {f: record[f] for f in RECORDED_FIELDS if f in record} if done else {}
+    return ChatResponse(
+        model=model,
+        created_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        done=done,
+        message=Message(
+            role="assistant", content=record["content"] if content is None else content
+            ),
+        **fields
+        )
+
+
+def split_tokens(text: str, count: int):
+    """Split ``text`` into roughly ``count`` chunks to mimic token streaming."""
+    count = max(1, min(count or 1, len(text) or 1))
+    size = -(-len(text) // count)
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class CassetteClient:
+    """
+    Drop-in replacement for ``ollama.AsyncClient`` that records or replays.
+
+    Attributes:
+        cassette (Cassette): The response store.
+        mode (str): ``record`` or ``replay``.
+        client: The real Ollama client (record mode only).
+        latency (float): Fixed replay delay per call, in seconds.
+        tokens_per_second (float): Replay generation speed; 0 disables the
+            per-token delay.
+    """
+    def __init__(
+        self, cassette: Cassette, mode: str = "replay", client=None,
+        latency: float = 0.0, tokens_per_second: float = 0.0
+        ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if mode == "record" and client is None:
+            raise ValueError("Record mode needs a real client")
+        self.cassette = cassette
+        self.mode = mode
+        self.client = client
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        # Mirrors ollama.AsyncClient so its connection pool can be closed.
+        self._client = client._client if client is not None else _NullTransport()
+
+    async def chat(
+        self, model: str = '', messages=None, *, tools=None, stream: bool = False,
+        format=None, options=None, keep_alive=None
+        ):
+        if not messages:
+            # Warm-up / load requests carry no conversation to record.
+            if self.mode == "record":
+                return await self.client.chat(model=model, messages=messages, keep_alive=keep_alive)
+            return from_record(model, {"content": ""})
+
+        key = request_key(model, messages, format, options)
+        if self.mode == "record":
+            return await self._record(key, model, messages, stream, format, options, keep_alive)
+
+        record = self.cassette.get(key)
+        if record is None:
+            raise CassetteMissError(f"No recorded response for {model} request {key[:12]}")
+        if stream:
+            return self._replay_stream(model, record)
+        await asyncio.sleep(self._delay(record))
+        return from_record(model, record)
+
+    def _delay(self, record: dict, tokens: int = None) -> float:
+        tokens = record.get("eval_count", 0) if tokens is None else tokens
+        per_token = tokens / self.tokens_per_second if self.tokens_per_second else 0.0
+        return self.latency + per_token
+
+    async def _replay_stream(self, model: str, record: dict):
+        chunks = split_tokens(record["content"], record.get("eval_count", 1))
+        await asyncio.sleep(self.latency)
+        per_chunk = self._delay(record) - self.latency
+        for chunk in chunks:
+            await asyncio.sleep(per_chunk / len(chunks))
+            yield from_record(model, record, content=chunk, done=False)
+        yield from_record(model, record, content="")
+
+    async def _record(self, key, model, messages, stream, response_format, options, keep_alive):
+        response = await self.client.chat(
+            model=model, messages=messages, stream=stream,
+            format=response_format, options=options, keep_alive=keep_alive
+            )
+        if not stream:
+            await self.cassette.add(key, to_record(response))
+            return response
+        return self._record_stream(key, response)
+
+    async def _record_stream(self, key, stream):
+        content = []
+        async for chunk in stream:
+            content.append(chunk.message.content or "")
+            if chunk.done:
+                record = to_record(chunk)
+                record["content"] = "".join(content)
+                await self.cassette.add(key, record)
+            yield chunk
+
+
+class _NullTransport:
+    async def aclose(self):
+        pass
@@ -0,0 +1,138 @@
+"""
+Runtime configuration for the interviewer service.
+
+Every setting is read from the environment so the same image can run as a
+single process or as several workers/replicas behind a load balancer.
+"""
+import os
+
+# Session store: "memory" keeps sessions in the process (single worker only),
+# "redis" shares them between every worker and replica.
+SESSION_STORE = os.getenv("SESSION_STORE", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+# Seconds an unfinished session is kept after its last activity.
+SESSION_TTL = int(os.getenv("SESSION_TTL", "86400"))
+# In-process store only: live sessions allowed (0 for no limit) before new
+# interviews are refused with 503, and seconds between sweeps of idle ones.
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+
+# Question generation cache: an in-process LRU, optionally backed by Redis
+# so every worker shares generated question sets.
+QUESTION_CACHE_SIZE = int(os.getenv("QUESTION_CACHE_SIZE", "1024"))
+QUESTION_CACHE_TTL = int(os.getenv("QUESTION_CACHE_TTL", "3600"))
+QUESTION_CACHE_REDIS = os.getenv("QUESTION_CACHE_REDIS", "false").lower() in ("1", "true", "yes")
+
+# Question pools: for job postings registered through /admin/postings a
+# background worker keeps QUESTION_POOL_SIZE question sets ready, generated
+# only while the LLM is idle and regenerated after QUESTION_POOL_MAX_AGE.
+# Postings registered by other processes are picked up every
+# QUESTION_POOL_REFRESH_INTERVAL seconds.
+QUESTION_POOL = os.getenv("QUESTION_POOL", "true").lower() in ("1", "true", "yes")
+QUESTION_POOL_SIZE = int(os.getenv("QUESTION_POOL_SIZE", "3"))
+QUESTION_POOL_MAX_AGE = float(os.getenv("QUESTION_POOL_MAX_AGE", "3600"))
+QUESTION_POOL_POLL_INTERVAL = float(os.getenv("QUESTION_POOL_POLL_INTERVAL", "5"))
+QUESTION_POOL_TEMPERATURE = float(os.getenv("QUESTION_POOL_TEMPERATURE", "0.7"))
+QUESTION_POOL_REFRESH_INTERVAL = float(os.getenv("QUESTION_POOL_REFRESH_INTERVAL", "60"))
+
+# When enabled, /respond records the answer and returns 202 at once while the
+# evaluation runs in the background; progress is exposed on /status.
+ASYNC_EVALUATION = os.getenv("ASYNC_EVALUATION", "false").lower() in ("1", "true", "yes")
+
+# When enabled, the last answer returns a provisional report scored from the
+# per-question evaluations; the ValidationAgent upgrades it in the background,
+# retrying up to VALIDATION_ATTEMPTS times while the LLM is overloaded.
+PROVISIONAL_REPORTS = os.getenv("PROVISIONAL_REPORTS", "true").lower() in ("1", "true", "yes")
+VALIDATION_ATTEMPTS = int(os.getenv("VALIDATION_ATTEMPTS", "3"))
+
+# Maximum answer evaluations a process sends to the LLM concurrently.
+EVALUATION_CONCURRENCY = int(os.getenv("EVALUATION_CONCURRENCY", "4"))
+
+# LLM admission control: calls running against each Ollama backend at once,
+# and calls allowed to wait for a slot before new ones are rejected with 503.
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "2"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+
+# Ollama backend. One pooled HTTP client per host is shared by every agent;
+# OLLAMA_KEEP_ALIVE tells Ollama how long to keep the model loaded after a
+# request (e.g. "30m", or -1 to never unload).
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://ollama:11434")
+# Several Ollama boxes, comma separated (defaults to OLLAMA_HOST). Each call
+# goes to the least-loaded healthy one; a host failing OLLAMA_EJECT_AFTER
+# calls in a row is ejected and probed again every OLLAMA_PROBE_INTERVAL
+# seconds. Failed calls are retried on up to LLM_RETRIES other hosts, and
+# question generation is duplicated to a second host when the first has not
+# answered after LLM_HEDGE_AFTER seconds (0 disables hedging).
+OLLAMA_HOSTS = [
+    h.strip() for h in os.getenv("OLLAMA_HOSTS", OLLAMA_HOST).split(",") if h.strip()
+    ]
+OLLAMA_EJECT_AFTER = int(os.getenv("OLLAMA_EJECT_AFTER", "3"))
+OLLAMA_PROBE_INTERVAL = float(os.getenv("OLLAMA_PROBE_INTERVAL", "10"))
+LLM_RETRIES = int(os.getenv("LLM_RETRIES", "1"))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))
+
+# Agent work queue: with AGENT_QUEUE the API queues every agent LLM call on
+# Redis Streams and worker.py processes run them. A request waits up to
+# AGENT_QUEUE_TIMEOUT seconds for its answer; a failing job is run up to
+# AGENT_QUEUE_ATTEMPTS times before it is dead-lettered, and a job left by a
+# silent worker is claimed by another after AGENT_QUEUE_CLAIM_IDLE seconds.
+AGENT_QUEUE = os.getenv("AGENT_QUEUE", "false").lower() in ("1", "true", "yes")
+AGENT_QUEUE_TIMEOUT = float(os.getenv("AGENT_QUEUE_TIMEOUT", "300"))
+AGENT_QUEUE_ATTEMPTS = int(os.getenv("AGENT_QUEUE_ATTEMPTS", "3"))
+AGENT_QUEUE_CLAIM_IDLE = float(os.getenv("AGENT_QUEUE_CLAIM_IDLE", "600"))
+AGENT_QUEUE_METRICS_INTERVAL = float(os.getenv("AGENT_QUEUE_METRICS_INTERVAL", "5"))
+# Worker processes: jobs run at once and the port serving their metrics.
+WORKER_CONCURRENCY = int(os.getenv(
+    "WORKER_CONCURRENCY", str(LLM_MAX_IN_FLIGHT * len(OLLAMA_HOSTS))
+    ))
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "9100"))
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "16"))
+OLLAMA_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OLLAMA_MAX_KEEPALIVE_CONNECTIONS", "8"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+if OLLAMA_KEEP_ALIVE.lstrip("-").isdigit():
+    # Bare numbers are seconds for Ollama and must be sent as JSON numbers.
+    OLLAMA_KEEP_ALIVE = int(OLLAMA_KEEP_ALIVE)
+# Load the agents' models at startup so the first interview skips model load.
+LLM_WARMUP = os.getenv("LLM_WARMUP", "true").lower() in ("1", "true", "yes")
+LLM_WARMUP_TIMEOUT = float(os.getenv("LLM_WARMUP_TIMEOUT", "300"))
+
+# Seconds a WebSocket interview client may stay silent before it is pinged;
+# a ping unanswered for as long again closes the connection.
+WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", "20"))
+
+# Request tracing: stage timings go into a Server-Timing header, and requests
+# slower than TRACE_SLOW_SECONDS are kept (the last TRACE_BUFFER_SIZE) for
+# /debug/traces.
+TRACING = os.getenv("TRACING", "true").lower() in ("1", "true", "yes")
+TRACE_SLOW_SECONDS = float(os.getenv("TRACE_SLOW_SECONDS", "1.0"))
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "100"))
+
+# Record/replay of LLM calls: "off", "record" (call Ollama and append every
+# response to the cassette) or "replay" (answer from the cassette only, with
+# LLM_REPLAY_LATENCY seconds plus eval_count / LLM_REPLAY_TOKENS_PER_SECOND).
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "cassettes/interviewer.jsonl.gz")
+LLM_REPLAY_LATENCY = float(os.getenv("LLM_REPLAY_LATENCY", "0"))
+LLM_REPLAY_TOKENS_PER_SECOND = float(os.getenv("LLM_REPLAY_TOKENS_PER_SECOND", "0"))
+
+# Final report storage: "file" writes one JSON file per session, "segmented"
+# appends compact records to rolling segment files with an offset index.
+REPORT_STORE = os.getenv("REPORT_STORE", "file")
+REPORT_STORE_PATH = os.getenv("REPORT_STORE_PATH", "local_storage")
+REPORT_SEGMENT_SIZE = int(os.getenv("REPORT_SEGMENT_SIZE", str(64 * 1024 * 1024)))
+REPORT_COMPRESSION = os.getenv("REPORT_COMPRESSION", "true").lower() in ("1", "true", "yes")
+REPORT_FSYNC = os.getenv("REPORT_FSYNC", "false").lower() in ("1", "true", "yes")
+# Bytes of serialized final reports kept in memory for repeated reads.
+REPORT_CACHE_BYTES = int(os.getenv("REPORT_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# Logging (see logging_setup.py): LOG_FORMAT is "json" or "text"; LOG_LEVELS
+# sets per-logger levels ("httpx=WARNING"); LOG_SAMPLING keeps a fraction of
+# the records of a category or logger ("payload.transcript=0.1"); logged
+# payloads are cut at LOG_PAYLOAD_MAX_CHARS (0 disables the cap); records
+# beyond LOG_QUEUE_SIZE waiting to be written are dropped.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "httpx=WARNING")
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "")
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
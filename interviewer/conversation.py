@@ -0,0 +1,74 @@
+"""
+Session-scoped chat context shared by the interview agents.
+
+Every LLM call of an interview starts with the same messages: a system
+message with the interviewer persona and the job title/description, then the
+question-generation exchange. Agents only append their own task turn, so the
+token prefix of each request is identical to the previous one and Ollama
+reuses its cached KV state instead of re-evaluating the prefix.
+
+Ollama's ``prompt_eval_count`` only counts the prompt tokens it actually
+evaluated, but it does not report the size of the whole prompt. That size
+is estimated from its length (``CHARS_PER_TOKEN``), so the tokens served
+from the cache are an estimate too, and the ``*_estimate`` fields and
+metrics are only indicative: small values are mostly noise.
+"""
+
+SYSTEM_PROMPT = "You are an expert interviewer with deep knowledge of various roles."
+
+# Rough size of a llama token in English text, used to estimate prompt sizes.
+CHARS_PER_TOKEN = 4
+
+
+def build_context(role: str = None) -> list:
+    """
+    Initial messages of an interview conversation.
+
+    Args:
+        role (str): The job title and job description, if known.
+
+    Returns:
+        list: The system message establishing the persona and the role.
+    """
+    content = f"{SYSTEM_PROMPT}\n\n{role}" if role else SYSTEM_PROMPT
+    return [{"role": "system", "content": content}]
+
+
+def estimate_tokens(messages) -> int:
+    return sum(len(m["content"]) for m in messages) // CHARS_PER_TOKEN
+
+
+def prompt_usage(messages, response) -> dict:
+    """
+    Prompt token usage of one chat call.
+
+    Returns:
+        dict: ``prompt_tokens_estimate`` (estimated size of the whole prompt),
+              ``prompt_eval_count`` (tokens Ollama evaluated, as reported) and
+              ``cached_tokens_estimate`` (the difference, presumably served
+              from the KV cache).
+    """
+    estimated = estimate_tokens(messages)
+    evaluated = getattr(response, "prompt_eval_count", None)
+    if evaluated is None:
+        evaluated = estimated
+    return {
+        "prompt_tokens_estimate": estimated,
+        "prompt_eval_count": evaluated,
+        "cached_tokens_estimate": max(0, estimated - evaluated)
+        }
+
+
+def summarize_usage(usages) -> dict:
+    """Totals of several ``prompt_usage`` results."""
+    usages = [u for u in usages if u]
+    total = {
+        key: sum(u.get(key, 0) for u in usages)
+        for key in ("prompt_tokens_estimate", "prompt_eval_count", "cached_tokens_estimate")
+        }
+    total["calls"] = len(usages)
+    total["cached_ratio_estimate"] = (
+        total["cached_tokens_estimate"] / total["prompt_tokens_estimate"]
+        if total["prompt_tokens_estimate"] else 0.0
+        )
+    return total
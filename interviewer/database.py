@@ -5,66 +5,475 @@ import json
 import logging
 import aiosqlite
 from models import InterviewSession
+from tracing import traced
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pragmas applied to the long-lived connection. WAL lets readers proceed
+# while a group commit is in flight and synchronous=NORMAL is durable
+# across application crashes in WAL mode (only an OS crash can lose the
+# last commits).
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA busy_timeout=5000",
+)
+
+LOG_FIELDS = ["session_id", "candidate_id", "job_title", "timestamp", "data_path"]
+
+SCORE_FIELDS = [
+    "session_id", "candidate_id", "job_title", "timestamp", "final_score",
+    "mean_question_score", "question_count", "status"
+]
+QUESTION_SCORE_FIELDS = ["session_id", "question_id", "question", "score", "comment"]
+
+SCORE_TABLES = (
+    """
+    CREATE TABLE IF NOT EXISTS interview_scores (
+        session_id TEXT PRIMARY KEY,
+        candidate_id TEXT,
+        job_title TEXT,
+        timestamp TEXT,
+        final_score INTEGER,
+        mean_question_score REAL,
+        question_count INTEGER,
+        status TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS question_scores (
+        session_id TEXT,
+        question_id INTEGER,
+        question TEXT,
+        score INTEGER,
+        comment TEXT,
+        PRIMARY KEY (session_id, question_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_scores_timestamp ON interview_scores (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_scores_job_title ON interview_scores (job_title, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_scores_candidate ON interview_scores (candidate_id, timestamp)",
+)
+
+INSERT_SESSION = """
+    INSERT INTO interview_sessions (session_id, candidate_id, job_title, timestamp, data_path)
+    VALUES (?, ?, ?, ?, ?)
+"""
+UPSERT_SCORES = f"""
+    INSERT OR REPLACE INTO interview_scores ({', '.join(SCORE_FIELDS)})
+    VALUES ({', '.join('?' * len(SCORE_FIELDS))})
+"""
+UPSERT_QUESTION_SCORE = f"""
+    INSERT OR REPLACE INTO question_scores ({', '.join(QUESTION_SCORE_FIELDS)})
+    VALUES ({', '.join('?' * len(QUESTION_SCORE_FIELDS))})
+"""
+
+# Aggregation keys of score_rows, as SQL expressions over interview_scores.
+SCORE_GROUPS = {
+    "job_title": "job_title",
+    "candidate_id": "candidate_id",
+    "day": "substr(timestamp, 1, 10)",
+    "month": "substr(timestamp, 1, 7)",
+}
+
+LOG_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_sessions_timestamp "
+    "ON interview_sessions (timestamp, session_id)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_candidate "
+    "ON interview_sessions (candidate_id, timestamp, session_id)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_job_title "
+    "ON interview_sessions (job_title, timestamp, session_id)",
+)
+
+
 class Database:
-    def __init__(self, db_path="interviews.db"):
+    """
+    Async SQLite access for the interview session log and score analytics.
+
+    A single connection is opened once (from the FastAPI ``lifespan``) and
+    reused by every call. ``save_session`` and ``save_scores`` do not commit
+    per call: their statements are queued and a background writer flushes
+    them in batches, so concurrent interview completions share one
+    transaction.
+
+    Attributes:
+        db_path (str): Path of the SQLite database file.
+        batch_size (int): Maximum number of writes per group commit.
+        flush_interval (float): Seconds the writer waits for more rows
+            before committing a partial batch.
+    """
+    def __init__(self, db_path="interviews.db", batch_size=256, flush_interval=0.005):
         self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._conn = None
+        self._connect_lock = asyncio.Lock()
+        self._queue = None
+        self._writer = None
+
+    async def connect(self):
+        """Open the shared connection, apply pragmas and start the writer."""
+        async with self._connect_lock:
+            if self._conn is not None:
+                return self._conn
+            conn = await aiosqlite.connect(self.db_path)
+            for pragma in SQLITE_PRAGMAS:
+                await conn.execute(pragma)
+            self._conn = conn
+            self._queue = asyncio.Queue()
+            self._writer = asyncio.create_task(self._write_loop())
+            return conn
+
+    async def close(self):
+        """Flush pending writes and close the shared connection."""
+        if self._conn is None:
+            return
+        if self._writer is not None:
+            await self._queue.join()
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        await self._conn.close()
+        self._conn = None
+
+    async def _connection(self):
+        if self._conn is None:
+            await self.connect()
+        return self._conn
 
     async def init_db(self):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS interview_sessions (
-                    session_id TEXT PRIMARY KEY,
-                    candidate_id TEXT,
-                    job_title TEXT,
-                    timestamp TEXT,
-                    data_path TEXT
-                )
-            """)
-            await db.commit()
+        db = await self._connection()
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS interview_sessions (
+                session_id TEXT PRIMARY KEY,
+                candidate_id TEXT,
+                job_title TEXT,
+                timestamp TEXT,
+                data_path TEXT
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS job_postings (
+                posting_id TEXT PRIMARY KEY,
+                job_title TEXT,
+                job_description TEXT,
+                created_at TEXT
+            )
+        """)
+        for statement in SCORE_TABLES:
+            await db.execute(statement)
+        # Keyset pagination orders by (timestamp, session_id); the filtered
+        # variants lead with the filter column so each query is one range scan.
+        for statement in LOG_INDEXES:
+            await db.execute(statement)
+        await db.commit()
 
+    @traced("db.save_session")
     async def save_session(self, session: InterviewSession):
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO interview_sessions (session_id, candidate_id, job_title, timestamp, data_path)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                session.session_id,
-                session.candidate_id,
-                session.job_title,
-                session.timestamp,
-                session.data_path
-                ))
-            await db.commit()
+        """Queue a session log row and wait until its batch is committed."""
+        row = (
+            session.session_id,
+            session.candidate_id,
+            session.job_title,
+            session.timestamp,
+            session.data_path
+            )
+        await self._write([(INSERT_SESSION, row)])
+
+    @traced("db.save_scores")
+    async def save_scores(
+        self, session_id: str, candidate_id: str, job_title: str, timestamp: str,
+        report: dict
+        ):
+        """
+        Record the scores of a (provisional or final) report, replacing any
+        earlier scores of the session, and wait until they are committed.
+
+        Args:
+            session_id (str): The interview session.
+            candidate_id (str): The candidate.
+            job_title (str): The job title.
+            timestamp (str): ISO start time of the interview.
+            report (dict): The stored report.
+        """
+        questions = report.get("questions_and_answers", [])
+        scores = [
+            (q.get("evaluation") or {}).get("score") for q in questions
+            ]
+        scores = [score for score in scores if score is not None]
+        statements = [(UPSERT_SCORES, (
+            session_id, candidate_id, job_title, timestamp,
+            report.get("final_score"),
+            sum(scores) / len(scores) if scores else None,
+            len(questions),
+            report.get("status", "final")
+            ))]
+        for question_id, q in enumerate(questions, start=1):
+            evaluation = q.get("evaluation") or {}
+            statements.append((UPSERT_QUESTION_SCORE, (
+                session_id, question_id, q.get("question"),
+                evaluation.get("score"), evaluation.get("comment")
+                )))
+        await self._write(statements)
+
+    async def _write(self, statements):
+        """Queue statements to run in one transaction and wait for the commit."""
+        await self._connection()
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put((statements, done))
+        await done
+
+    async def _write_loop(self):
+        """Drain the queue and commit writes in groups."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                logger.exception("Database batch write failed")
+                for _, done in batch:
+                    if not done.done():
+                        done.set_exception(e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _execute(self, statements):
+        # Consecutive statements with the same SQL go through one executemany.
+        group_sql, group_rows = None, []
+        for sql, params in statements:
+            if sql != group_sql and group_rows:
+                await self._conn.executemany(group_sql, group_rows)
+                group_rows = []
+            group_sql = sql
+            group_rows.append(params)
+        if group_rows:
+            await self._conn.executemany(group_sql, group_rows)
+
+    async def _write_batch(self, batch):
+        try:
+            await self._execute([s for statements, _ in batch for s in statements])
+            await self._conn.commit()
+        except Exception:
+            # One bad write (e.g. a duplicate session_id) must not fail the
+            # whole group, so retry one by one and report errors per caller.
+            await self._conn.rollback()
+            for statements, done in batch:
+                try:
+                    await self._execute(statements)
+                    await self._conn.commit()
+                except Exception as e:
+                    await self._conn.rollback()
+                    if not done.done():
+                        done.set_exception(e)
+                else:
+                    if not done.done():
+                        done.set_result(None)
+            return
+        for _, done in batch:
+            if not done.done():
+                done.set_result(None)
 
 
     async def get_all_logs(self):
         """Retrieve all logs from the SQLite database."""
-        async with aiosqlite.connect(self.db_path) as db:
-            async with db.execute("""
-                SELECT session_id, candidate_id, job_title, timestamp, data_path
-                FROM interview_sessions
-                """) as cursor:
-                logs = await cursor.fetchall()
+        db = await self._connection()
+        async with db.execute("""
+            SELECT session_id, candidate_id, job_title, timestamp, data_path
+            FROM interview_sessions
+            """) as cursor:
+            logs = await cursor.fetchall()
         return logs
 
 
 
     async def get_logs_by_candidate(self, candidate_id):
         """Retrieve logs for a specific candidate."""
-        async with aiosqlite.connect(self.db_path) as db:
+        db = await self._connection()
+        async with db.execute(
+            "SELECT * FROM interview_sessions WHERE candidate_id = ?", (candidate_id,)
+        ) as cursor:
+            logs = await cursor.fetchall()
+        return logs
+
+    async def iter_logs(
+        self, candidate_id=None, job_title=None, since=None, until=None,
+        after=None, limit=None
+        ):
+        """
+        Yield session log rows in (timestamp, session_id) order straight
+        from the cursor, without materializing the result set.
+
+        Args:
+            candidate_id (str): Only sessions of this candidate.
+            job_title (str): Only sessions for this job title.
+            since (str): Inclusive lower bound on the ISO timestamp.
+            until (str): Exclusive upper bound on the ISO timestamp.
+            after (tuple): Keyset cursor ``(timestamp, session_id)`` of the
+                last row already returned; rows after it are yielded.
+            limit (int): Maximum number of rows to yield.
+
+        Yields:
+            tuple: ``(session_id, candidate_id, job_title, timestamp, data_path)``.
+        """
+        clauses, params = [], []
+        if candidate_id is not None:
+            clauses.append("candidate_id = ?")
+            params.append(candidate_id)
+        if job_title is not None:
+            clauses.append("job_title = ?")
+            params.append(job_title)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if after is not None:
+            clauses.append("(timestamp, session_id) > (?, ?)")
+            params.extend(after)
+        query = f"SELECT {', '.join(LOG_FIELDS)} FROM interview_sessions"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY timestamp, session_id"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        db = await self._connection()
+        async with db.execute(query, params) as cursor:
+            cursor.arraysize = 500
+            async for row in cursor:
+                yield row
+
+    @staticmethod
+    def _score_filters(job_title=None, candidate_id=None, since=None, until=None, status=None):
+        clauses, params = [], []
+        for clause, value in (
+            ("job_title = ?", job_title), ("candidate_id = ?", candidate_id),
+            ("timestamp >= ?", since), ("timestamp < ?", until), ("status = ?", status)
+            ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    async def iter_score_groups(self, group_by: str = None, **filters):
+        """
+        Yield ``(group, final_score, mean_question_score)`` for the matching
+        interviews, ordered by group and then final score, so callers can
+        aggregate (percentiles included) in one pass.
+
+        Args:
+            group_by (str): A key of ``SCORE_GROUPS``, or ``None`` for a
+                single group.
+            **filters: ``job_title``, ``candidate_id``, ``since``, ``until``
+                and ``status``.
+        """
+        group = SCORE_GROUPS[group_by] if group_by else "NULL"
+        where, params = self._score_filters(**filters)
+        clause = " AND " if where else " WHERE "
+        query = (
+            f"SELECT {group}, final_score, mean_question_score FROM interview_scores"
+            f"{where}{clause}final_score IS NOT NULL ORDER BY 1, 2"
+            )
+        db = await self._connection()
+        async with db.execute(query, params) as cursor:
+            cursor.arraysize = 500
+            async for row in cursor:
+                yield row
+
+    async def iter_score_rows(self, table: str = "interview_scores", **filters):
+        """
+        Yield rows of ``interview_scores`` or ``question_scores`` (joined
+        to their interview for filtering) in timestamp order.
+        """
+        where, params = self._score_filters(**filters)
+        if table == "interview_scores":
+            query = (
+                f"SELECT {', '.join(SCORE_FIELDS)} FROM interview_scores{where}"
+                " ORDER BY timestamp, session_id"
+                )
+        elif table == "question_scores":
+            columns = ", ".join(f"q.{f}" for f in QUESTION_SCORE_FIELDS)
+            query = (
+                f"SELECT {columns} FROM question_scores q"
+                f" JOIN interview_scores USING (session_id){where}"
+                " ORDER BY timestamp, q.session_id, q.question_id"
+                )
+        else:
+            raise ValueError(f"Unknown score table: {table}")
+        db = await self._connection()
+        async with db.execute(query, params) as cursor:
+            cursor.arraysize = 500
+            async for row in cursor:
+                yield row
+
+    async def get_session_timestamps(self, session_ids) -> dict:
+        """Map session ids to their logged interview timestamps."""
+        db = await self._connection()
+        timestamps = {}
+        session_ids = list(session_ids)
+        for i in range(0, len(session_ids), 500):
+            chunk = session_ids[i:i + 500]
             async with db.execute(
-                "SELECT * FROM interview_sessions WHERE candidate_id = ?", (candidate_id,)
+                "SELECT session_id, timestamp FROM interview_sessions"
+                f" WHERE session_id IN ({', '.join('?' * len(chunk))})", chunk
             ) as cursor:
-                logs = await cursor.fetchall()
-        return logs
+                timestamps.update(await cursor.fetchall())
+        return timestamps
+
+    async def save_job_posting(
+        self, posting_id: str, job_title: str, job_description: str, created_at: str
+        ):
+        """Register an open job posting and wait until it is committed."""
+        await self._write([(
+            "INSERT OR REPLACE INTO job_postings VALUES (?, ?, ?, ?)",
+            (posting_id, job_title, job_description, created_at)
+            )])
+
+    async def get_job_postings(self):
+        """Retrieve every registered job posting as dicts."""
+        db = await self._connection()
+        async with db.execute(
+            "SELECT posting_id, job_title, job_description, created_at FROM job_postings"
+            " ORDER BY created_at"
+        ) as cursor:
+            rows = await cursor.fetchall()
+        return [
+            dict(zip(("posting_id", "job_title", "job_description", "created_at"), row))
+            for row in rows
+            ]
+
+    async def delete_job_posting(self, posting_id: str) -> bool:
+        """Remove a job posting; returns whether it existed."""
+        db = await self._connection()
+        # Group-committed writes share executemany calls, so their row counts
+        # are not per caller: look the posting up first.
+        async with db.execute(
+            "SELECT 1 FROM job_postings WHERE posting_id = ?", (posting_id,)
+        ) as cursor:
+            if await cursor.fetchone() is None:
+                return False
+        await self._write([("DELETE FROM job_postings WHERE posting_id = ?", (posting_id,))])
+        return True
 
     async def get_log_data(self, data):
-        fields = ["session_id", "candidate_id", "job_title", "timestamp", "data_path"]
-        log = [dict(zip(fields, row)) for row in data]
+        log = [dict(zip(LOG_FIELDS, row)) for row in data]
         data = json.dumps(log)
         return data
 
@@ -72,6 +481,7 @@ async def main():
     db = Database()
     data = await db.get_all_logs()
     await db.get_log_data(data)
+    await db.close()
 
 
 if __name__ == '__main__':
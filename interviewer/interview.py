@@ -4,24 +4,38 @@ the management of interview sessions, question generation, response
 evaluation, and result validation. It integrates with multiple agents
 and handles the entire interview lifecycle.
 """
+import asyncio
 import uuid
 import json
 from datetime import datetime
 import logging
 from fastapi import HTTPException
+import config
+from conversation import build_context, summarize_usage
 from database import Database
 from models import (
-    InterviewRequest, CandidateResponse, EvaluationRequest, InterviewSession
+    InterviewRequest, CandidateResponse, EvaluationRequest, InterviewSession, Question
     )
+from llm_client import LLMOverloadedError, Priority
 from question_agent import QuestionAgent
+from question_cache import QuestionCache
+from question_pool import QuestionPool
 from response_evaluation_agent import ResponseEvaluationAgent
 from validation_agent import ValidationAgent
-from storage import StorageManager
+from session_store import create_session_store
+from storage import create_storage
+from tracing import traced
+from logging_setup import bind_session, log_payload
+from work_queue import QueuedEvaluationAgent, QueuedQuestionAgent, QueuedValidationAgent, WorkQueue
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PROVISIONAL_FEEDBACK = (
+    "Provisional score: mean of the per-question evaluations. "
+    "Validated feedback is pending."
+    )
+
 """
     Manages the interview process by coordinating the generation of
     questions, evaluation of responses, and validation of results. It
@@ -32,49 +46,148 @@ logger = logging.getLogger(__name__)
 class InterviewManager:
     def __init__(self):
         """Initializes the InterviewManager with required agents and storage."""
-        self.question_agent = QuestionAgent()
-        self.evaluation_agent = ResponseEvaluationAgent()
-        self.validation_agent = ValidationAgent()
-        self.storage = StorageManager()
+        self.question_cache = QuestionCache(
+            maxsize=config.QUESTION_CACHE_SIZE,
+            ttl=config.QUESTION_CACHE_TTL,
+            redis_url=config.REDIS_URL if config.QUESTION_CACHE_REDIS else None
+            )
+        if config.AGENT_QUEUE:
+            # LLM calls run on worker.py processes fed through Redis Streams.
+            self.work_queue = WorkQueue(
+                config.REDIS_URL,
+                timeout=config.AGENT_QUEUE_TIMEOUT,
+                max_attempts=config.AGENT_QUEUE_ATTEMPTS,
+                claim_idle=config.AGENT_QUEUE_CLAIM_IDLE
+                )
+            self.question_agent = QueuedQuestionAgent(self.work_queue, cache=self.question_cache)
+            self.evaluation_agent = QueuedEvaluationAgent(self.work_queue)
+            self.validation_agent = QueuedValidationAgent(self.work_queue)
+            pool_agent = QueuedQuestionAgent(self.work_queue, priority=Priority.BACKGROUND)
+        else:
+            self.work_queue = None
+            self.question_agent = QuestionAgent(cache=self.question_cache)
+            self.evaluation_agent = ResponseEvaluationAgent()
+            self.validation_agent = ValidationAgent()
+            pool_agent = None
+        self.storage = create_storage(
+            config.REPORT_STORE, file_path=config.REPORT_STORE_PATH,
+            **({"segment_size": config.REPORT_SEGMENT_SIZE,
+                "compress": config.REPORT_COMPRESSION, "fsync": config.REPORT_FSYNC}
+               if config.REPORT_STORE == "segmented" else {})
+            )
         self.db = Database()
-        self.sessions = {}
+        self.question_pool = QuestionPool(
+            self.db,
+            size=config.QUESTION_POOL_SIZE,
+            max_age=config.QUESTION_POOL_MAX_AGE,
+            poll_interval=config.QUESTION_POOL_POLL_INTERVAL,
+            temperature=config.QUESTION_POOL_TEMPERATURE,
+            agent=pool_agent,
+            work_queue=self.work_queue,
+            refresh_interval=config.QUESTION_POOL_REFRESH_INTERVAL
+            )
+        self.sessions = create_session_store(
+            config.SESSION_STORE,
+            ttl=config.SESSION_TTL,
+            **({"redis_url": config.REDIS_URL} if config.SESSION_STORE == "redis" else
+               {"max_sessions": config.SESSION_MAX,
+                "sweep_interval": config.SESSION_SWEEP_INTERVAL})
+            )
+        self.async_evaluation = config.ASYNC_EVALUATION
+        self.provisional_reports = config.PROVISIONAL_REPORTS
+        self.validation_attempts = config.VALIDATION_ATTEMPTS
+        # Bounds the evaluations this process runs against the LLM at once.
+        self.evaluation_semaphore = asyncio.Semaphore(config.EVALUATION_CONCURRENCY)
+        self._background_tasks = set()
+        # Tasks of this process other requests can wait on: WebSocket
+        # evaluations per (session_id, question_id), validations per session.
+        self._answer_tasks = {}
+        self._validations = {}
+
+    def models(self) -> set:
+        """Names of the LLM models used by the agents."""
+        return {
+            self.question_agent.agent_client.model,
+            self.evaluation_agent.agent_client.model,
+            self.validation_agent.agent_client.model
+            }
 
-    async def generate_questions(self, session_id: str):
+    async def get_session(self, session_id: str) -> dict:
+        """Load a session from the store or raise 404."""
+        bind_session(session_id)
+        session = await self.sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return session
+
+    def _spawn(self, coro):
+        """Run a coroutine as a tracked background task."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    async def shutdown(self):
+        """Stop pre-generation and wait for in-flight background evaluations and finalizations."""
+        await self.question_pool.stop()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    @traced("agent.questions")
+    async def generate_questions(self, session: dict):
         """
         Generates interview questions based on the job title and description
-        of the session.
+        of the session, or takes a pre-generated set from the question pool,
+        and sets up the session's chat context. The prompt
+        usage of the call is recorded under key 0 of ``prompt_usage``.
 
         Args:
-            session_id (str): The unique identifier of the interview session.
+            session (dict): The interview session.
 
         Returns:
             dict: A dictionary mapping question IDs to questions.
         """
-        if session_id not in self.sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-
         role = str(
-            f"{self.sessions[session_id]['job_title']}\n"
-            f"{self.sessions[session_id]['job_description']}"
+            f"{session['job_title']}\n"
+            f"{session['job_description']}"
             )
 
-        interview_questions = await self.question_agent.async_generate_questions(role)
-
-        # Output the generated questions
-        for i, question_obj in enumerate(interview_questions, start=1):
-            print(f"Question {i}: {question_obj.question}")
+        context = build_context(role)
+        usage = {}
+        pooled = self.question_pool.take(role)
+        if pooled is not None:
+            interview_questions = [Question(question=q) for q in pooled]
+        else:
+            interview_questions = await self.question_agent.async_generate_questions(
+                role, context=context, usage=usage
+                )
+        # Every later agent call extends this conversation, so Ollama can
+        # reuse the KV cache of the shared prefix.
+        session["context"] = context + self.question_agent.conversation_turns(
+            interview_questions
+            )
+        if usage:
+            session["prompt_usage"][0] = usage
 
         question_data = {i: q_obj.question for i, q_obj in enumerate(
             interview_questions, start=1
             )}
+        log_payload(
+            logger, "payload.questions", "Generated questions", question_data,
+            session_id=session["session_id"], pooled=pooled is not None
+            )
 
         return question_data
 
 
+    @traced("interview.start")
     async def start_interview(self, request: InterviewRequest) -> dict:
         """Initialize an interview session."""
+        # Refuse before spending an LLM call on questions.
+        await self.sessions.check_capacity()
 
         session_id = str(uuid.uuid4())
+        bind_session(session_id)
 
         session_data = {
             "session_id": session_id,
@@ -82,134 +195,611 @@ class InterviewManager:
             "job_title": request.job_title,
             "job_description": request.job_description,
             "timestamp": datetime.now().isoformat(),
-            "data_path": f"{self.storage.path}/{session_id}.json",
+            "data_path": self.storage.report_path(session_id),
             "questions": {},
             "answers": {},
             "evaluations": {},
+            "evaluation_status": {},
+            "prompt_usage": {},
             "validation": {}
             }
-        self.sessions[session_id] = session_data
-        #await self.storage.store_into_redis(session_id, session_data)
-        questions = await self.generate_questions(session_id)
-        self.sessions[session_id]["questions"] = questions
-        #await self.storage.store_questions_in_redis(session_id, questions)
+        questions = await self.generate_questions(session_data)
+        session_data["questions"] = questions
+        await self.sessions.create(session_id, session_data)
         return {"session_id": session_id, "questions": questions}
 
 
-    async def candidate_answer(self, session_id: str, response: CandidateResponse) -> dict:
-        if session_id not in self.sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
+    @traced("interview.answer")
+    async def candidate_answer(
+        self, session_id: str, response: CandidateResponse, finalize: bool = True
+        ) -> dict:
+        session = await self.get_session(session_id)
+        if response.question_id not in session["questions"]:
+            raise HTTPException(status_code=404, detail="Question not found")
+
+        await self.sessions.set_item(
+            session_id, "answers", response.question_id, response.answer
+            )
+
+        if self.async_evaluation:
+            await self.sessions.set_item(
+                session_id, "evaluation_status", response.question_id, "pending"
+                )
+            self._spawn(self._evaluate_in_background(session, response, finalize))
+            return {"status": "evaluation_pending", "question_id": response.question_id}
+
+        await self.evaluate_answer(session, response)
+
+        if finalize and await self.sessions.count(session_id, "answers") == len(
+            session["questions"]
+            ) and await self.sessions.claim(session_id, "finalizing"):
+            return await self.complete_interview(session_id)
+        return {"status": "response_recorded"}
+
+
+    @traced("interview.answers")
+    async def candidate_answers(
+        self, session_id: str, responses: list[CandidateResponse], finalize: bool = True
+        ) -> dict:
+        """
+        Records several answers at once, evaluates them concurrently and
+        finalizes the interview when every question has been answered.
+
+        Args:
+            session_id (str): The unique identifier of the interview session.
+            responses (list[CandidateResponse]): The candidate's answers.
+            finalize (bool): Complete the interview once every question is
+                evaluated; when unset the client finalizes it through
+                ``stream_feedback``.
+
+        Returns:
+            dict: The final report, or the recorded evaluations when some
+                  questions are still unanswered.
+        """
+        session = await self.get_session(session_id)
+        unknown = [r.question_id for r in responses if r.question_id not in session["questions"]]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Questions not found: {unknown}")
+
+        for response in responses:
+            await self.sessions.set_item(
+                session_id, "answers", response.question_id, response.answer
+                )
+
+        results = await asyncio.gather(
+            *(self.evaluate_answer(session, response) for response in responses),
+            return_exceptions=True
+            )
+        for result in results:
+            if isinstance(result, LLMOverloadedError):
+                raise result
+        failed = {
+            response.question_id: str(result)
+            for response, result in zip(responses, results)
+            if isinstance(result, Exception)
+            }
+        if failed:
+            raise HTTPException(status_code=500, detail=f"Error evaluating answers: {failed}")
+
+        if finalize and await self.sessions.count(session_id, "answers") == len(
+            session["questions"]
+            ) and await self.sessions.claim(session_id, "finalizing"):
+            return await self.complete_interview(session_id)
+        return {
+            "status": "responses_recorded",
+            "evaluations": {
+                response.question_id: evaluation
+                for response, evaluation in zip(responses, results)
+                }
+            }
+
+
+    async def answer_in_background(self, session_id: str, response: CandidateResponse):
+        """
+        Records an answer and evaluates it in a background task that
+        outlives the caller, finalizing the interview after the last
+        evaluation. Used by the WebSocket channel, which keeps receiving
+        answers while earlier ones are evaluated.
+
+        Returns:
+            asyncio.Task: Resolves to ``(evaluation, report)``, where
+                ``report`` is set when this answer completed the interview.
+
+        Raises:
+            HTTPException: 404 if the session or question does not exist.
+        """
+        session = await self.get_session(session_id)
+        if response.question_id not in session["questions"]:
+            raise HTTPException(status_code=404, detail="Question not found")
+        await self.sessions.set_item(
+            session_id, "answers", response.question_id, response.answer
+            )
+        await self.sessions.set_item(
+            session_id, "evaluation_status", response.question_id, "pending"
+            )
+        key = (session_id, response.question_id)
+        task = self._spawn(self._answer_task(session, response))
+        self._answer_tasks[key] = task
+
+        def done(task):
+            if self._answer_tasks.get(key) is task:
+                del self._answer_tasks[key]
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(
+                    "Answer %s of session %s failed: %r", key[1], session_id, task.exception()
+                    )
+        task.add_done_callback(done)
+        return task
+
+    async def _answer_task(self, session: dict, response: CandidateResponse):
+        session_id = session["session_id"]
+        try:
+            evaluation = await self.evaluate_answer(session, response)
+        except Exception:
+            await self.sessions.set_item(
+                session_id, "evaluation_status", response.question_id, "failed"
+                )
+            raise
+        await self.sessions.set_item(
+            session_id, "evaluation_status", response.question_id, "done"
+            )
+        report = None
+        if await self.sessions.count(session_id, "evaluations") == len(
+            session["questions"]
+            ) and await self.sessions.claim(session_id, "finalizing"):
+            report = await self.complete_interview(session_id)
+        return evaluation, report
+
+    def answer_tasks(self, session_id: str) -> dict:
+        """Evaluations of a session running in this process, per question id."""
+        return {
+            question_id: task for (sid, question_id), task in self._answer_tasks.items()
+            if sid == session_id
+            }
 
-        self.sessions[session_id]["answers"][response.question_id] = response.answer
+    async def wait_final_report(self, session_id: str):
+        """
+        The stored report of a session once its background validation in
+        this process, if any, has finished; ``None`` if there is no report.
+        """
+        task = self._validations.get(session_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return await self.storage.read_report(session_id)
 
+
+    @traced("agent.evaluation")
+    async def evaluate_answer(self, session: dict, response: CandidateResponse) -> dict:
+        """
+        Evaluates one answer with the ResponseEvaluationAgent and stores the
+        score and comment in the session.
+
+        Args:
+            session (dict): The interview session.
+            response (CandidateResponse): The candidate's answer.
+
+        Returns:
+            dict: The evaluation with 'score' and 'comment'.
+        """
+        session_id = session["session_id"]
         evaluation_request = EvaluationRequest.model_validate_json(json.dumps({
-            'question': self.sessions[session_id]["questions"][response.question_id],
+            'question': session["questions"][response.question_id],
             'answer': response.answer
             }))
 
         job = str(
-            f"{self.sessions[session_id]['job_title']}\n"
-            f"{self.sessions[session_id]['job_description']}"
+            f"{session['job_title']}\n"
+            f"{session['job_description']}"
             )
 
-        eval_response = await self.evaluation_agent.async_generate_response_evaluation(
-                job, evaluation_request
-                )
-        print(
-            f"score: {eval_response.score}"
-            f"comment: {eval_response.comment}"
+        usage = {}
+        async with self.evaluation_semaphore:
+            eval_response = await self.evaluation_agent.async_generate_response_evaluation(
+                    job, evaluation_request, context=session.get("context"), usage=usage
+                    )
+        log_payload(
+            logger, "payload.evaluation", "Evaluated answer", eval_response.comment,
+            session_id=session_id, question_id=response.question_id,
+            score=eval_response.score
             )
-        self.sessions[session_id]["evaluations"][response.question_id] = {
+        evaluation = {
             'score': eval_response.score,
             'comment': eval_response.comment
             }
+        await self.sessions.set_item(
+            session_id, "evaluations", response.question_id, evaluation
+            )
+        if usage:
+            await self.sessions.set_item(
+                session_id, "prompt_usage", response.question_id, usage
+                )
+        return evaluation
 
 
-        if len(self.sessions[session_id]["answers"]) == len(
-            self.sessions[session_id]["questions"]
-            ):
-            return await self.complete_interview(session_id)
-        return {"status": "response_recorded"}
+    async def _evaluate_in_background(
+        self, session: dict, response: CandidateResponse, finalize: bool = True
+        ):
+        """
+        Evaluates an answer outside the request and finalizes the interview
+        once the last evaluation has landed.
+        """
+        session_id = session["session_id"]
+        try:
+            await self.evaluate_answer(session, response)
+        except Exception:
+            logger.exception(
+                "Evaluation failed for session %s question %s",
+                session_id, response.question_id
+                )
+            await self.sessions.set_item(
+                session_id, "evaluation_status", response.question_id, "failed"
+                )
+            return
+        await self.sessions.set_item(
+            session_id, "evaluation_status", response.question_id, "done"
+            )
 
+        if finalize and await self.sessions.count(session_id, "evaluations") == len(
+            session["questions"]
+            ) and await self.sessions.claim(session_id, "finalizing"):
+            try:
+                await self.complete_interview(session_id)
+            except HTTPException as e:
+                logger.error("Finalizing session %s failed: %s", session_id, e.detail)
 
-    async def complete_interview(self, session_id) -> dict:
+
+    async def interview_status(self, session_id: str) -> dict:
         """
-        Finalizes the interview by compiling answers, evaluations, and 
-        validation results. Stores the data and generates a final report.
+        Reports the per-question evaluation state of a session.
 
         Args:
             session_id (str): The unique identifier of the interview session.
 
         Returns:
-            dict: The final report containing all interview data.
+            dict: The session state and, per question, whether it was
+                  answered and the evaluation state, score and comment.
         """
-        if session_id not in self.sessions:
+        session = await self.sessions.get(session_id)
+        if session is None:
+            if await self.storage.has_report(session_id):
+                return {"session_id": session_id, "state": "completed", "questions": {}}
             raise HTTPException(status_code=404, detail="Session not found")
 
+        questions = {}
+        for question_id in session["questions"]:
+            if question_id in session["evaluations"]:
+                questions[question_id] = {
+                    "evaluation": "done", **session["evaluations"][question_id]
+                    }
+            elif question_id in session["answers"]:
+                questions[question_id] = {
+                    "evaluation": session["evaluation_status"].get(question_id, "pending")
+                    }
+            else:
+                questions[question_id] = {"evaluation": "not_answered"}
+
+        if session.get("finalizing"):
+            state = "validating" if session.get("report") == "provisional" else "completing"
+        elif session.get("error"):
+            state = "failed"
+        else:
+            state = "in_progress"
+        return {
+            "session_id": session_id, "state": state, "questions": questions,
+            "prompt_usage": summarize_usage(session.get("prompt_usage", {}).values())
+            }
+
+
+    @staticmethod
+    def build_transcript(session: dict) -> str:
+        """Renders the questions, answers and evaluations for validation."""
         data = []
-        for k, _ in enumerate(range(len(self.sessions[session_id]["answers"])), start=1):
+        for k, _ in enumerate(range(len(session["answers"])), start=1):
             text = str(
-                f"question {k}: {self.sessions[session_id]['questions'][k]}\n"
-                f"answer   {k}: {self.sessions[session_id]['answers'][k]}\n"
-                f"score    {k}: {self.sessions[session_id]['evaluations'][k]['score']}\n"
-                f"comment  {k}: {self.sessions[session_id]['evaluations'][k]['comment']}\n"
+                f"question {k}: {session['questions'][k]}\n"
+                f"answer   {k}: {session['answers'][k]}\n"
+                f"score    {k}: {session['evaluations'][k]['score']}\n"
+                f"comment  {k}: {session['evaluations'][k]['comment']}\n"
             )
             data.append(f"The Interview Question {k}:\n{text}\n\n")
 
-        data_result = str(
-            f'Job Title: {self.sessions[session_id]["job_title"]}\n'
-            f'Job Description: {self.sessions[session_id]["job_description"]}\n\n\n'
-            f'{"\n".join(data)}'
+        transcript = "\n".join(data)
+        if session.get("context"):
+            # The job is already part of the session's chat context.
+            return transcript
+        return str(
+            f'Job Title: {session["job_title"]}\n'
+            f'Job Description: {session["job_description"]}\n\n\n'
+            f'{transcript}'
             )
-        print(data_result)
+
+
+    @traced("interview.complete")
+    async def complete_interview(self, session_id) -> dict:
+        """
+        Finalizes the interview by compiling answers, evaluations, and 
+        validation results. Stores the data and generates a final report.
+
+        With provisional reports enabled, a report scored from the
+        per-question evaluations is stored and returned at once, and the
+        ValidationAgent upgrades it in the background.
+
+        Args:
+            session_id (str): The unique identifier of the interview session.
+
+        Returns:
+            dict: The final (or provisional) report containing all interview data.
+        """
+        session = await self.get_session(session_id)
+        if self.provisional_reports:
+            report = await self.save_provisional_report(session)
+            task = self._spawn(self._validate_in_background(session_id))
+            self._validations[session_id] = task
+            task.add_done_callback(lambda _: self._validations.pop(session_id, None))
+            return report
+        return await self.validate_interview(session)
+
+
+    @traced("agent.validation")
+    async def validate_interview(self, session: dict) -> dict:
+        """Runs the ValidationAgent on a session and saves the final report."""
+        session_id = session["session_id"]
+        data_result = self.build_transcript(session)
+        log_payload(
+            logger, "payload.transcript", "Validating transcript", data_result,
+            level=logging.DEBUG, session_id=session_id
+            )
+        usage = {}
         try:
             validation = await self.validation_agent.async_generate_response_validation(
-                data_result
+                data_result, context=session.get("context"), usage=usage
                 )
+            return await self.save_final_report(session, validation, usage)
+        except LLMOverloadedError:
+            await self.sessions.release(session_id, "finalizing")
+            raise
+        except Exception as e:
+            await self._finalization_failed(session_id, e)
+            raise HTTPException(status_code=500, detail=f"Error validating scores: {e}")
 
-            self.sessions[session_id]["validation"] = {
-                "summary_score":validation.validated_scores,
-                "feedback": validation.feedback
+
+    async def _validate_in_background(self, session_id: str):
+        """
+        Upgrades a provisional report once validation succeeds, waiting out
+        LLM overload. On failure the provisional report stays in place and
+        the session can be finalized again through ``stream_feedback``.
+        """
+        for attempt in range(1, self.validation_attempts + 1):
+            try:
+                await self.validate_interview(await self.get_session(session_id))
+                return
+            except LLMOverloadedError as e:
+                if attempt == self.validation_attempts:
+                    logger.warning("Validation of session %s gave up: %s", session_id, e)
+                    await self.sessions.update(session_id, {"error": str(e)})
+                    return
+                await asyncio.sleep(e.retry_after)
+                if not await self.sessions.claim(session_id, "finalizing"):
+                    return  # finalized meanwhile through stream_feedback
+            except HTTPException as e:
+                logger.error("Validating session %s failed: %s", session_id, e.detail)
+                return
+
+
+    async def _finalization_failed(self, session_id: str, error: Exception):
+        # Let a later answer or retry finalize the session again.
+        await self.sessions.update(session_id, {"error": str(error)})
+        await self.sessions.release(session_id, "finalizing")
+
+
+    @staticmethod
+    def build_report(session: dict, final_score, feedback: str, status: str, usage=()) -> dict:
+        """Assembles the stored report of a session."""
+        return {
+            "candidate_id": session["candidate_id"],
+            "job_title": session["job_title"],
+            "questions_and_answers": [
+                {
+                    "question": session["questions"].get(i),
+                    "response": session["answers"].get(i),
+                    "evaluation": session["evaluations"].get(i),
                 }
+                for i in session["questions"]
+            ],
+            "final_score": final_score,
+            "feedback": feedback,
+            "status": status,
+            "prompt_usage": summarize_usage(
+                [*session.get("prompt_usage", {}).values(), *usage]
+                )
+        }
 
-            print(self.sessions[session_id]["data_path"])
-
-            # Prepare final report
-            final_report = {
-                "candidate_id": self.sessions[session_id]["candidate_id"],
-                "job_title": self.sessions[session_id]["job_title"],
-                "questions_and_answers": [
-                    {
-                        "question": self.sessions[session_id]["questions"].get(i),
-                        "response": self.sessions[session_id]["answers"].get(i),
-                        "evaluation": self.sessions[session_id]["evaluations"].get(i),
-                    }
-                    for i, q in enumerate(self.sessions[session_id]["questions"])
-                ],
-                "final_score": validation.validated_scores,
-                "feedback": validation.feedback
-            }
 
-            # Save to storage
-            await self.storage.save_interview_data(
-                self.sessions[session_id]["data_path"],
-                final_report
+    async def _persist_report(self, session: dict, report: dict):
+        """
+        Stores the report and its scores and, the first time, the session
+        log, concurrently.
+        """
+        writes = [
+            self.storage.save_report(session["session_id"], report),
+            self.db.save_scores(
+                session["session_id"], session["candidate_id"], session["job_title"],
+                session["timestamp"], report
                 )
-
-            # Log session
+            ]
+        if not session.get("report"):
             session_log = InterviewSession(
-                session_id=session_id,
-                candidate_id=self.sessions[session_id]["candidate_id"],
-                job_title=self.sessions[session_id]["job_title"],
-                timestamp=self.sessions[session_id]["timestamp"],
-                data_path=self.sessions[session_id]["data_path"]
-            )
-            print(session_log)
-            await self.db.save_session(session_log)
-
-            # Cleanup session
-            del self.sessions[session_id]
-            print(final_report)
-            return final_report
+                session_id=session["session_id"],
+                candidate_id=session["candidate_id"],
+                job_title=session["job_title"],
+                timestamp=session["timestamp"],
+                data_path=session["data_path"]
+            )
+            writes.append(self.db.save_session(session_log))
+        await asyncio.gather(*writes)
+
+
+    async def save_provisional_report(self, session: dict) -> dict:
+        """
+        Stores a report scored as the mean of the per-question evaluations,
+        pending validation, and logs the session.
+
+        Args:
+            session (dict): The fully evaluated interview session.
+
+        Returns:
+            dict: The provisional report.
+        """
+        scores = [e["score"] for e in session["evaluations"].values()]
+        report = self.build_report(
+            session,
+            final_score=round(sum(scores) / len(scores)) if scores else None,
+            feedback=PROVISIONAL_FEEDBACK,
+            status="provisional"
+            )
+        await self._persist_report(session, report)
+        await self.sessions.update(session["session_id"], {"report": "provisional"})
+        session["report"] = "provisional"
+        log_payload(
+            logger, "payload.report", "Saved provisional report", report,
+            session_id=session["session_id"]
+            )
+        return report
+
+
+    async def save_final_report(
+        self, session: dict, validation, validation_usage: dict = None
+        ) -> dict:
+        """
+        Builds the final report from a validated session, stores it, logs
+        the session and removes it from the session store.
+
+        Args:
+            session (dict): The interview session.
+            validation (ValidationResponse): The ValidationAgent result.
+            validation_usage (dict): Prompt token usage of the validation.
+
+        Returns:
+            dict: The final report containing all interview data.
+        """
+        session_id = session["session_id"]
+
+        final_report = self.build_report(
+            session,
+            final_score=validation.validated_scores,
+            feedback=validation.feedback,
+            status="final",
+            usage=[validation_usage]
+            )
+        # Replaces the provisional report, if one was stored.
+        await self._persist_report(session, final_report)
+
+        # Cleanup session
+        await self.sessions.delete(session_id)
+        log_payload(
+            logger, "payload.report", "Saved final report", final_report,
+            session_id=session_id, data_path=session["data_path"]
+            )
+        return final_report
+
+
+    async def stream_candidate_answer(
+        self, session_id: str, response: CandidateResponse, finalize: bool = True
+        ):
+        """
+        Records an answer and returns an async iterator of streamed events:
+        ``("token", str)`` chunks of the evaluation, ``("evaluation", dict)``
+        and, when this was the last answer and ``finalize`` is set, the
+        events of ``stream_feedback``.
+
+        Raises:
+            HTTPException: 404 before streaming starts if the session or
+                question does not exist.
+        """
+        session = await self.get_session(session_id)
+        if response.question_id not in session["questions"]:
+            raise HTTPException(status_code=404, detail="Question not found")
+        await self.sessions.set_item(
+            session_id, "answers", response.question_id, response.answer
+            )
+        return self._stream_answer_events(session, response, finalize)
+
+
+    async def _stream_answer_events(
+        self, session: dict, response: CandidateResponse, finalize: bool
+        ):
+        session_id = session["session_id"]
+        evaluation_request = EvaluationRequest(
+            question=session["questions"][response.question_id],
+            answer=response.answer
+            )
+        job = f"{session['job_title']}\n{session['job_description']}"
+        usage = {}
+        try:
+            async with self.evaluation_semaphore:
+                async for kind, value in self.evaluation_agent.async_stream_response_evaluation(
+                    job, evaluation_request, context=session.get("context"), usage=usage
+                    ):
+                    if kind == "token":
+                        yield "token", value
+                    else:
+                        evaluation = {'score': value.score, 'comment': value.comment}
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error validating scores: {e}")
+            logger.exception("Streamed evaluation failed for session %s", session_id)
+            yield "error", f"Error evaluating answer: {e}"
+            return
+        await self.sessions.set_item(
+            session_id, "evaluations", response.question_id, evaluation
+            )
+        if usage:
+            await self.sessions.set_item(
+                session_id, "prompt_usage", response.question_id, usage
+                )
+        yield "evaluation", {"question_id": response.question_id, **evaluation}
+
+        if finalize and await self.sessions.count(session_id, "answers") == len(
+            session["questions"]
+            ) and await self.sessions.claim(session_id, "finalizing"):
+            async for event in self._stream_feedback_events(session_id):
+                yield event
+
+
+    async def stream_feedback(self, session_id: str):
+        """
+        Finalizes a fully evaluated session while streaming the validation.
+
+        Returns an async iterator of ``("token", str)`` chunks of the
+        ValidationAgent output followed by ``("report", dict)`` with the
+        stored final report, or ``("error", str)`` on failure.
+
+        Raises:
+            HTTPException: 404 if the session does not exist, 409 if it is
+                not fully evaluated or is already being finalized.
+        """
+        session = await self.get_session(session_id)
+        if len(session["evaluations"]) != len(session["questions"]):
+            raise HTTPException(status_code=409, detail="Interview is not fully evaluated")
+        if not await self.sessions.claim(session_id, "finalizing"):
+            raise HTTPException(status_code=409, detail="Interview is already being finalized")
+        return self._stream_feedback_events(session_id)
+
+
+    async def _stream_feedback_events(self, session_id: str):
+        session = await self.get_session(session_id)
+        usage = {}
+        try:
+            async for kind, value in self.validation_agent.async_stream_response_validation(
+                self.build_transcript(session), context=session.get("context"), usage=usage
+                ):
+                if kind == "token":
+                    yield "token", value
+                else:
+                    validation = value
+            yield "report", await self.save_final_report(session, validation, usage)
+        except LLMOverloadedError as e:
+            await self.sessions.release(session_id, "finalizing")
+            yield "error", str(e)
+        except Exception as e:
+            logger.exception("Streamed validation failed for session %s", session_id)
+            await self._finalization_failed(session_id, e)
+            yield "error", f"Error validating scores: {e}"
@@ -0,0 +1,238 @@
+"""
+WebSocket channel driving a whole interview over one connection.
+
+Messages are JSON objects with a ``type``. The client sends:
+
+    {"type": "start", "candidate_id": ..., "job_title": ..., "job_description": ...}
+    {"type": "resume", "session_id": ...}
+    {"type": "answer", "question_id": 1, "answer": ...}
+    {"type": "ping"} / {"type": "pong"}
+
+and the server pushes:
+
+    {"type": "questions", "session_id": ..., "questions": {...}}
+    {"type": "resumed", "session_id": ..., "questions": {...}, "evaluations": {...},
+     "pending": [...], "unanswered": [...]}
+    {"type": "answer_received", "question_id": ...}
+    {"type": "evaluation", "question_id": ..., "score": ..., "comment": ...}
+    {"type": "report", "report": {...}}
+    {"type": "error", "status": ..., "detail": ..., "question_id": ...}
+    {"type": "ping"} / {"type": "pong"}
+
+Answers are evaluated concurrently as they arrive; each evaluation is pushed
+when it is ready. After the last one the report follows: first the
+provisional one, if PROVISIONAL_REPORTS is enabled, then the validated one,
+after which the server closes the connection. Evaluations keep running if
+the connection drops; reconnecting with ``resume`` pushes the state of the
+session and the results still to come. Answers listed as ``pending`` with
+no evaluation arriving (e.g. after a restart) can be sent again.
+
+The server pings an idle client every ``heartbeat`` seconds and closes the
+connection when a ping goes unanswered for another ``heartbeat`` seconds.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+
+from anyio import ClosedResourceError
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+import metrics
+from llm_client import LLMOverloadedError
+from logging_setup import bind_session
+from models import CandidateResponse, InterviewRequest
+from session_store import SessionLimitError
+
+logger = logging.getLogger(__name__)
+
+# Raised by receives and sends once the client is gone.
+DISCONNECTED = (WebSocketDisconnect, ClosedResourceError, OSError, RuntimeError)
+
+
+class InterviewChannel:
+    """
+    One interview WebSocket connection.
+
+    Attributes:
+        websocket (WebSocket): The accepted connection.
+        manager (InterviewManager): Runs the interview.
+        heartbeat (float): Seconds of client silence before a ping.
+        session_id (str): The interview driven by this connection, once known.
+    """
+    def __init__(self, websocket: WebSocket, manager, heartbeat: float = 20.0):
+        self.websocket = websocket
+        self.manager = manager
+        self.heartbeat = heartbeat
+        self.session_id = None
+        self._send_lock = asyncio.Lock()
+        self._forwarders = set()
+        self._finished = asyncio.Event()
+
+    async def send(self, message: dict):
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+        metrics.ws_messages_total.labels("sent", message["type"]).inc()
+
+    async def run(self):
+        """Serve the connection until the interview ends or the client leaves."""
+        await self.websocket.accept()
+        metrics.ws_connections.inc()
+        receiver = asyncio.create_task(self._receive_loop())
+        finished = asyncio.create_task(self._finished.wait())
+        try:
+            await asyncio.wait({receiver, finished}, return_when=asyncio.FIRST_COMPLETED)
+            if finished.done() and not receiver.done():
+                # The client may leave while the close frame is sent.
+                with contextlib.suppress(*DISCONNECTED):
+                    await self.websocket.close()
+        finally:
+            receiver.cancel()
+            finished.cancel()
+            # Retrieved by a callback rather than awaited: the handler may be
+            # cancelled itself when the client leaves as the report is sent.
+            receiver.add_done_callback(self._check)
+            # Evaluations go on in the background; only stop forwarding them.
+            for task in self._forwarders:
+                task.cancel()
+            metrics.ws_connections.dec()
+
+    async def _receive_loop(self):
+        awaiting_pong = False
+        while True:
+            try:
+                text = await asyncio.wait_for(self.websocket.receive_text(), self.heartbeat)
+            except asyncio.TimeoutError:
+                if awaiting_pong:
+                    logger.info("Closing silent interview channel %s", self.session_id)
+                    await self.websocket.close(code=1001)
+                    return
+                awaiting_pong = True
+                await self.send({"type": "ping"})
+                continue
+            awaiting_pong = False
+            try:
+                message = json.loads(text)
+            except ValueError:
+                await self.send({"type": "error", "status": 400, "detail": "Invalid JSON"})
+                continue
+            kind = message.get("type") if isinstance(message, dict) else None
+            metrics.ws_messages_total.labels("received", str(kind)).inc()
+            try:
+                await self.handle(kind, message)
+            except HTTPException as e:
+                await self.send({"type": "error", "status": e.status_code, "detail": e.detail})
+            except (LLMOverloadedError, SessionLimitError) as e:
+                await self.send({
+                    "type": "error", "status": 503, "detail": str(e),
+                    "retry_after": e.retry_after
+                    })
+            except (ValidationError, KeyError, TypeError) as e:
+                await self.send({"type": "error", "status": 400, "detail": str(e)})
+
+    async def handle(self, kind: str, message: dict):
+        if kind == "ping":
+            await self.send({"type": "pong"})
+        elif kind == "pong":
+            pass
+        elif kind == "start":
+            if self.session_id is not None:
+                raise HTTPException(status_code=409, detail="Interview already started")
+            request = InterviewRequest(
+                candidate_id=message["candidate_id"],
+                job_title=message["job_title"],
+                job_description=message["job_description"]
+                )
+            result = await self.manager.start_interview(request)
+            self.session_id = result["session_id"]
+            await self.send({"type": "questions", **result})
+        elif kind == "resume":
+            if self.session_id is not None:
+                raise HTTPException(status_code=409, detail="Interview already started")
+            await self.resume(message["session_id"])
+        elif kind == "answer":
+            if self.session_id is None:
+                raise HTTPException(status_code=409, detail="Start or resume an interview first")
+            response = CandidateResponse(
+                question_id=message["question_id"], answer=message["answer"]
+                )
+            task = await self.manager.answer_in_background(self.session_id, response)
+            await self.send({"type": "answer_received", "question_id": response.question_id})
+            self._forward(response.question_id, task)
+        else:
+            raise HTTPException(status_code=400, detail=f"Unknown message type: {kind}")
+
+    async def resume(self, session_id: str):
+        bind_session(session_id)
+        session = await self.manager.sessions.get(session_id)
+        if session is None:
+            report = await self.manager.storage.read_report(session_id)
+            if report is None:
+                raise HTTPException(status_code=404, detail="Session not found")
+            self.session_id = session_id
+            await self.send({"type": "report", "report": report})
+            self._finished.set()
+            return
+        self.session_id = session_id
+        questions = session["questions"]
+        await self.send({
+            "type": "resumed",
+            "session_id": session_id,
+            "questions": dict(questions),
+            "evaluations": dict(session["evaluations"]),
+            "pending": [
+                q for q in questions if q in session["answers"] and q not in session["evaluations"]
+                ],
+            "unanswered": [q for q in questions if q not in session["answers"]]
+            })
+        for question_id, task in self.manager.answer_tasks(session_id).items():
+            self._forward(question_id, task)
+        if session.get("report") == "provisional":
+            # Evaluated and validating: push both reports.
+            self._spawn(self._send_reports(await self.manager.storage.read_report(session_id)))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._forwarders.add(task)
+        task.add_done_callback(self._forwarders.discard)
+        task.add_done_callback(self._check)
+
+    def _check(self, task: asyncio.Task):
+        """Log a task's failure, unless it only saw the client go away."""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None and not isinstance(error, DISCONNECTED):
+            logger.error("Interview channel failed: %r", error)
+
+    def _forward(self, question_id: int, task: asyncio.Task):
+        self._spawn(self._forward_answer(question_id, task))
+
+    async def _forward_answer(self, question_id: int, task: asyncio.Task):
+        try:
+            # Shielded: a dropped connection must not cancel the evaluation.
+            evaluation, report = await asyncio.shield(task)
+        except HTTPException as e:
+            await self.send({
+                "type": "error", "status": e.status_code, "detail": e.detail,
+                "question_id": question_id
+                })
+            return
+        except Exception as e:
+            await self.send({
+                "type": "error", "status": 500, "question_id": question_id,
+                "detail": f"Error evaluating answer: {e}"
+                })
+            return
+        await self.send({"type": "evaluation", "question_id": question_id, **evaluation})
+        if report is not None:
+            await self._send_reports(report)
+
+    async def _send_reports(self, report: dict):
+        await self.send({"type": "report", "report": report})
+        if report.get("status") == "provisional":
+            final = await self.manager.wait_final_report(self.session_id)
+            if final is not None and final.get("status") != "provisional":
+                await self.send({"type": "report", "report": final})
+        self._finished.set()
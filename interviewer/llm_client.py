@@ -1,10 +1,488 @@
+import asyncio
+import heapq
+import itertools
 import logging
-from ollama import AsyncClient
+import math
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+import httpx
+from ollama import AsyncClient, ResponseError
+from pydantic import ValidationError
+
+import config
+import metrics
+from conversation import prompt_usage
+from cassette import Cassette, CassetteClient
+from tracing import span
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+class Priority(IntEnum):
+    """Scheduling classes for LLM calls; lower values are served first."""
+    QUESTIONS = 0  # a candidate is waiting for the interview to start
+    EVALUATION = 1
+    VALIDATION = 2
+    BACKGROUND = 3  # pre-generation, only worth doing with idle capacity
+
+
+class LLMOverloadedError(Exception):
+    """Raised when the LLM queue is full; the caller should retry later."""
+    def __init__(self, retry_after: int):
+        super().__init__(f"LLM queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """
+    Admission control and priority queueing for LLM calls.
+
+    At most ``max_in_flight`` calls run at once; further calls wait in a
+    priority queue (FIFO within a class) and are rejected with
+    ``LLMOverloadedError`` once ``max_queue`` calls are already waiting.
+
+    Attributes:
+        max_in_flight (int): Concurrent calls allowed against the backend.
+        max_queue (int): Calls allowed to wait for a slot.
+    """
+    def __init__(self, max_in_flight: int = 2, max_queue: int = 64):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self._in_flight = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._service_time = None
+        self._stats = {
+            p: {"requests": 0, "rejected": 0, "queued": 0,
+                "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+            for p in Priority
+            }
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority):
+        """Hold one in-flight slot for the duration of the block."""
+        await self._acquire(priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self._service_time = elapsed if self._service_time is None else (
+                0.8 * self._service_time + 0.2 * elapsed
+                )
+            self._release()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until a new call could plausibly be admitted."""
+        service_time = self._service_time or 1.0
+        backlog = len(self._waiters) / self.max_in_flight + 1
+        return max(1, math.ceil(service_time * backlog))
+
+    async def _acquire(self, priority: Priority):
+        stats = self._stats[priority]
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            stats["requests"] += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            stats["rejected"] += 1
+            raise LLMOverloadedError(self.retry_after())
+
+        entry = (int(priority), next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, entry)
+        stats["queued"] += 1
+        start = time.monotonic()
+        try:
+            with span("llm.queue"):
+                await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].done() and not entry[2].cancelled():
+                # The slot was handed over just before the cancellation.
+                self._release()
+            else:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+        finally:
+            stats["queued"] -= 1
+        waited = time.monotonic() - start
+        stats["requests"] += 1
+        stats["wait_seconds_total"] += waited
+        stats["wait_seconds_max"] = max(stats["wait_seconds_max"], waited)
+
+    def _release(self):
+        # Hand the slot straight to the best waiter, if any.
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "classes": {
+                p.name.lower(): {
+                    **s,
+                    "wait_seconds_avg": (
+                        s["wait_seconds_total"] / s["requests"] if s["requests"] else 0.0
+                        )
+                    }
+                for p, s in self._stats.items()
+                }
+            }
+
+
+# Shared by every LLMClient of the process; LLM_MAX_IN_FLIGHT is per backend.
+scheduler = LLMScheduler(
+    max_in_flight=config.LLM_MAX_IN_FLIGHT * len(config.OLLAMA_HOSTS),
+    max_queue=config.LLM_MAX_QUEUE
+    )
+metrics.llm_in_flight.set_function(lambda: scheduler.in_flight)
+metrics.llm_queue_depth.set_function(lambda: scheduler.queue_depth)
+
+
+# Process-wide Ollama clients, one connection pool per host.
+_clients = {}
+_cassette = None
+
+
+def get_client(host: str = None) -> AsyncClient:
+    """
+    Return the shared Ollama client for ``host``, creating it on first use.
+    With LLM_CASSETTE_MODE set, the client records to or replays from the
+    cassette instead.
+    """
+    global _cassette  # pylint: disable=global-statement
+    host = host or config.OLLAMA_HOST
+    if host not in _clients:
+        mode = config.LLM_CASSETTE_MODE
+        client = None
+        if mode != "replay":
+            client = AsyncClient(
+                host=host,
+                limits=httpx.Limits(
+                    max_connections=config.OLLAMA_MAX_CONNECTIONS,
+                    max_keepalive_connections=config.OLLAMA_MAX_KEEPALIVE_CONNECTIONS
+                    )
+                )
+        if mode != "off":
+            if _cassette is None:
+                _cassette = Cassette(config.LLM_CASSETTE_PATH)
+            client = CassetteClient(
+                _cassette, mode=mode, client=client,
+                latency=config.LLM_REPLAY_LATENCY,
+                tokens_per_second=config.LLM_REPLAY_TOKENS_PER_SECOND
+                )
+        _clients[host] = client
+    return _clients[host]
+
+
+async def close_clients():
+    """Close every shared client's connection pool."""
+    for client in _clients.values():
+        # ollama.AsyncClient does not expose a close method in this version.
+        await client._client.aclose()  # pylint: disable=protected-access
+    _clients.clear()
+
+
+async def warm_up(models, host: str = None, keep_alive=None):
+    """
+    Load ``models`` into Ollama memory ahead of the first request, on
+    ``host`` or on every configured backend.
+
+    A chat request with no messages makes Ollama load the model and keep it
+    for ``keep_alive`` without generating anything.
+    """
+    hosts = [host] if host else [b.host for b in backends.backends]
+    for model in models:
+        for client_host in hosts:
+            start = time.monotonic()
+            await get_client(client_host).chat(
+                model=model, messages=[],
+                keep_alive=keep_alive if keep_alive is not None else config.OLLAMA_KEEP_ALIVE
+                )
+            logger.info(
+                "Warmed up model %s on %s in %.1fs", model, client_host, time.monotonic() - start
+                )
+
+
+def is_retriable(error: Exception) -> bool:
+    """Whether a failed chat call may succeed on another backend."""
+    if isinstance(error, (httpx.TransportError, ConnectionError)):
+        return True
+    return isinstance(error, ResponseError) and (
+        error.status_code >= 500 or error.status_code == 429
+        )
+
+
+class Backend:
+    """
+    One Ollama host with its load and health.
+
+    Attributes:
+        host (str): Base URL of the Ollama server.
+        outstanding (int): Calls currently sent to it.
+        latency (float): EWMA of successful call durations, in seconds.
+        failures (int): Consecutive failed calls.
+        ejected_until (float): Monotonic time until which it gets no calls.
+    """
+    def __init__(self, host: str):
+        self.host = host
+        self.outstanding = 0
+        self.latency = None
+        self.failures = 0
+        self.ejected_until = 0.0
+        metrics.llm_backend_in_flight.labels(host).set_function(lambda: self.outstanding)
+        metrics.llm_backend_healthy.labels(host).set_function(lambda: float(self.healthy))
+
+    @property
+    def client(self) -> AsyncClient:
+        return get_client(self.host)
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until == 0.0
+
+    def load(self, default_latency: float) -> float:
+        """Expected wait for a new call: queue length times service time."""
+        return (self.outstanding + 1) * (self.latency or default_latency)
+
+    def stats(self) -> dict:
+        return {
+            "host": self.host,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "latency": self.latency,
+            "failures": self.failures,
+            }
+
+
+class BackendPool:
+    """
+    Routes LLM calls across several Ollama hosts.
+
+    Each call goes to the healthy backend with the lowest expected wait
+    (outstanding calls times observed latency). A backend failing
+    ``eject_after`` calls in a row is ejected; a probe task re-checks it
+    every ``probe_interval`` seconds and brings it back once it answers.
+    Failed calls are retried on another backend up to ``retries`` times;
+    hedged calls are duplicated to a second backend when the first has not
+    answered within ``hedge_after`` seconds, and the first answer wins.
+
+    Attributes:
+        backends (list[Backend]): The configured hosts.
+        eject_after (int): Consecutive failures before ejection.
+        probe_interval (float): Seconds between probes of ejected hosts.
+        retries (int): Extra attempts on other backends for a failed call.
+        hedge_after (float): Seconds before a hedged call is duplicated;
+            0 disables hedging.
+    """
+    def __init__(
+        self, hosts, eject_after: int = 3, probe_interval: float = 10.0,
+        retries: int = 1, hedge_after: float = 0.0
+        ):
+        self.backends = [Backend(host) for host in dict.fromkeys(hosts)]
+        self.eject_after = eject_after
+        self.probe_interval = probe_interval
+        self.retries = retries
+        self.hedge_after = hedge_after
+        self._prober = None
+
+    def pick(self, exclude=()) -> Backend:
+        """The least-loaded healthy backend not in ``exclude``, if any."""
+        candidates = [b for b in self.backends if b.healthy and b not in exclude]
+        if not candidates:
+            # Every host is ejected: better to try one than to fail outright.
+            candidates = [b for b in self.backends if b not in exclude]
+        if not candidates:
+            return None
+        known = [b.latency for b in self.backends if b.latency is not None]
+        default_latency = sum(known) / len(known) if known else 1.0
+        return min(candidates, key=lambda b: b.load(default_latency))
+
+    def _succeeded(self, backend: Backend, elapsed: float):
+        backend.failures = 0
+        backend.latency = elapsed if backend.latency is None else (
+            0.8 * backend.latency + 0.2 * elapsed
+            )
+        metrics.llm_backend_requests_total.labels(backend.host, "ok").inc()
+
+    def _failed(self, backend: Backend, error: Exception):
+        backend.failures += 1
+        metrics.llm_backend_requests_total.labels(backend.host, "error").inc()
+        if backend.healthy and backend.failures >= self.eject_after and len(self.backends) > 1:
+            backend.ejected_until = time.monotonic() + self.probe_interval
+            logger.warning("Ejecting LLM backend %s after %d failures: %r",
+                           backend.host, backend.failures, error)
+
+    async def _attempt(self, backend: Backend, call):
+        backend.outstanding += 1
+        start = time.monotonic()
+        try:
+            result = await call(backend.client)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if is_retriable(e):
+                self._failed(backend, e)
+            raise
+        finally:
+            backend.outstanding -= 1
+        self._succeeded(backend, time.monotonic() - start)
+        return result
+
+    async def call(self, call, hedge: bool = False):
+        """
+        Run ``call(client)`` on the best backend, retrying retriable
+        failures on other backends and hedging when asked to.
+
+        Args:
+            call: Coroutine function taking an Ollama client.
+            hedge (bool): Duplicate the call after ``hedge_after`` seconds.
+        """
+        tried = []
+        while True:
+            backend = self.pick(exclude=tried)
+            tried.append(backend)
+            try:
+                if hedge and self.hedge_after and len(self.backends) > 1:
+                    return await self._hedged(backend, call, tried)
+                return await self._attempt(backend, call)
+            except Exception as e:
+                if not is_retriable(e) or len(tried) > self.retries or \
+                        self.pick(exclude=tried) is None:
+                    raise
+                metrics.llm_retries_total.inc()
+                logger.warning("LLM call to %s failed, retrying elsewhere: %r", backend.host, e)
+
+    async def _hedged(self, backend: Backend, call, tried: list):
+        primary = asyncio.ensure_future(self._attempt(backend, call))
+        pending = {primary}
+        hedge = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_after)
+            second = self.pick(exclude=tried)
+            if done or second is None:
+                return await primary
+            tried.append(second)
+            hedge = asyncio.ensure_future(self._attempt(second, call))
+            pending.add(hedge)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        metrics.llm_hedged_requests_total.labels(
+                            "hedge" if task is hedge else "primary"
+                            ).inc()
+                        return task.result()
+            # Both copies failed: surface the primary's error.
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream(self, call):
+        """
+        Iterate ``call(client)`` (a streaming chat) on the best backend,
+        retrying on another backend if it fails before the first chunk.
+        """
+        tried = []
+        while True:
+            backend = self.pick(exclude=tried)
+            tried.append(backend)
+            backend.outstanding += 1
+            start = time.monotonic()
+            started = False
+            try:
+                async for chunk in await call(backend.client):
+                    started = True
+                    yield chunk
+            except Exception as e:
+                if is_retriable(e):
+                    self._failed(backend, e)
+                if started or not is_retriable(e) or len(tried) > self.retries or \
+                        self.pick(exclude=tried) is None:
+                    raise
+                metrics.llm_retries_total.inc()
+                logger.warning("LLM stream from %s failed, retrying elsewhere: %r", backend.host, e)
+                continue
+            finally:
+                backend.outstanding -= 1
+            self._succeeded(backend, time.monotonic() - start)
+            return
+
+    async def probe(self):
+        """Bring back ejected backends that answer their root endpoint."""
+        now = time.monotonic()
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            for backend in self.backends:
+                if backend.healthy or backend.ejected_until > now:
+                    continue
+                try:
+                    (await client.get(backend.host)).raise_for_status()
+                except Exception as e:
+                    backend.ejected_until = now + self.probe_interval
+                    logger.info("LLM backend %s still down: %r", backend.host, e)
+                else:
+                    backend.ejected_until = 0.0
+                    backend.failures = 0
+                    logger.info("LLM backend %s is back", backend.host)
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            try:
+                await self.probe()
+            except Exception:
+                logger.exception("LLM backend probe failed")
+
+    def start(self):
+        if self._prober is None and len(self.backends) > 1:
+            self._prober = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._prober is not None:
+            self._prober.cancel()
+            try:
+                await self._prober
+            except asyncio.CancelledError:
+                pass
+            self._prober = None
+
+    def stats(self) -> dict:
+        return {
+            "hedge_after": self.hedge_after,
+            "retries": self.retries,
+            "backends": [b.stats() for b in self.backends],
+            }
+
+
+# Shared by every LLMClient that does not pin a host.
+backends = BackendPool(
+    config.OLLAMA_HOSTS,
+    eject_after=config.OLLAMA_EJECT_AFTER,
+    probe_interval=config.OLLAMA_PROBE_INTERVAL,
+    retries=config.LLM_RETRIES,
+    hedge_after=config.LLM_HEDGE_AFTER
+    )
+
+
 class LLMClient:
     """
     A client to interact with a local large language model (LLM) using asynchronous requests.
@@ -13,17 +491,137 @@ class LLMClient:
         client (AsyncClient): Asynchronous client for interacting with the LLM.
         model (str): The name of the LLM model to use.
         options (dict): Options for controlling the generation behavior, such as temperature and max tokens.
+        priority (Priority): Scheduling class of this client's calls.
+        keep_alive (str): How long Ollama keeps the model loaded after a call.
     """
-    def __init__(self, model: str, options=None):
-        self.client = AsyncClient(host="http://ollama:11434")
+    def __init__(
+        self, model: str, options=None, priority: Priority = Priority.EVALUATION,
+        host: str = None, keep_alive=None
+        ):
+        self.host = host
         self.model = model or 'llama3.2'
         self.options = options or {'temperature': 0.7, 'max_tokens': 150}
+        self.priority = priority
+        self.keep_alive = keep_alive if keep_alive is not None else config.OLLAMA_KEEP_ALIVE
 
-    async def generate_response(self, prompt: str, response_format):
-        """Generate an answers using the local LLM."""
-        return await self.client.chat(
-            model=self.model,
-            messages=[{'role': 'user', 'content': prompt}],
-            format=response_format,  # Use Pydantic to generate the schema
-            options=self.options  # Make responses more deterministic
-        )
+    @property
+    def client(self) -> AsyncClient:
+        return get_client(self.host)
+
+    async def _chat(self, **kwargs):
+        """One chat call on the pinned host, or routed across the backends."""
+        if self.host is not None:
+            return await self.client.chat(model=self.model, **kwargs)
+        return await backends.call(
+            lambda client: client.chat(model=self.model, **kwargs),
+            # Hedging only pays off where a candidate is waiting.
+            hedge=self.priority == Priority.QUESTIONS
+            )
+
+    async def _stream(self, **kwargs):
+        if self.host is not None:
+            async for chunk in await self.client.chat(model=self.model, stream=True, **kwargs):
+                yield chunk
+            return
+        async for chunk in backends.stream(
+            lambda client: client.chat(model=self.model, stream=True, **kwargs)
+            ):
+            yield chunk
+
+    @property
+    def agent(self) -> str:
+        """Metrics label of the calling agent."""
+        return self.priority.name.lower()
+
+    @staticmethod
+    def build_messages(prompt: str, context=None) -> list:
+        """The session context, if any, followed by ``prompt`` as a user turn."""
+        return [*(context or []), {'role': 'user', 'content': prompt}]
+
+    def _record_usage(self, messages, response, usage):
+        """Count the estimated prompt tokens served from Ollama's cache and fill ``usage``."""
+        call_usage = prompt_usage(messages, response)
+        if call_usage["cached_tokens_estimate"]:
+            metrics.llm_prompt_tokens_cached_estimate_total.labels(self.agent, self.model).inc(
+                call_usage["cached_tokens_estimate"]
+                )
+        if usage is not None:
+            usage.update(call_usage)
+
+    async def generate_response(
+        self, prompt: str, response_format, context=None, usage: dict = None,
+        options: dict = None
+        ):
+        """
+        Generate an answers using the local LLM.
+
+        Args:
+            prompt (str): The new user turn.
+            response_format (dict): JSON schema of the expected answer.
+            context (list): Session messages preceding the prompt.
+            usage (dict): Filled with the call's prompt token usage.
+            options (dict): Generation options overriding the client's.
+        """
+        messages = self.build_messages(prompt, context)
+        async with scheduler.slot(self.priority):
+            start = time.monotonic()
+            try:
+                with span(f"llm.{self.agent}"):
+                    response = await self._chat(
+                        messages=messages,
+                        format=response_format,  # Use Pydantic to generate the schema
+                        options=options or self.options,  # Make responses more deterministic
+                        keep_alive=self.keep_alive
+                    )
+            except Exception:
+                metrics.llm_requests_total.labels(self.agent, self.model, "error").inc()
+                raise
+            metrics.observe_llm_response(
+                self.agent, self.model, response, time.monotonic() - start
+                )
+            self._record_usage(messages, response, usage)
+            return response
+
+    def validate_response(self, schema, content: str):
+        """
+        Validate LLM output against a Pydantic model, counting failures.
+
+        Args:
+            schema (type[BaseModel]): The expected response model.
+            content (str): The JSON produced by the LLM.
+
+        Returns:
+            BaseModel: The validated response.
+        """
+        try:
+            return schema.model_validate_json(content)
+        except ValidationError:
+            metrics.llm_validation_failures_total.labels(self.agent, self.model).inc()
+            raise
+
+    async def stream_response(
+        self, prompt: str, response_format, context=None, usage: dict = None
+        ):
+        """
+        Stream an answer from the local LLM, yielding content chunks as
+        Ollama produces them. The scheduler slot is held until the stream
+        is exhausted or closed. Arguments are those of ``generate_response``.
+        """
+        messages = self.build_messages(prompt, context)
+        async with scheduler.slot(self.priority):
+            with span(f"llm.{self.agent}"):
+                start = time.monotonic()
+                async for chunk in self._stream(
+                    messages=messages,
+                    format=response_format,
+                    options=self.options,
+                    keep_alive=self.keep_alive
+                ):
+                    if chunk.message.content:
+                        yield chunk.message.content
+                    if chunk.done:
+                        # The final chunk carries the timings and token counts.
+                        metrics.observe_llm_response(
+                            self.agent, self.model, chunk, time.monotonic() - start
+                            )
+                        self._record_usage(messages, chunk, usage)
@@ -0,0 +1,199 @@
+"""
+Central logging setup for the interviewer processes.
+
+``setup_logging`` is called once by each entry point (main.py, worker.py,
+analytics.py). Modules only do ``logger = logging.getLogger(__name__)``.
+
+Records are put on a bounded queue by a ``QueueHandler`` and written by a
+``QueueListener`` thread, so logging never blocks the event loop on stdout.
+When the queue is full, records are dropped and counted instead of
+blocking. Records are JSON objects, one per line, with the ``session_id``
+bound to the current request or task (``bind_session``) and the trace id of
+the current request.
+
+Large payloads (questions, transcripts, reports) are logged through
+``log_payload``. It applies per-category sampling (LOG_SAMPLING, e.g.
+``payload.transcript=0.1``) before serializing anything, and truncates the
+serialized payload to LOG_PAYLOAD_MAX_CHARS. Other records are sampled by
+logger name (``uvicorn.access=0.01``) in ``ContextFilter``.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import config
+import metrics
+from tracing import current_trace
+
+_session_id = ContextVar("session_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed in ``extra``.
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+_sampling = {}
+_payload_max_chars = 2000
+
+
+def bind_session(session_id: str):
+    """Attach ``session_id`` to every record logged from the current context."""
+    _session_id.set(session_id)
+
+
+def parse_mapping(value: str, convert) -> dict:
+    """Parse ``"a=1,b=2"`` settings into a dict, converting the values."""
+    mapping = {}
+    for item in value.split(","):
+        if "=" in item:
+            key, _, raw = item.partition("=")
+            mapping[key.strip()] = convert(raw.strip())
+    return mapping
+
+
+def sampled(category: str) -> bool:
+    """Whether a record of ``category`` survives its sampling rate."""
+    rate = _sampling.get(category)
+    return rate is None or rate >= 1 or random.random() < rate
+
+
+class ContextFilter(logging.Filter):
+    """Adds the bound session id and the request's trace id, and samples by logger."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Payload records carry a category and were sampled by log_payload.
+        if getattr(record, "category", None) is None and not sampled(record.name):
+            return False
+        if getattr(record, "session_id", None) is None:
+            record.session_id = _session_id.get()
+        trace = current_trace()
+        if trace is not None and getattr(record, "trace_id", None) is None:
+            record.trace_id = trace.trace_id
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with every ``extra`` field included."""
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and value is not None:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """A QueueHandler that drops records rather than wait for a full queue."""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now; the arguments may change
+        # before the listener thread gets to them.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.log_records_dropped_total.inc()
+
+
+def truncate(text: str, limit: int) -> str:
+    if limit and len(text) > limit:
+        return f"{text[:limit]}... [{len(text) - limit} more chars]"
+    return text
+
+
+def log_payload(
+    logger: logging.Logger, category: str, message: str, payload,
+    level: int = logging.INFO, **fields
+    ):
+    """
+    Log a potentially large payload, sampled per category and size-capped.
+
+    Args:
+        logger (logging.Logger): The module's logger.
+        category (str): Sampling category, e.g. ``payload.report``.
+        message (str): Short description of the record.
+        payload: Any JSON-serializable value (or a string).
+        level (int): Log level.
+        **fields: Extra structured fields (``question_id=...``).
+    """
+    if not logger.isEnabledFor(level) or not sampled(category):
+        return
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    logger.log(level, message, extra={
+        "category": category, "payload": truncate(text, _payload_max_chars), **fields
+        })
+
+
+def setup_logging(
+    level: str = None, fmt: str = None, sampling: str = None,
+    payload_max_chars: int = None, levels: str = None, queue_size: int = None
+    ):
+    """
+    Route every log record through one queue to a stdout writer thread.
+    Arguments default to the LOG_* settings of config.py; calling it again
+    replaces the previous setup.
+
+    Args:
+        level (str): Root log level.
+        fmt (str): ``json`` or ``text``.
+        sampling (str): ``category=rate`` pairs, comma separated.
+        payload_max_chars (int): Cap on logged payloads; 0 disables it.
+        levels (str): ``logger=LEVEL`` pairs, comma separated.
+        queue_size (int): Records buffered before new ones are dropped.
+    """
+    global _listener, _sampling, _payload_max_chars
+    _sampling = parse_mapping(sampling if sampling is not None else config.LOG_SAMPLING, float)
+    _payload_max_chars = (
+        payload_max_chars if payload_max_chars is not None else config.LOG_PAYLOAD_MAX_CHARS
+        )
+    fmt = fmt or config.LOG_FORMAT
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s [%(session_id)s] %(message)s"
+        ))
+    handler = DroppingQueueHandler(queue.Queue(queue_size or config.LOG_QUEUE_SIZE))
+    handler.addFilter(ContextFilter())
+
+    stop_logging()
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level or config.LOG_LEVEL)
+    for name, logger_level in parse_mapping(
+        levels if levels is not None else config.LOG_LEVELS, str.upper
+        ).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def stop_logging():
+    """Write out the queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
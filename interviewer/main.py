@@ -4,18 +4,37 @@ Main module for the interviewer FastAPI application.
 This module initializes the FastAPI app, defines routes for managing interview sessions,
 and orchestrates the interview process using the InterviewManager and ReportManager classes.
 """
+import asyncio
+import json
 import logging
+import time
+import uuid
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
-from models import InterviewRequest, CandidateResponse, InterviewReportRequest
+from datetime import datetime
+import config
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+import metrics
+from models import InterviewRequest, CandidateResponse, InterviewReportRequest, Job
 from interview import InterviewManager
+from interview_ws import InterviewChannel
+from llm_client import LLMOverloadedError, backends, close_clients, scheduler, warm_up
 from reports import ReportManager
+from analytics import EXPORT_TABLES, ScoreAnalytics
+from session_store import SessionLimitError
+from tracing import tracer
+from logging_setup import log_payload, setup_logging
 
-logging.basicConfig(level=logging.INFO)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-report_manager = ReportManager()
 interview_manager = InterviewManager()
+report_manager = ReportManager(
+    storage=interview_manager.storage, db=interview_manager.db,
+    cache_max_bytes=config.REPORT_CACHE_BYTES
+    )
+score_analytics = ScoreAnalytics(interview_manager.db, interview_manager.storage)
 
 # Routes
 @asynccontextmanager
@@ -23,17 +42,101 @@ async def lifespan(app: FastAPI):
     """
     Context manager for managing the application's lifecycle.
     This function is called when the application starts and stops.
-    It initializes the database connection on startup and handles any cleanup on shutdown.
+    It opens the shared database connection and the session store and warms
+    up the LLM models on startup, and on shutdown flushes pending session
+    logs and closes every connection.
     """
     await interview_manager.db.init_db()
+    await interview_manager.storage.connect()
+    await interview_manager.sessions.connect()
+    await interview_manager.question_cache.connect()
+    backends.start()
+    queue_metrics = None
+    if interview_manager.work_queue is not None:
+        await interview_manager.work_queue.connect()
+        queue_metrics = asyncio.create_task(
+            interview_manager.work_queue.report_metrics(config.AGENT_QUEUE_METRICS_INTERVAL)
+            )
+    elif config.LLM_WARMUP:
+        try:
+            await asyncio.wait_for(
+                warm_up(interview_manager.models()), config.LLM_WARMUP_TIMEOUT
+                )
+        except Exception as e:
+            logger.warning("LLM warm-up failed, first requests will load the model: %r", e)
+    if config.QUESTION_POOL:
+        interview_manager.question_pool.start()
     yield
-    print("Application shutdown")
+    await interview_manager.shutdown()
+    if queue_metrics is not None:
+        queue_metrics.cancel()
+        await interview_manager.work_queue.close()
+    await interview_manager.question_cache.close()
+    await interview_manager.sessions.close()
+    await interview_manager.db.close()
+    await interview_manager.storage.close()
+    await backends.stop()
+    await close_clients()
+    logger.info("Application shutdown")
 
 app = FastAPI(lifespan=lifespan)
 
 def raise_bad_request(message):
     raise HTTPException(status_code=400, detail=message)
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """
+    Record latency per route template (not per raw path, to bound cardinality)
+    and trace the request, sending its stage timings in a Server-Timing header.
+    """
+    start = time.monotonic()
+    status_code = 500
+    metrics.http_requests_in_progress.inc()
+    path = request.url.path
+    trace = tracer.begin(
+        f"{request.method} {path}",
+        # Never spend an armed profiler run on the debug endpoints themselves.
+        profile=not path.startswith(("/debug/", "/metrics"))
+        )
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        tracer.finish(trace, status_code)
+        metrics.http_requests_in_progress.dec()
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        metrics.http_request_seconds.labels(
+            request.method, path, str(status_code)
+            ).observe(time.monotonic() - start)
+    if trace is not None:
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Expose metrics in the Prometheus text format."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.exception_handler(LLMOverloadedError)
+async def llm_overloaded(request: Request, exc: LLMOverloadedError):
+    """Shed load when the LLM queue is full instead of queueing unboundedly."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+        )
+
+@app.exception_handler(SessionLimitError)
+async def session_limit(request: Request, exc: SessionLimitError):
+    """Refuse new interviews while the in-process session store is full."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+        )
+
 @app.post("/interviews/start")
 async def start_interview(request: InterviewRequest):
     """
@@ -46,22 +149,284 @@ async def start_interview(request: InterviewRequest):
     Returns:
         dict: The initial set of interview questions and session details.
     """
-    print(request)
+    log_payload(logger, "payload.request", "Interview requested", request.model_dump())
     return await interview_manager.start_interview(request)
 
+@app.websocket("/interviews/ws")
+async def interview_websocket(websocket: WebSocket):
+    """
+    Run a whole interview over one WebSocket connection: questions are
+    pushed on ``start``, answers are sent as messages and their evaluations
+    and the report are pushed as soon as they are ready. An interrupted
+    interview continues with ``resume``. See interview_ws.py for the protocol.
+    """
+    await InterviewChannel(
+        websocket, interview_manager, heartbeat=config.WS_HEARTBEAT_INTERVAL
+        ).run()
+
+def format_sse(events):
+    """Render ``(event, data)`` pairs as server-sent events."""
+    async def stream():
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
 @app.post("/interviews/{session_id}/respond")
-async def submit_response(session_id: str, response: CandidateResponse):
+async def submit_response(
+    session_id: str, response: CandidateResponse, http_response: Response,
+    finalize: bool = True
+    ):
     """
     Submit a response to an ongoing interview session.
 
+    With ASYNC_EVALUATION enabled the answer is recorded and the request
+    returns 202 Accepted immediately; poll the status endpoint for the
+    evaluation and fetch the report once the session is completed.
+
     Args:
         session_id (str): The unique identifier for the interview session.
         response (CandidateResponse): The candidate's response to a question.
+        finalize (bool): Complete the interview after the last answer; pass
+            false to stream the final feedback from /feedback/stream instead.
 
     Returns:
         dict: The updated session data, including evaluated responses and scores.
     """
-    return await interview_manager.candidate_answer(session_id, response)
+    result = await interview_manager.candidate_answer(session_id, response, finalize)
+    if result.get("status") == "evaluation_pending":
+        http_response.status_code = status.HTTP_202_ACCEPTED
+    return result
+
+@app.post("/interviews/{session_id}/respond/stream")
+async def stream_response(
+    session_id: str, response: CandidateResponse, finalize: bool = True
+    ):
+    """
+    Submit a response and stream its evaluation as server-sent events.
+
+    Emits ``token`` events while the evaluation is generated, then an
+    ``evaluation`` event with the stored score and comment. After the last
+    answer (unless ``finalize`` is false) the final feedback follows as
+    ``token`` events and a ``report`` event. Failures end the stream with
+    an ``error`` event.
+
+    Args:
+        session_id (str): The unique identifier for the interview session.
+        response (CandidateResponse): The candidate's response to a question.
+        finalize (bool): Complete the interview after the last answer.
+    """
+    return format_sse(
+        await interview_manager.stream_candidate_answer(session_id, response, finalize)
+        )
+
+@app.get("/interviews/{session_id}/feedback/stream")
+async def stream_feedback(session_id: str):
+    """
+    Finalize a fully evaluated interview, streaming the validation feedback
+    as ``token`` events followed by a ``report`` event with the stored final
+    report (or an ``error`` event).
+
+    Args:
+        session_id (str): The unique identifier for the interview session.
+    """
+    return format_sse(await interview_manager.stream_feedback(session_id))
+
+@app.post("/interviews/{session_id}/responses")
+async def submit_responses(
+    session_id: str, responses: list[CandidateResponse], finalize: bool = True
+    ):
+    """
+    Submit several responses of an interview session in one request.
+
+    The answers are evaluated concurrently (bounded by EVALUATION_CONCURRENCY)
+    and, once every question is answered, the interview is completed.
+
+    Args:
+        session_id (str): The unique identifier for the interview session.
+        responses (list[CandidateResponse]): The candidate's responses.
+        finalize (bool): Complete the interview once every question is answered.
+
+    Returns:
+        dict: The final report, or the evaluations recorded so far.
+    """
+    return await interview_manager.candidate_answers(session_id, responses, finalize)
+
+@app.get("/interviews/{session_id}/status")
+async def interview_status(session_id: str):
+    """
+    Report the evaluation state of each question of an interview session.
+
+    Args:
+        session_id (str): The unique identifier for the interview session.
+
+    Returns:
+        dict: The session state ("in_progress", "completing", "failed" or
+              "completed") and the per-question evaluation state.
+    """
+    return await interview_manager.interview_status(session_id)
+
+@app.get("/llm/scheduler")
+async def llm_scheduler_stats():
+    """
+    LLM scheduler state.
+
+    Returns:
+        dict: In-flight calls, queue depth and per-class queue-wait metrics.
+    """
+    return scheduler.stats()
+
+@app.get("/queue/agents")
+async def agent_queue_stats():
+    """
+    Agent work queue state, when AGENT_QUEUE is enabled.
+
+    Returns:
+        dict: Per job stream the jobs waiting for a worker (``lag``), the
+              jobs being run and the age of the oldest job, plus the number
+              of dead-lettered jobs.
+    """
+    if interview_manager.work_queue is None:
+        raise HTTPException(status_code=404, detail="Agent queue is disabled")
+    return await interview_manager.work_queue.update_metrics()
+
+@app.get("/debug/traces")
+async def debug_traces(
+    limit: int = Query(50, ge=1, le=1000), min_duration: float = Query(0.0, ge=0)
+    ):
+    """
+    Recent slow (at least TRACE_SLOW_SECONDS) and profiled requests.
+
+    Args:
+        limit (int): Maximum traces returned, newest first.
+        min_duration (float): Only traces at least this many seconds long.
+
+    Returns:
+        dict: Tracer settings and the traces with their per-stage timings.
+    """
+    return {**tracer.stats(), "traces": tracer.recent(limit, min_duration)}
+
+@app.get("/debug/traces/{trace_id}")
+async def debug_trace(trace_id: str, format: str = Query("json", pattern="^(json|folded)$")):
+    """
+    One kept trace; ``format=folded`` returns its profile as folded stacks
+    (one ``frame;frame;frame count`` line per stack) for flamegraph tools.
+    """
+    trace = tracer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    if format == "folded":
+        if trace.profile is None:
+            raise HTTPException(status_code=404, detail="Trace was not profiled")
+        return Response(
+            "".join(f"{stack} {count}\n" for stack, count in trace.profile.most_common()),
+            media_type="text/plain"
+            )
+    return trace.to_dict(top_stacks=50)
+
+@app.post("/debug/profile")
+async def debug_profile(
+    requests: int = Query(1, ge=0, le=1000), interval: float = Query(0.005, gt=0, le=1)
+    ):
+    """
+    Arm the sampling profiler for the next ``requests`` requests (0 disarms).
+    Profiled requests are kept at /debug/traces whatever their duration.
+
+    Args:
+        requests (int): Requests to profile.
+        interval (float): Seconds between stack samples.
+    """
+    tracer.arm_profiler(requests, interval)
+    return tracer.stats()
+
+@app.get("/llm/backends")
+async def llm_backend_stats():
+    """
+    Ollama backends the LLM calls are routed across.
+
+    Returns:
+        dict: Retry and hedging settings, and per host its health,
+              outstanding calls, observed latency and consecutive failures.
+    """
+    return backends.stats()
+
+@app.get("/cache/questions")
+async def question_cache_stats():
+    """
+    Question generation cache statistics.
+
+    Returns:
+        dict: Entry count, hit/miss counters and hit rate.
+    """
+    return interview_manager.question_cache.stats()
+
+@app.post("/cache/questions/invalidate")
+async def invalidate_question_cache(job: Job | None = None):
+    """
+    Invalidate cached questions for one job posting, or all of them when
+    no job is given.
+
+    Args:
+        job (Job): The job title and description whose questions to drop.
+
+    Returns:
+        dict: Number of in-process entries removed.
+    """
+    key = None
+    if job is not None:
+        key = interview_manager.question_agent.cache_key(
+            f"{job.job_title}\n{job.job_description}"
+            )
+    return {"invalidated": await interview_manager.question_cache.invalidate(key)}
+
+@app.post("/admin/postings", status_code=status.HTTP_201_CREATED)
+async def register_posting(job: Job):
+    """
+    Register an open job posting so its questions are pre-generated.
+
+    Args:
+        job (Job): The job title and description candidates will apply with.
+
+    Returns:
+        dict: The registered posting.
+    """
+    posting = {
+        "posting_id": str(uuid.uuid4()),
+        "job_title": job.job_title,
+        "job_description": job.job_description,
+        "created_at": datetime.now().isoformat()
+        }
+    await interview_manager.question_pool.register(**posting)
+    return posting
+
+@app.get("/admin/postings")
+async def list_postings():
+    """
+    Registered job postings.
+
+    Returns:
+        list: The postings and how many question sets each has ready.
+    """
+    return await interview_manager.question_pool.postings()
+
+@app.delete("/admin/postings/{posting_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def unregister_posting(posting_id: str):
+    """Stop pre-generating questions for a job posting."""
+    if not await interview_manager.question_pool.unregister(posting_id):
+        raise HTTPException(status_code=404, detail="Posting not found")
+
+@app.get("/admin/question-pool")
+async def question_pool_stats():
+    """
+    Question pool statistics.
+
+    Returns:
+        dict: Pooled sets, generation counters and the pool hit rate.
+    """
+    return interview_manager.question_pool.stats()
 
 @app.post("/reports")
 async def summary_report(request: InterviewReportRequest):
@@ -75,7 +440,137 @@ async def summary_report(request: InterviewReportRequest):
     Returns:
         dict: The summary report containing questions, responses, scores, and feedback.
     """
-    return await report_manager.get_summary_report(request)
+    body, etag, _ = await report_manager.get_report(request.session_id)
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in tags
+
+@app.get("/reports/{session_id}")
+async def get_report(session_id: str, request: Request):
+    """
+    Fetch the final report of an interview session.
+
+    Final reports are immutable; clients that send the ``ETag`` of a
+    previous response in ``If-None-Match`` get ``304 Not Modified``.
+    Provisional reports must be revalidated until they are upgraded.
+
+    Args:
+        session_id (str): The unique identifier of the interview session.
+
+    Returns:
+        Response: The report, or an empty 304 response.
+    """
+    body, etag, final = await report_manager.get_report(session_id)
+    headers = {
+        "ETag": etag,
+        # A provisional report is replaced once validation completes.
+        "Cache-Control": "private, max-age=86400, immutable" if final else "no-cache"
+        }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        metrics.report_not_modified_total.inc()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+@app.get("/cache/reports")
+async def report_cache_stats():
+    """
+    Final report cache statistics.
+
+    Returns:
+        dict: Entry count, cached bytes, hit/miss counters and hit rate.
+    """
+    return report_manager.cache_stats()
+
+@app.get("/storage/reports")
+async def report_storage_stats():
+    """
+    Report storage statistics.
+
+    Returns:
+        dict: The storage backend and its location, and for segmented
+            storage the report and segment counts.
+    """
+    return interview_manager.storage.stats()
+
+@app.get("/analytics/scores")
+async def score_aggregates(
+    group_by: str | None = Query(None, pattern="^(job_title|candidate_id|day|month)$"),
+    job_title: str | None = None,
+    candidate_id: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    status: str | None = "final",
+    percentiles: str = "50,90"
+    ):
+    """
+    Final score statistics, optionally per job title, candidate, day or month.
+
+    Args:
+        group_by (str): Aggregation key; all matching interviews when omitted.
+        job_title (str): Only interviews for this job title.
+        candidate_id (str): Only interviews of this candidate.
+        since (str): Inclusive ISO lower bound on the interview time.
+        until (str): Exclusive ISO upper bound on the interview time.
+        status (str): ``final`` (default) or ``provisional`` reports.
+        percentiles (str): Comma-separated percentiles of the final score.
+
+    Returns:
+        dict: ``{"groups": [...]}`` with count, mean, min, max, mean
+              question score and the requested percentiles per group.
+    """
+    try:
+        pcts = tuple(float(p) for p in percentiles.split(",") if p.strip())
+    except ValueError:
+        raise_bad_request("percentiles must be comma-separated numbers")
+    return {"groups": await score_analytics.aggregate(
+        group_by, pcts, job_title=job_title, candidate_id=candidate_id,
+        since=since, until=until, status=status
+        )}
+
+@app.get("/analytics/export")
+async def score_export(
+    table: str = Query("interview_scores", pattern="^(interview_scores|question_scores)$"),
+    format: str = Query("json", pattern="^(json|npz)$"),
+    job_title: str | None = None,
+    candidate_id: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    status: str | None = None
+    ):
+    """
+    Bulk export of the score tables in columnar form.
+
+    ``json`` returns one array per column; ``npz`` a compressed NumPy
+    archive of typed column arrays.
+    """
+    filters = dict(
+        job_title=job_title, candidate_id=candidate_id, since=since, until=until, status=status
+        )
+    if format == "npz":
+        return Response(
+            await score_analytics.export_npz(table, **filters),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{table}.npz"'}
+            )
+    return {"table": table, "fields": EXPORT_TABLES[table],
+            "columns": await score_analytics.columns(table, **filters)}
+
+@app.post("/analytics/backfill")
+async def score_backfill():
+    """
+    Load the scores of reports stored before score analytics existed.
+
+    Returns:
+        dict: Number of reports backfilled.
+    """
+    return {"backfilled": await score_analytics.backfill()}
 
 @app.post("/log")
 async def session_log():
@@ -88,9 +583,61 @@ async def session_log():
     """
     return await report_manager.get_session_log()
 
+@app.get("/logs")
+async def session_log_page(
+    candidate_id: str | None = None,
+    job_title: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    ):
+    """
+    Retrieve one page of session logs using keyset pagination.
+
+    Args:
+        candidate_id (str): Filter by candidate.
+        job_title (str): Filter by job title.
+        since (str): Inclusive lower bound on the session ISO timestamp.
+        until (str): Exclusive upper bound on the session ISO timestamp.
+        cursor (str): ``next_cursor`` returned by the previous page.
+        limit (int): Page size.
+
+    Returns:
+        dict: The page ``items`` and the ``next_cursor`` (``None`` on the last page).
+    """
+    return await report_manager.get_session_log_page(
+        limit, cursor=cursor, candidate_id=candidate_id,
+        job_title=job_title, since=since, until=until
+        )
+
+@app.get("/logs/stream")
+async def session_log_stream(
+    candidate_id: str | None = None,
+    job_title: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    cursor: str | None = None,
+    ):
+    """
+    Stream all matching session logs as NDJSON, one session per line,
+    reading rows from the database cursor as the client consumes them.
+    """
+    if cursor:
+        # Reject a malformed cursor before the streaming response starts.
+        report_manager.decode_cursor(cursor)
+    return StreamingResponse(
+        report_manager.stream_session_log(
+            candidate_id=candidate_id, job_title=job_title,
+            since=since, until=until, cursor=cursor
+            ),
+        media_type="application/x-ndjson"
+        )
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8765)
+    # log_config=None: uvicorn's loggers go through the queued root handler.
+    uvicorn.run(app, host="0.0.0.0", port=8765, log_config=None)
     
     
 
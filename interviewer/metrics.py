@@ -0,0 +1,147 @@
+"""
+Prometheus metrics for the interviewer service.
+
+LLM metrics are labelled by ``agent`` (the scheduling class of the calling
+agent: questions, evaluation or validation) and ``model``; they are derived
+from the timing and token counters Ollama returns with every chat response.
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+# Ollama reports a small load_duration even when the model is resident;
+# only loads above this many seconds count as model (re)loads.
+MODEL_LOAD_THRESHOLD = 0.5
+
+LLM_LATENCY_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+llm_request_seconds = Histogram(
+    "llm_request_seconds", "Wall-clock duration of LLM calls, queueing excluded.",
+    ["agent", "model"], buckets=LLM_LATENCY_BUCKETS
+    )
+llm_requests_total = Counter(
+    "llm_requests_total", "LLM calls by outcome.", ["agent", "model", "outcome"]
+    )
+llm_tokens_per_second = Histogram(
+    "llm_tokens_per_second", "Generation speed reported by Ollama (eval_count / eval_duration).",
+    ["agent", "model"], buckets=(1, 2, 5, 10, 15, 20, 30, 50, 75, 100, 200)
+    )
+llm_prompt_tokens = Histogram(
+    "llm_prompt_tokens", "Prompt tokens evaluated per call (prompt_eval_count).",
+    ["agent", "model"], buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192)
+    )
+llm_prompt_tokens_cached_estimate_total = Counter(
+    "llm_prompt_tokens_cached_estimate_total",
+    "Estimated prompt tokens served from Ollama's KV cache: the prompt size"
+    " estimated at 4 characters per token minus prompt_eval_count. A heuristic.",
+    ["agent", "model"]
+    )
+llm_completion_tokens_total = Counter(
+    "llm_completion_tokens_total", "Generated tokens (eval_count).", ["agent", "model"]
+    )
+llm_model_loads_total = Counter(
+    "llm_model_loads_total", "Calls during which Ollama had to load the model.", ["model"]
+    )
+llm_model_load_seconds = Histogram(
+    "llm_model_load_seconds", "Model load time reported by Ollama (load_duration).",
+    ["model"], buckets=(0.5, 1, 2, 5, 10, 20, 30, 60)
+    )
+llm_validation_failures_total = Counter(
+    "llm_validation_failures_total",
+    "LLM responses that did not validate against the expected JSON schema.",
+    ["agent", "model"]
+    )
+llm_in_flight = Gauge("llm_in_flight", "LLM calls currently running.")
+llm_queue_depth = Gauge("llm_queue_depth", "LLM calls waiting for a scheduler slot.")
+llm_backend_in_flight = Gauge(
+    "llm_backend_in_flight", "LLM calls currently sent to an Ollama backend.", ["host"]
+    )
+llm_backend_healthy = Gauge(
+    "llm_backend_healthy", "1 while an Ollama backend receives calls, 0 once ejected.", ["host"]
+    )
+llm_backend_requests_total = Counter(
+    "llm_backend_requests_total", "LLM calls per Ollama backend by outcome.", ["host", "outcome"]
+    )
+llm_retries_total = Counter(
+    "llm_retries_total", "Failed LLM calls retried on another backend."
+    )
+llm_hedged_requests_total = Counter(
+    "llm_hedged_requests_total", "Hedged LLM calls by the copy that answered first.", ["winner"]
+    )
+agent_jobs_total = Counter(
+    "agent_jobs_total", "Queued agent jobs by outcome.", ["kind", "outcome"]
+    )
+agent_job_seconds = Histogram(
+    "agent_job_seconds", "Time from queueing an agent job to its answer.", ["kind"],
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+    )
+agent_queue_lag = Gauge(
+    "agent_queue_lag", "Agent jobs waiting for a worker, per job stream.", ["stream"]
+    )
+agent_queue_pending = Gauge(
+    "agent_queue_pending", "Agent jobs being run by workers, per job stream.", ["stream"]
+    )
+agent_queue_oldest_seconds = Gauge(
+    "agent_queue_oldest_seconds", "Age of the oldest queued agent job, per job stream.", ["stream"]
+    )
+agent_queue_dead_letters = Gauge(
+    "agent_queue_dead_letters", "Agent jobs in the dead-letter stream."
+    )
+
+ws_connections = Gauge("ws_connections", "Open interview WebSocket connections.")
+ws_messages_total = Counter(
+    "ws_messages_total", "Interview WebSocket messages by direction and type.", ["direction", "type"]
+    )
+
+sessions_live = Gauge("sessions_live", "Interview sessions held in process memory.")
+sessions_memory_bytes = Gauge(
+    "sessions_memory_bytes", "Approximate memory used by in-process sessions, updated per sweep."
+    )
+sessions_evicted_total = Counter(
+    "sessions_evicted_total", "Sessions removed after SESSION_TTL seconds without activity."
+    )
+sessions_rejected_total = Counter(
+    "sessions_rejected_total", "Interviews refused because SESSION_MAX sessions were live."
+    )
+
+http_request_seconds = Histogram(
+    "http_request_seconds", "Duration of HTTP requests.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+    )
+http_requests_in_progress = Gauge(
+    "http_requests_in_progress", "HTTP requests being served."
+    )
+
+
+def observe_llm_response(agent: str, model: str, response, elapsed: float):
+    """Record the timings and token counts of a completed Ollama chat response."""
+    llm_request_seconds.labels(agent, model).observe(elapsed)
+    llm_requests_total.labels(agent, model, "ok").inc()
+
+    prompt_tokens = getattr(response, "prompt_eval_count", None)
+    if prompt_tokens:
+        llm_prompt_tokens.labels(agent, model).observe(prompt_tokens)
+    eval_count = getattr(response, "eval_count", None)
+    eval_duration = getattr(response, "eval_duration", None)
+    if eval_count:
+        llm_completion_tokens_total.labels(agent, model).inc(eval_count)
+        if eval_duration:
+            llm_tokens_per_second.labels(agent, model).observe(
+                eval_count / (eval_duration / 1e9)
+                )
+    load_duration = getattr(response, "load_duration", None)
+    if load_duration and load_duration / 1e9 >= MODEL_LOAD_THRESHOLD:
+        llm_model_loads_total.labels(model).inc()
+        llm_model_load_seconds.labels(model).observe(load_duration / 1e9)
+
+report_cache_requests_total = Counter(
+    "report_cache_requests_total", "Final report lookups by cache result.", ["result"]
+    )
+report_cache_bytes = Gauge("report_cache_bytes", "Bytes of serialized reports in the cache.")
+report_cache_entries = Gauge("report_cache_entries", "Reports held in the cache.")
+report_not_modified_total = Counter(
+    "report_not_modified_total", "Report requests answered 304 Not Modified."
+    )
+
+log_records_dropped_total = Counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full."
+    )
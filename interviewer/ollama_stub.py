@@ -0,0 +1,124 @@
+"""
+A tiny Ollama stand-in speaking the ``/api/chat`` protocol.
+
+Requests are answered from a cassette recorded with LLM_CASSETTE_MODE=record
+(see cassette.py). With ``--synthesize``, requests missing from the cassette
+get a response generated from their JSON schema ``format`` instead, so the
+interviewer can run end to end without any recording.
+
+Latency is synthetic: ``--latency`` seconds per call plus
+``eval_count / --tokens-per-second``, and at most ``--parallel`` requests
+are "generated" at once, like OLLAMA_NUM_PARALLEL on a CPU-bound box.
+
+Usage:
+    python ollama_stub.py --cassette cassettes/interviewer.jsonl.gz \\
+        --latency 0.2 --tokens-per-second 20 --parallel 1 --port 11434
+    OLLAMA_HOST=http://localhost:11434 python main.py
+"""
+import argparse
+import asyncio
+import json
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from cassette import Cassette, CassetteClient, CassetteMissError, request_key
+
+
+def synthesize(schema: dict, defs: dict = None):
+    """Build a minimal value that validates against a JSON schema."""
+    defs = defs if defs is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return synthesize(defs[schema["$ref"].split("/")[-1]], defs)
+    kind = schema.get("type")
+    if kind == "object" or "properties" in schema:
+        return {
+            name: synthesize(prop, defs)
+            for name, prop in schema.get("properties", {}).items()
+            }
+    if kind == "array":
+        return [synthesize(schema.get("items", {}), defs) for _ in range(3)]
+    if kind == "integer":
+        return 7
+    if kind == "number":
+        return 0.7
+    if kind == "boolean":
+        return True
+    return "This is a synthetic response from the Ollama stand-in."
+
+
+def create_app(cassette: Cassette, latency: float, tokens_per_second: float,
+               parallel: int, synthesize_misses: bool) -> FastAPI:
+    app = FastAPI(title="Ollama stand-in")
+    replay = CassetteClient(
+        cassette, mode="replay", latency=latency, tokens_per_second=tokens_per_second
+        )
+    slots = asyncio.Semaphore(parallel)
+
+    @app.get("/")
+    async def root():
+        return PlainTextResponse("Ollama is running")
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        model = body.get("model", "")
+        messages = body.get("messages") or []
+        kwargs = {"format": body.get("format") or None, "options": body.get("options")}
+        if synthesize_misses and messages:
+            record = cassette.get(_key(model, messages, kwargs))
+            if record is None:
+                content = json.dumps(synthesize(kwargs["format"] or {"type": "string"}))
+                cassette.entries[_key(model, messages, kwargs)] = {
+                    "content": content, "eval_count": max(1, len(content) // 4),
+                    "prompt_eval_count": sum(len(m.get("content", "")) for m in messages) // 4
+                    }
+        try:
+            if body.get("stream", True):
+                stream = await replay.chat(model, messages, stream=True, **kwargs)
+                return StreamingResponse(
+                    _ndjson(stream, slots), media_type="application/x-ndjson"
+                    )
+            async with slots:
+                response = await replay.chat(model, messages, **kwargs)
+            return JSONResponse(response.model_dump(exclude_none=True))
+        except CassetteMissError as e:
+            return JSONResponse({"error": str(e)}, status_code=404)
+
+    return app
+
+
+def _key(model, messages, kwargs):
+    return request_key(model, messages, kwargs["format"], kwargs["options"])
+
+
+async def _ndjson(stream, slots):
+    async with slots:
+        async for chunk in stream:
+            yield json.dumps(chunk.model_dump(exclude_none=True)) + "\n"
+
+
+def main():
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Ollama /api/chat stand-in")
+    parser.add_argument("--cassette", default="cassettes/interviewer.jsonl.gz")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="fixed delay per call in seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="synthetic generation speed; 0 disables the per-token delay")
+    parser.add_argument("--parallel", type=int, default=1,
+                        help="requests generated concurrently")
+    parser.add_argument("--synthesize", action="store_true",
+                        help="answer unrecorded requests from their JSON schema")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=11434)
+    args = parser.parse_args()
+    app = create_app(
+        Cassette(args.cassette), args.latency, args.tokens_per_second,
+        args.parallel, args.synthesize
+        )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
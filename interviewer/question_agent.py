@@ -3,20 +3,17 @@ This module defines the QuestionAgent class for generating interview
 questions using a local Language Learning Model (LLM).
 """
 import logging
-from models import QuestionList
+from models import Question, QuestionList
 
-from llm_client import LLMClient
+from conversation import build_context
+from llm_client import LLMClient, Priority
+from question_cache import QuestionCache, cache_key
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-AGENT_TEMPLATE_SYSTEM = """
-You are an expert interviewer with deep knowledge of various roles.
-"""
-
 AGENT_TEMPLATE_TASK = """
 Generate three interview questions
-for a candidate based on the following job title and job description.
+for a candidate based on the job title and job description above.
 Return a list of questions in JSON format.
 """
 
@@ -28,25 +25,82 @@ class QuestionAgent:
     Attributes:
         agent_client (LLMClient): The client for communicating with the LLM.
         agent_response_format (dict): The schema for validating the generated response.
+        cache (QuestionCache): Optional cache of generated questions per role.
     """
-    def __init__(self):
+    def __init__(self, cache: QuestionCache = None, priority: Priority = Priority.QUESTIONS):
         self.agent_client = LLMClient(
             model='llama3.2', #'granite3.1-moe'
-            options={'temperature': 0.0}
+            options={'temperature': 0.0},
+            priority=priority
             )
         self.agent_response_format = QuestionList.model_json_schema()
+        self.cache = cache
+
+    def cache_key(self, role_description: str) -> str:
+        """Cache key of a role for this agent's model and options."""
+        return cache_key(
+            role_description, self.agent_client.model, self.agent_client.options
+            )
+
+
+    @staticmethod
+    def conversation_turns(questions) -> list:
+        """
+        The question-generation exchange as chat messages, to extend the
+        session context with. The assistant turn is rebuilt from the
+        questions so sessions for the same role share an identical prefix.
+        """
+        return [
+            {'role': 'user', 'content': AGENT_TEMPLATE_TASK},
+            {'role': 'assistant', 'content': QuestionList(questions=questions).model_dump_json()}
+            ]
+
+    async def async_generate_questions(
+        self, role_description: str, context=None, usage: dict = None
+        ):
+        """
+        Generate (or fetch from the cache) the questions for a role.
 
+        Args:
+            role_description (str): The job title and job description.
+            context (list): Session messages; defaults to a fresh context
+                for the role.
+            usage (dict): Filled with the prompt token usage of the LLM
+                call, if one is made.
+        """
+        context = context or build_context(role_description)
+        if self.cache is None:
+            return await self._generate_questions(context, usage)
 
-    async def async_generate_questions(self, role_description: str):
+        async def generate():
+            questions = await self._generate_questions(context, usage)
+            return [q.question for q in questions]
+
+        questions = await self.cache.get_or_generate(
+            self.cache_key(role_description), generate
+            )
+        return [Question(question=q) for q in questions]
+
+    async def async_generate_question_set(self, role_description: str, options: dict):
+        """
+        Generate a fresh question set with the given generation options,
+        bypassing the cache; used to fill question pools with distinct sets.
+        """
+        return await self._generate_questions(
+            build_context(role_description), options=options
+            )
+
+    async def _generate_questions(self, context: list, usage: dict = None, options: dict = None):
         response = await self.agent_client.generate_response(
-            prompt=str(
-                f"{AGENT_TEMPLATE_SYSTEM}\n\n"
-                f"{AGENT_TEMPLATE_TASK}\n\n"
-                f"{role_description}"
-                ),
+            prompt=AGENT_TEMPLATE_TASK,
             # Use Pydantic to generate the schema
-            response_format=self.agent_response_format
+            response_format=self.agent_response_format,
+            context=context,
+            usage=usage,
+            options=options
             )
         # Use Pydantic to validate the response
-        questions_response = QuestionList.model_validate_json(response.message.content)
+        questions_response = self.agent_client.validate_response(
+            QuestionList, response.message.content
+            )
         return questions_response.questions
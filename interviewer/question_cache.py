@@ -0,0 +1,169 @@
+"""
+Two-tier cache for generated interview questions.
+
+Question generation runs at temperature 0.0, so the same role text with the
+same model and options yields the same questions. ``QuestionCache`` keeps
+recent question sets in a process-local LRU and, optionally, in Redis so all
+workers share them. Concurrent misses for the same key share a single LLM
+call, run in its own task so that a cancelled caller does not cancel it for
+the others.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from redis_client import AsyncRedisLocalCacheClient
+
+logger = logging.getLogger(__name__)
+
+REDIS_PREFIX = "questions:"
+
+
+def normalize_role(role: str) -> str:
+    """Case-fold and collapse whitespace so trivially different postings match."""
+    return " ".join(role.split()).casefold()
+
+
+def cache_key(role: str, model: str, options: dict) -> str:
+    """Hash of the normalized role text and the model name/options."""
+    payload = json.dumps(
+        {"role": normalize_role(role), "model": model, "options": options},
+        sort_keys=True
+        )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class QuestionCache:
+    """
+    LRU of question lists with TTL eviction and an optional Redis tier.
+
+    Attributes:
+        maxsize (int): Maximum number of entries kept in process.
+        ttl (int): Seconds an entry stays valid in either tier.
+        redis (AsyncRedisLocalCacheClient): Shared tier, or ``None``.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: int = 3600, redis_url: str = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.redis = AsyncRedisLocalCacheClient(redis_url) if redis_url else None
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    async def connect(self):
+        if self.redis:
+            await self.redis.connect()
+
+    async def close(self):
+        if self.redis:
+            await self.redis.close()
+
+    def _get_local(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, questions = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return questions
+
+    def _set_local(self, key: str, questions: list):
+        self._entries[key] = (time.monotonic() + self.ttl, questions)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_generate(self, key: str, generate):
+        """
+        Return the cached question list for ``key`` or build it with
+        ``generate()`` (an async callable returning a list of strings).
+        """
+        questions = self._get_local(key)
+        if questions is not None:
+            self.hits += 1
+            return questions
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+        else:
+            inflight = asyncio.create_task(self._fill(key, generate))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(self._filled)
+        # Shielded: the fill outlives any one caller giving up.
+        return await asyncio.shield(inflight)
+
+    async def _fill(self, key: str, generate) -> list:
+        try:
+            questions = await self._get_redis(key)
+            if questions is not None:
+                self.redis_hits += 1
+            else:
+                self.misses += 1
+                questions = await generate()
+                await self._set_redis(key, questions)
+            self._set_local(key, questions)
+            return questions
+        finally:
+            del self._inflight[key]
+
+    @staticmethod
+    def _filled(task: asyncio.Task):
+        # Every caller may have been cancelled; mark the outcome retrieved.
+        if not task.cancelled():
+            task.exception()
+
+    async def _get_redis(self, key: str):
+        if not self.redis:
+            return None
+        try:
+            cached = await self.redis.get(REDIS_PREFIX + key)
+        except Exception as e:
+            logger.warning("Question cache Redis read failed: %s", e)
+            return None
+        return json.loads(cached) if cached else None
+
+    async def _set_redis(self, key: str, questions: list):
+        if not self.redis:
+            return
+        try:
+            await self.redis.set(REDIS_PREFIX + key, json.dumps(questions), ex=self.ttl)
+        except Exception as e:
+            logger.warning("Question cache Redis write failed: %s", e)
+
+    async def invalidate(self, key: str = None) -> int:
+        """
+        Drop one entry, or every entry when ``key`` is ``None``, from both tiers.
+
+        Returns:
+            int: Number of in-process entries removed.
+        """
+        if key is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            if self.redis:
+                await self.redis.delete_prefix(REDIS_PREFIX)
+            return removed
+        removed = 1 if self._entries.pop(key, None) is not None else 0
+        if self.redis:
+            await self.redis.delete(REDIS_PREFIX + key)
+        return removed
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.redis_hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,203 @@
+"""
+Pre-generated question sets for registered job postings.
+
+Job postings known to be open are registered through the admin API and kept
+in the database. A background worker fills a pool of ``size`` distinct
+question sets per posting, one LLM call at a time and only while the LLM
+scheduler has idle capacity (with AGENT_QUEUE, while no job waits in the
+work queue), so pre-generation never delays live interviews. ``start_interview`` takes a set from the pool and falls back to
+live generation on a miss; every take wakes the worker to refill the pool.
+Sets older than ``max_age`` seconds are discarded and regenerated. The
+worker keeps the postings in memory, updated by the admin API and reloaded
+every ``refresh_interval`` seconds to pick up other processes' changes.
+
+Pools live in the process: each worker keeps its own.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict, deque
+
+from database import Database
+from llm_client import Priority, scheduler
+from question_agent import QuestionAgent
+from question_cache import normalize_role
+from work_queue import WorkQueue
+
+logger = logging.getLogger(__name__)
+
+
+def posting_role(job_title: str, job_description: str) -> str:
+    """Role text of a posting, as built by InterviewManager.generate_questions."""
+    return f"{job_title}\n{job_description}"
+
+
+class QuestionPool:
+    """
+    Pools of question sets per registered job posting.
+
+    Attributes:
+        db (Database): Where job postings are registered.
+        size (int): Question sets kept ready per posting.
+        max_age (float): Seconds after which a set is regenerated.
+        poll_interval (float): Seconds the worker sleeps when it has nothing
+            to do or the LLM is busy.
+        temperature (float): Generation temperature, so sets differ.
+        agent (QuestionAgent): Generates the sets; defaults to a local agent
+            at background priority.
+        work_queue (WorkQueue): The queue ``agent`` submits to, if any; its
+            depth rather than the local scheduler tells whether the LLM is idle.
+        refresh_interval (float): Seconds between reloads of the postings.
+    """
+    def __init__(
+        self, db: Database, size: int = 3, max_age: float = 3600,
+        poll_interval: float = 5.0, temperature: float = 0.7, agent: QuestionAgent = None,
+        work_queue: WorkQueue = None, refresh_interval: float = 60.0
+        ):
+        self.db = db
+        self.size = size
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        self.temperature = temperature
+        self.agent = agent or QuestionAgent(priority=Priority.BACKGROUND)
+        self.work_queue = work_queue
+        self.refresh_interval = refresh_interval
+        self._pools = defaultdict(deque)
+        self._postings = {}
+        self._postings_loaded_at = None
+        self._wakeup = asyncio.Event()
+        self._worker = None
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.failures = 0
+
+    async def register(self, posting_id: str, job_title: str, job_description: str, created_at: str):
+        await self.db.save_job_posting(posting_id, job_title, job_description, created_at)
+        self._postings[posting_id] = {
+            "posting_id": posting_id, "job_title": job_title,
+            "job_description": job_description, "created_at": created_at
+            }
+        self._wakeup.set()
+
+    async def unregister(self, posting_id: str) -> bool:
+        removed = await self.db.delete_job_posting(posting_id)
+        posting = self._postings.pop(posting_id, None)
+        if posting is not None:
+            self._pools.pop(self._key(posting), None)
+        return removed
+
+    async def postings(self) -> list:
+        """Registered postings with the number of question sets ready."""
+        postings = await self.db.get_job_postings()
+        for posting in postings:
+            posting["pooled_sets"] = len(self._pools.get(self._key(posting), ()))
+        return postings
+
+    @staticmethod
+    def _key(posting: dict) -> str:
+        return normalize_role(posting_role(posting["job_title"], posting["job_description"]))
+
+    def take(self, role: str):
+        """
+        Pop a fresh question set for ``role``.
+
+        Returns:
+            list: Question texts, or ``None`` when the pool has none.
+        """
+        pool = self._pools.get(normalize_role(role))
+        now = time.monotonic()
+        while pool:
+            generated_at, questions = pool.popleft()
+            if now - generated_at < self.max_age:
+                self.hits += 1
+                self._wakeup.set()
+                return questions
+        self.misses += 1
+        return None
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def llm_idle(self) -> bool:
+        if self.work_queue is not None:
+            return await self.work_queue.waiting() == 0
+        return scheduler.queue_depth == 0 and scheduler.in_flight < scheduler.max_in_flight
+
+    async def _load_postings(self):
+        if (self._postings_loaded_at is None
+                or time.monotonic() - self._postings_loaded_at >= self.refresh_interval):
+            self._postings = {p["posting_id"]: p for p in await self.db.get_job_postings()}
+            self._postings_loaded_at = time.monotonic()
+
+    def _next_posting(self):
+        """The posting whose pool is emptiest, if any needs a new set."""
+        now = time.monotonic()
+        best, best_count = None, self.size
+        for posting in self._postings.values():
+            pool = self._pools[self._key(posting)]
+            while pool and now - pool[0][0] >= self.max_age:
+                pool.popleft()
+            if len(pool) < best_count:
+                best, best_count = posting, len(pool)
+        return best
+
+    async def _run(self):
+        while True:
+            try:
+                await self._load_postings()
+                posting = self._next_posting()
+                if posting is None or not await self.llm_idle():
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._fill(posting)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+                logger.exception("Question pre-generation failed")
+                await asyncio.sleep(self.poll_interval)
+
+    async def _fill(self, posting: dict):
+        questions = await self.agent.async_generate_question_set(
+            posting_role(posting["job_title"], posting["job_description"]),
+            options={
+                **self.agent.agent_client.options,
+                'temperature': self.temperature,
+                'seed': random.randrange(2 ** 31)
+                }
+            )
+        self._pools[self._key(posting)].append(
+            (time.monotonic(), [q.question for q in questions])
+            )
+        self.generated += 1
+        logger.info("Pre-generated questions for posting %s", posting["posting_id"])
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "postings": len(self._postings),
+            "pooled_sets": sum(len(pool) for pool in self._pools.values()),
+            "size": self.size,
+            "max_age": self.max_age,
+            "generated": self.generated,
+            "failures": self.failures,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -11,11 +11,11 @@ class AsyncRedisLocalCacheClient:
         if not self._pool:
             self._pool = redis.from_url(self.redis_url, decode_responses=True)
 
-    async def set(self, key: str, value: str):
-        """Set a value in Redis."""
+    async def set(self, key: str, value: str, ex: int = None):
+        """Set a value in Redis, optionally expiring after `ex` seconds."""
         if not self._pool:
             raise RuntimeError("Redis connection not initialized. Call `connect` first.")
-        await self._pool.set(key, value)
+        await self._pool.set(key, value, ex=ex)
 
     async def get(self, key: str):
         """Get a value from Redis."""
@@ -23,6 +23,105 @@ class AsyncRedisLocalCacheClient:
             raise RuntimeError("Redis connection not initialized. Call `connect` first.")
         return await self._pool.get(key)
 
+    def _require_pool(self):
+        if not self._pool:
+            raise RuntimeError("Redis connection not initialized. Call `connect` first.")
+        return self._pool
+
+    async def hdel(self, key: str, *fields: str):
+        """Delete fields of a Redis hash."""
+        await self._require_pool().hdel(key, *fields)
+
+    async def hlen(self, key: str) -> int:
+        """Count the fields of a Redis hash."""
+        return await self._require_pool().hlen(key)
+
+    async def exists(self, key: str) -> bool:
+        """Check whether a key exists."""
+        return bool(await self._require_pool().exists(key))
+
+    async def delete(self, *keys: str):
+        """Delete one or more keys."""
+        await self._require_pool().delete(*keys)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """Delete every key starting with `prefix`; returns the number deleted."""
+        pool = self._require_pool()
+        deleted = 0
+        async for key in pool.scan_iter(match=f"{prefix}*", count=500):
+            deleted += await pool.delete(key)
+        return deleted
+
+    async def xadd(self, stream: str, fields: dict, maxlen: int = None) -> str:
+        """Append an entry to a stream, optionally trimming it to about `maxlen` entries."""
+        return await self._require_pool().xadd(stream, fields, maxlen=maxlen, approximate=True)
+
+    async def xgroup_create(self, stream: str, group: str):
+        """Create a consumer group reading `stream` from its start, if it does not exist yet."""
+        try:
+            await self._require_pool().xgroup_create(stream, group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def xreadgroup(self, group: str, consumer: str, streams: dict,
+                         count: int = None, block: int = None) -> list:
+        """Read new entries of `streams` as `consumer` of `group`."""
+        return await self._require_pool().xreadgroup(
+            group, consumer, streams, count=count, block=block
+            ) or []
+
+    async def xread(self, streams: dict, count: int = None, block: int = None) -> list:
+        """Read entries of `streams` after the given ids."""
+        return await self._require_pool().xread(streams, count=count, block=block) or []
+
+    async def xack(self, stream: str, group: str, *ids: str):
+        """Acknowledge entries and delete them from the stream."""
+        pipe = self._require_pool().pipeline(transaction=True)
+        pipe.xack(stream, group, *ids)
+        pipe.xdel(stream, *ids)
+        await pipe.execute()
+
+    async def xdel(self, stream: str, *ids: str):
+        """Delete entries from a stream."""
+        await self._require_pool().xdel(stream, *ids)
+
+    async def xautoclaim(self, stream: str, group: str, consumer: str,
+                         min_idle_time: int, count: int = 10) -> list:
+        """Take over entries pending for more than `min_idle_time` milliseconds."""
+        result = await self._require_pool().xautoclaim(
+            stream, group, consumer, min_idle_time, start_id="0-0", count=count
+            )
+        return result[1]
+
+    async def xpending(self, stream: str, group: str) -> int:
+        """Count the entries delivered to `group` and not acknowledged yet."""
+        return (await self._require_pool().xpending(stream, group))["pending"]
+
+    async def xdelivery_count(self, stream: str, group: str, entry_id: str) -> int:
+        """Times a pending entry has been delivered."""
+        pending = await self._require_pool().xpending_range(
+            stream, group, min=entry_id, max=entry_id, count=1
+            )
+        return pending[0]["times_delivered"] if pending else 0
+
+    async def xlen(self, stream: str) -> int:
+        """Count the entries of a stream."""
+        return await self._require_pool().xlen(stream)
+
+    async def xfirst(self, stream: str):
+        """The oldest entry of a stream as `(id, fields)`, or None."""
+        entries = await self._require_pool().xrange(stream, count=1)
+        return entries[0] if entries else None
+
+    def register_script(self, source: str):
+        """Return a callable running the Lua `source` by its SHA, loading it when needed."""
+        return self._require_pool().register_script(source)
+
+    def pipeline(self, transaction: bool = True):
+        """Return a pipeline to batch several commands in one round trip."""
+        return self._require_pool().pipeline(transaction=transaction)
+
     async def close(self):
         """Close the Redis connection."""
         if self._pool:
@@ -1,35 +1,158 @@
+import base64
+import hashlib
+import json
 import logging
-from pathlib import Path
+from collections import OrderedDict
 from fastapi import HTTPException
-from database import Database
+import metrics
+from database import Database, LOG_FIELDS
 from models import InterviewReportRequest
 from storage import StorageManager
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Interview Manager
 class ReportManager:
-    def __init__(self):
-        self.storage = StorageManager()
-        self.db = Database()
+    """
+    Serves final reports and session logs.
 
-    async def get_summary_report(self, request: InterviewReportRequest):
-        if request.session_id is None:
-            raise HTTPException(status_code=404, detail="session_id in request is empty")
+    Final reports never change once written, so their serialized bytes and
+    strong ETags are kept in a size-bounded LRU; provisional reports are
+    re-read until validation replaces them.
+
+    Attributes:
+        storage: The report storage backend.
+        db (Database): The session log database.
+        cache_max_bytes (int): Total size of the cached report bodies.
+    """
+    def __init__(
+        self, storage: StorageManager = None, db: Database = None,
+        cache_max_bytes: int = 64 * 1024 * 1024
+        ):
+        self.storage = storage or StorageManager()
+        self.db = db or Database()
+        self.cache_max_bytes = cache_max_bytes
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        metrics.report_cache_bytes.set_function(lambda: self._cache_bytes)
+        metrics.report_cache_entries.set_function(lambda: len(self._cache))
+
+    @staticmethod
+    def etag(body: bytes) -> str:
+        """Strong ETag derived from the serialized report."""
+        return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
 
-        file_path = f"{self.storage.path}/{request.session_id}.json"
+    async def get_report(self, session_id: str):
+        """
+        Return the serialized report of a session and its ETag.
 
-        if Path(file_path).exists() is False:
+        Args:
+            session_id (str): The interview session.
+
+        Returns:
+            tuple: ``(body, etag, final)`` with the compact JSON report as
+                   bytes; provisional reports are not final and not cached.
+        """
+        if not session_id:
+            raise HTTPException(status_code=404, detail="session_id in request is empty")
+        entry = self._cache.get(session_id)
+        if entry is not None:
+            self._cache.move_to_end(session_id)
+            self.hits += 1
+            metrics.report_cache_requests_total.labels("hit").inc()
+            return entry
+
+        self.misses += 1
+        metrics.report_cache_requests_total.labels("miss").inc()
+        report = await self.storage.read_report(session_id)
+        if report is None:
             raise HTTPException(status_code=404, detail="Report not exist")
+        body = json.dumps(report, separators=(",", ":")).encode()
+        # Reports stored before provisional reports existed have no status.
+        final = report.get("status", "final") == "final"
+        entry = (body, self.etag(body), final)
+        if final:
+            self._cache_put(session_id, entry)
+        return entry
+
+    def _cache_put(self, session_id: str, entry):
+        size = len(entry[0])
+        if size > self.cache_max_bytes or session_id in self._cache:
+            return
+        self._cache[session_id] = entry
+        self._cache_bytes += size
+        while self._cache_bytes > self.cache_max_bytes:
+            _, (evicted, _, _) = self._cache.popitem(last=False)
+            self._cache_bytes -= len(evicted)
 
-        report = await self.storage.read_interview_data(file_path)
-        return report
+    def cache_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "bytes": self._cache_bytes,
+            "max_bytes": self.cache_max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    async def get_summary_report(self, request: InterviewReportRequest):
+        body, _, _ = await self.get_report(request.session_id)
+        return json.loads(body)
 
     async def get_session_log(self):
         data=await self.db.get_all_logs()
         return await self.db.get_log_data(data)
 
+    @staticmethod
+    def encode_cursor(row) -> str:
+        """Opaque keyset cursor for the (timestamp, session_id) of a row."""
+        key = json.dumps([row[LOG_FIELDS.index("timestamp")], row[0]])
+        return base64.urlsafe_b64encode(key.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        try:
+            timestamp, session_id = json.loads(base64.urlsafe_b64decode(cursor))
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from e
+        return timestamp, session_id
+
+    async def get_session_log_page(
+        self, limit: int, cursor: str = None, **filters
+        ) -> dict:
+        """
+        Return one page of session logs and the cursor for the next page.
+
+        Args:
+            limit (int): Page size.
+            cursor (str): ``next_cursor`` of the previous page, if any.
+            **filters: ``candidate_id``, ``job_title``, ``since``, ``until``.
+
+        Returns:
+            dict: ``{"items": [...], "next_cursor": str | None}``.
+        """
+        after = self.decode_cursor(cursor) if cursor else None
+        # Fetch one extra row to know whether another page exists.
+        rows = [
+            row async for row in self.db.iter_logs(
+                after=after, limit=limit + 1, **filters
+                )
+            ]
+        next_cursor = self.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+        return {
+            "items": [dict(zip(LOG_FIELDS, row)) for row in rows[:limit]],
+            "next_cursor": next_cursor
+            }
+
+    async def stream_session_log(self, cursor: str = None, **filters):
+        """Yield matching session logs as NDJSON lines."""
+        after = self.decode_cursor(cursor) if cursor else None
+        async for row in self.db.iter_logs(after=after, **filters):
+            yield json.dumps(dict(zip(LOG_FIELDS, row))) + "\n"
+
 
 
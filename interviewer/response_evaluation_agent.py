@@ -1,17 +1,12 @@
 import logging
 
-from llm_client import LLMClient
+from conversation import build_context
+from llm_client import LLMClient, Priority
 from models import EvaluationResponse, EvaluationRequest
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-AGENT_TEMPLATE_SYSTEM = """
-You are an expert interviewer with deep knowledge of various roles.
-"""
-
-
 AGENT_TEMPLATE_TASK = """
 Evaluate the response based on relevance, completeness, clarity, job title and job description.
 Provide:
@@ -32,23 +27,67 @@ class ResponseEvaluationAgent:
     def __init__(self):
         self.agent_client = LLMClient(
             model='llama3.2',
-            options={'temperature': 1.0}
+            options={'temperature': 1.0},
+            priority=Priority.EVALUATION
             )
         self.agent_response_format = EvaluationResponse.model_json_schema()
 
 
-    async def async_generate_response_evaluation(
-        self, job: str, evaluation: EvaluationRequest
-        ):
+    @staticmethod
+    def build_prompt(evaluation: EvaluationRequest) -> str:
+        """The evaluation turn; the job is already in the session context."""
         prompt = (
             f"Question: {evaluation.question}\n"
-            f"Response: {evaluation.answer}\n\n"
-            f"Candidate Response for Job Description:\n{job}"
+            f"Response: {evaluation.answer}"
             )
+        return f"{AGENT_TEMPLATE_TASK}\n\n{prompt}"
+
+    async def async_generate_response_evaluation(
+        self, job: str, evaluation: EvaluationRequest, context=None, usage: dict = None
+        ):
+        """
+        Evaluate one answer.
+
+        Args:
+            job (str): The job title and job description.
+            evaluation (EvaluationRequest): The question and the answer.
+            context (list): Session messages; defaults to a fresh context
+                for the job.
+            usage (dict): Filled with the call's prompt token usage.
+        """
         response = await self.agent_client.generate_response(
-            prompt=f"{AGENT_TEMPLATE_SYSTEM}\n\n{AGENT_TEMPLATE_TASK}\n\n{prompt}",
-            response_format=self.agent_response_format
+            prompt=self.build_prompt(evaluation),
+            response_format=self.agent_response_format,
+            context=context or build_context(job),
+            usage=usage
             )
         # Use Pydantic to validate the response
-        response = EvaluationResponse.model_validate_json(response.message.content)
+        response = self.agent_client.validate_response(
+            EvaluationResponse, response.message.content
+            )
         return response
+
+    async def async_stream_response_evaluation(
+        self, job: str, evaluation: EvaluationRequest, context=None, usage: dict = None
+        ):
+        """
+        Stream the evaluation as it is generated. Arguments are those of
+        ``async_generate_response_evaluation``.
+
+        Yields:
+            tuple: ``("token", str)`` for each generated chunk, then
+                   ``("result", EvaluationResponse)`` once complete.
+        """
+        content = []
+        async for token in self.agent_client.stream_response(
+            prompt=self.build_prompt(evaluation),
+            response_format=self.agent_response_format,
+            context=context or build_context(job),
+            usage=usage
+            ):
+            content.append(token)
+            yield "token", token
+        # Use Pydantic to validate the response
+        yield "result", self.agent_client.validate_response(
+            EvaluationResponse, "".join(content)
+            )
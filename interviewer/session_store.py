@@ -0,0 +1,428 @@
+"""
+Session stores for in-progress interviews.
+
+An interview session is a dict with scalar fields (``candidate_id``,
+``job_title``, ``timestamp``, ...) and maps keyed by question id:
+``questions``, ``answers``, ``evaluations``, ``evaluation_status`` and
+``prompt_usage``.
+Stores expose per-item updates on those maps so recording one answer never
+rewrites the whole session. Sessions returned by ``get`` are read-only
+snapshots or views; every change goes through the store.
+
+``InMemorySessionStore`` keeps sessions in the process, as compact slotted
+objects evicted after a TTL of inactivity, and only works with a single
+worker; ``RedisSessionStore`` shares them between every worker and
+replica.
+"""
+import asyncio
+import copy
+import json
+import logging
+import sys
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+
+import metrics
+from redis_client import AsyncRedisLocalCacheClient
+
+logger = logging.getLogger(__name__)
+
+SESSION_MAPS = ("questions", "answers", "evaluations", "evaluation_status", "prompt_usage")
+
+# Writes to a session that still exists, refreshing the TTL of its keys.
+# KEYS: the session hash, the hash written, then every key of the session.
+# ARGV: ttl, "nx" (HSETNX one field) or "set" (HSET), then fields and values.
+# Returns -1 when the session is gone, else whether a field was set.
+SESSION_WRITE = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local written = 1
+if ARGV[2] == 'nx' then
+    written = redis.call('HSETNX', KEYS[2], ARGV[3], ARGV[4])
+else
+    redis.call('HSET', KEYS[2], unpack(ARGV, 3))
+end
+for i = 3, #KEYS do
+    redis.call('EXPIRE', KEYS[i], ARGV[1])
+end
+return written
+"""
+
+
+class SessionStore:
+    """Interface shared by the session store implementations."""
+
+    async def connect(self):
+        """Open any connection the store needs."""
+
+    async def close(self):
+        """Release the store's connections."""
+
+    async def check_capacity(self):
+        """Raise ``SessionLimitError`` if no new session can be created."""
+
+    async def create(self, session_id: str, session: dict):
+        """Store a new session."""
+        raise NotImplementedError
+
+    async def get(self, session_id: str):
+        """
+        Return the session, or ``None`` if it does not exist. Callers must
+        not modify it; its maps may be read-only.
+        """
+        raise NotImplementedError
+
+    async def exists(self, session_id: str) -> bool:
+        """Check whether the session exists."""
+        raise NotImplementedError
+
+    async def update(self, session_id: str, fields: dict):
+        """Set top-level fields of the session; ignored if it does not exist."""
+        raise NotImplementedError
+
+    async def set_item(self, session_id: str, mapping: str, key: int, value):
+        """Set one entry of one of the session maps; ignored if it does not exist."""
+        raise NotImplementedError
+
+    async def count(self, session_id: str, mapping: str) -> int:
+        """Number of entries in one of the session maps."""
+        raise NotImplementedError
+
+    async def claim(self, session_id: str, field: str) -> bool:
+        """
+        Atomically set ``field`` if it is not set yet. Returns ``True`` only
+        for the single caller that set it, and ``False`` if the session does
+        not exist.
+        """
+        raise NotImplementedError
+
+    async def release(self, session_id: str, field: str):
+        """Clear a field set by ``claim``."""
+        raise NotImplementedError
+
+    async def delete(self, session_id: str):
+        """Remove the session."""
+        raise NotImplementedError
+
+
+class SessionLimitError(Exception):
+    """Raised when the store already holds ``max_sessions`` live sessions."""
+    def __init__(self, max_sessions: int, retry_after: int = 60):
+        super().__init__(f"Too many live interview sessions (limit {max_sessions})")
+        self.retry_after = retry_after
+
+
+def _copy_value(value):
+    # Map values are strings or flat dicts of scalars.
+    return dict(value) if isinstance(value, dict) else value
+
+
+class Session:
+    """
+    Compact in-process representation of an interview session.
+
+    Slots instead of a per-session dict of dicts; repeated strings (job
+    title and description, questions, the context's system message) are
+    interned so sessions for the same posting share them. Fields without a
+    slot (``finalizing``, ``error``, ...) go to ``extra``.
+    """
+    SCALARS = (
+        "session_id", "candidate_id", "job_title", "job_description",
+        "timestamp", "data_path"
+        )
+    __slots__ = SCALARS + SESSION_MAPS + ("context", "extra", "last_activity")
+
+    def __init__(self, session: dict):
+        for field in self.SCALARS:
+            setattr(self, field, None)
+        for mapping in SESSION_MAPS:
+            setattr(self, mapping, {})
+        self.context = ()
+        self.extra = {}
+        self.last_activity = time.monotonic()
+        self.update(session)
+
+    @staticmethod
+    def _intern(value):
+        return sys.intern(value) if isinstance(value, str) else value
+
+    def update(self, fields: dict):
+        for field, value in fields.items():
+            if field in self.SCALARS:
+                setattr(self, field, self._intern(value))
+            elif field in SESSION_MAPS:
+                setattr(self, field, {
+                    k: self._intern(_copy_value(v)) for k, v in value.items()
+                    })
+            elif field == "context":
+                self.context = tuple(
+                    (m["role"], sys.intern(m["content"])) for m in value or ()
+                    )
+            else:
+                self.extra[field] = copy.deepcopy(value)
+
+    def set_item(self, mapping: str, key: int, value):
+        getattr(self, mapping)[key] = self._intern(_copy_value(value))
+
+    def to_dict(self) -> dict:
+        """
+        The session as a dict whose maps are read-only views of this
+        session's; ``update`` and ``set_item`` copy on the way in instead.
+        """
+        session = {field: getattr(self, field) for field in self.SCALARS}
+        for mapping in SESSION_MAPS:
+            session[mapping] = MappingProxyType(getattr(self, mapping))
+        if self.context:
+            session["context"] = [
+                {"role": role, "content": content} for role, content in self.context
+                ]
+        session.update(self.extra)
+        return session
+
+
+def approximate_size(obj, seen: set) -> int:
+    """``sys.getsizeof`` of ``obj`` and everything it references, once each."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(k, seen) + approximate_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    elif hasattr(obj, "__slots__"):
+        size += sum(approximate_size(getattr(obj, slot), seen) for slot in obj.__slots__)
+    return size
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Sessions kept in the process, ordered by last activity.
+
+    A sweeper task started by ``connect`` removes sessions idle for more than
+    ``ttl`` seconds (abandoned interviews, failed finalizations), and
+    ``create`` raises ``SessionLimitError`` once ``max_sessions`` sessions
+    are live. Writes to a session that no longer exists are ignored, as in
+    Redis.
+
+    Attributes:
+        ttl (int): Seconds an idle session is kept.
+        max_sessions (int): Live sessions allowed; 0 for no limit.
+        sweep_interval (float): Seconds between sweeps.
+    """
+
+    def __init__(self, ttl: int = 86400, max_sessions: int = 0, sweep_interval: float = 60):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self._sessions = OrderedDict()
+        self._sweeper = None
+        self.approximate_bytes = 0
+        metrics.sessions_live.set_function(lambda: len(self._sessions))
+        metrics.sessions_memory_bytes.set_function(lambda: self.approximate_bytes)
+
+    async def connect(self):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    def _touch(self, session_id: str):
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_activity = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def sweep(self) -> int:
+        """Remove expired sessions; returns how many were removed."""
+        deadline = time.monotonic() - self.ttl
+        expired = 0
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_activity > deadline:
+                break
+            del self._sessions[session_id]
+            expired += 1
+        if expired:
+            metrics.sessions_evicted_total.inc(expired)
+            logger.info("Evicted %d idle sessions", expired)
+        return expired
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+                seen = set()
+                self.approximate_bytes = sum(
+                    approximate_size(session, seen) for session in self._sessions.values()
+                    )
+            except Exception:
+                logger.exception("Session sweep failed")
+
+    async def check_capacity(self):
+        if self.max_sessions and len(self._sessions) >= self.max_sessions:
+            self.sweep()
+            if len(self._sessions) >= self.max_sessions:
+                metrics.sessions_rejected_total.inc()
+                raise SessionLimitError(
+                    self.max_sessions, retry_after=max(1, int(self.sweep_interval))
+                    )
+
+    async def create(self, session_id: str, session: dict):
+        await self.check_capacity()
+        self._sessions[session_id] = Session(session)
+
+    async def get(self, session_id: str):
+        session = self._touch(session_id)
+        return session.to_dict() if session is not None else None
+
+    async def exists(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    async def update(self, session_id: str, fields: dict):
+        session = self._touch(session_id)
+        if session is not None:
+            session.update(fields)
+
+    async def set_item(self, session_id: str, mapping: str, key: int, value):
+        session = self._touch(session_id)
+        if session is not None:
+            session.set_item(mapping, key, value)
+
+    async def count(self, session_id: str, mapping: str) -> int:
+        session = self._sessions.get(session_id)
+        return len(getattr(session, mapping)) if session is not None else 0
+
+    async def claim(self, session_id: str, field: str) -> bool:
+        session = self._touch(session_id)
+        if session is None or field in session.extra:
+            return False
+        session.extra[field] = True
+        return True
+
+    async def release(self, session_id: str, field: str):
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.extra.pop(field, None)
+
+    async def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessions kept in Redis so any worker can serve any request.
+
+    Scalar fields live in the hash ``session:{id}`` and each map in its own
+    hash ``session:{id}:{map}``; values are JSON encoded. Every write
+    refreshes the TTL of all the session's keys. Writes after ``create`` go
+    through a Lua script that skips them once the session hash is gone, so
+    a late write never recreates a partial session without a TTL.
+
+    Attributes:
+        redis (AsyncRedisLocalCacheClient): The Redis client.
+        ttl (int): Seconds an idle session is kept.
+    """
+    def __init__(self, redis_url: str = "redis://localhost:6379", ttl: int = 86400):
+        self.redis = AsyncRedisLocalCacheClient(redis_url)
+        self.ttl = ttl
+        self._write = None
+
+    async def connect(self):
+        await self.redis.connect()
+        self._write = self.redis.register_script(SESSION_WRITE)
+
+    async def close(self):
+        await self.redis.close()
+
+    @staticmethod
+    def _key(session_id: str, mapping: str = None) -> str:
+        return f"session:{session_id}" if mapping is None else f"session:{session_id}:{mapping}"
+
+    def _keys(self, session_id: str):
+        return [self._key(session_id)] + [self._key(session_id, m) for m in SESSION_MAPS]
+
+    def _touch(self, pipe, session_id: str):
+        for key in self._keys(session_id):
+            pipe.expire(key, self.ttl)
+
+    async def create(self, session_id: str, session: dict):
+        pipe = self.redis.pipeline()
+        pipe.hset(self._key(session_id), mapping={
+            field: json.dumps(value) for field, value in session.items()
+            if field not in SESSION_MAPS
+            })
+        for mapping in SESSION_MAPS:
+            if session.get(mapping):
+                pipe.hset(self._key(session_id, mapping), mapping={
+                    str(k): json.dumps(v) for k, v in session[mapping].items()
+                    })
+        self._touch(pipe, session_id)
+        await pipe.execute()
+
+    async def get(self, session_id: str):
+        pipe = self.redis.pipeline(transaction=False)
+        for key in self._keys(session_id):
+            pipe.hgetall(key)
+        fields, *maps = await pipe.execute()
+        if not fields:
+            return None
+        session = {field: json.loads(value) for field, value in fields.items()}
+        for mapping, items in zip(SESSION_MAPS, maps):
+            session[mapping] = {int(k): json.loads(v) for k, v in items.items()}
+        return session
+
+    async def exists(self, session_id: str) -> bool:
+        return await self.redis.exists(self._key(session_id))
+
+    async def _write_existing(self, session_id: str, key: str, mode: str, items: list) -> int:
+        return await self._write(
+            keys=[self._key(session_id), key, *self._keys(session_id)],
+            args=[self.ttl, mode, *items]
+            )
+
+    async def update(self, session_id: str, fields: dict):
+        if not fields:
+            return
+        await self._write_existing(session_id, self._key(session_id), "set", [
+            item for field, value in fields.items() for item in (field, json.dumps(value))
+            ])
+
+    async def set_item(self, session_id: str, mapping: str, key: int, value):
+        await self._write_existing(
+            session_id, self._key(session_id, mapping), "set", [str(key), json.dumps(value)]
+            )
+
+    async def count(self, session_id: str, mapping: str) -> int:
+        return await self.redis.hlen(self._key(session_id, mapping))
+
+    async def claim(self, session_id: str, field: str) -> bool:
+        return await self._write_existing(
+            session_id, self._key(session_id), "nx", [field, json.dumps(True)]
+            ) == 1
+
+    async def release(self, session_id: str, field: str):
+        await self.redis.hdel(self._key(session_id), field)
+
+    async def delete(self, session_id: str):
+        await self.redis.delete(*self._keys(session_id))
+
+
+def create_session_store(kind: str = "memory", **kwargs) -> SessionStore:
+    """Build the session store named by ``kind`` ("memory" or "redis")."""
+    if kind == "memory":
+        return InMemorySessionStore(**kwargs)
+    if kind == "redis":
+        return RedisSessionStore(**kwargs)
+    raise ValueError(f"Unknown session store: {kind}")
@@ -1,9 +1,32 @@
+"""
+Storage backends for final interview reports.
+
+``StorageManager`` writes one JSON file per session. ``SegmentedStorageManager``
+appends compact (optionally zlib-compressed) records to rolling segment files
+and keeps an append-only offset index keyed by session_id, so millions of
+reports do not mean millions of files; reads are served from mmap-ed segments.
+
+Reports written by ``StorageManager`` are moved into segments once, when
+switching REPORT_STORE to "segmented":
+
+    REPORT_STORE=segmented python storage.py import local_storage
+"""
 from pathlib import  Path
+import argparse
+import asyncio
+import contextlib
 import json
 import logging
+import mmap
+import os
+import struct
+import uuid
+import zlib
 import aiofiles
+import aiofiles.os
+
+from tracing import traced
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class StorageManager:
@@ -11,16 +34,318 @@ class StorageManager:
         self.path = file_path
         Path(self.path).mkdir(mode=0o777, parents=False, exist_ok=True)
 
+    async def connect(self):
+        """Nothing to open for file-per-session storage."""
+
+    async def close(self):
+        """Nothing to close for file-per-session storage."""
+
+    def report_path(self, session_id: str) -> str:
+        """Location of a session's report, as recorded in the session log."""
+        return f"{self.path}/{session_id}.json"
+
+    @traced("storage.save_report")
+    async def save_report(self, session_id: str, data: dict):
+        await self.save_interview_data(self.report_path(session_id), data)
+
+    async def has_report(self, session_id: str) -> bool:
+        return await self.has_interview_data(self.report_path(session_id))
+
+    @traced("storage.read_report")
+    async def read_report(self, session_id: str):
+        """Return the report of a session, or ``None`` if there is none."""
+        if not await self.has_report(session_id):
+            return None
+        return await self.read_interview_data(self.report_path(session_id))
+
+    async def report_ids(self) -> list:
+        """Session ids of every stored report."""
+        return [
+            name[:-len(".json")] for name in await aiofiles.os.listdir(self.path)
+            if name.endswith(".json")
+            ]
+
+    def stats(self) -> dict:
+        return {"store": "file", "path": self.path}
+
     async def save_interview_data(self, filename: str, data: dict):
-        """Save interview data to local storage asynchronously."""
-        async with aiofiles.open(filename, mode='w') as f:
-            await f.write(json.dumps(data, indent=2))
+        """
+        Save interview data to local storage asynchronously. The data is
+        written to a temporary file next to ``filename`` and moved onto it,
+        so a report being replaced is never read half-written.
+        """
+        temp = f"{filename}.{uuid.uuid4().hex}.tmp"
+        try:
+            async with aiofiles.open(temp, mode='w') as f:
+                await f.write(json.dumps(data, indent=2))
+            await aiofiles.os.replace(temp, filename)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                await aiofiles.os.remove(temp)
+            raise
+
+    async def has_interview_data(self, filename: str) -> bool:
+        """Check whether interview data exists without blocking the event loop."""
+        return await aiofiles.os.path.exists(filename)
 
     async def read_interview_data(self, filename: str):
         """Save interview data to local storage asynchronously."""
         async with aiofiles.open(filename, mode='r') as f:
             return json.loads(await f.read())
-    
-    
 
 
+# Record header: payload length, CRC32 of key + payload, key length, flags.
+RECORD_HEADER = struct.Struct("<IIHB")
+FLAG_COMPRESSED = 1
+SEGMENT_PATTERN = "segment-{:06d}.log"
+INDEX_FILE = "reports.idx"
+
+
+class SegmentedStorageManager:
+    """
+    Append-only report store made of rolling segment files.
+
+    Each record is ``header | session_id | payload`` where the payload is
+    compact JSON, zlib-compressed when ``compress`` is set. Every write also
+    appends ``session_id segment offset length`` to ``reports.idx``; the
+    index is loaded into memory on ``connect`` and records written after the
+    last index entry (e.g. on a crash between the two writes) are recovered
+    by scanning the segment tails. A torn record at the end of a segment is
+    truncated away. Saving a session again supersedes the earlier record.
+
+    Attributes:
+        path (str): Directory holding the segments and the index.
+        segment_size (int): Bytes after which a new segment is started.
+        compress (bool): Whether payloads are zlib-compressed.
+        fsync (bool): Whether every write is fsync-ed before it is indexed.
+    """
+    def __init__(
+        self, file_path="local_storage", segment_size: int = 64 * 1024 * 1024,
+        compress: bool = True, fsync: bool = False
+        ):
+        self.path = file_path
+        self.segment_size = segment_size
+        self.compress = compress
+        self.fsync = fsync
+        self._index = {}
+        self._maps = {}
+        self._segment = None
+        self._segment_file = None
+        self._index_file = None
+        self._write_lock = asyncio.Lock()
+        Path(self.path).mkdir(mode=0o777, parents=False, exist_ok=True)
+
+    async def connect(self):
+        """Load the offset index and open the active segment for appends."""
+        if self._segment_file is None:
+            await asyncio.to_thread(self._open)
+
+    async def close(self):
+        async with self._write_lock:
+            for segment_map in self._maps.values():
+                segment_map.close()
+            self._maps.clear()
+            for f in (self._segment_file, self._index_file):
+                if f is not None:
+                    f.close()
+            self._segment_file = self._index_file = None
+
+    def report_path(self, session_id: str) -> str:
+        return f"{self.path}/{INDEX_FILE}#{session_id}"
+
+    @traced("storage.save_report")
+    async def save_report(self, session_id: str, data: dict):
+        await self.connect()
+        record = self._encode(session_id, data)
+        async with self._write_lock:
+            location = await asyncio.to_thread(self._append, session_id, record)
+        self._index[session_id] = location
+
+    async def has_report(self, session_id: str) -> bool:
+        await self.connect()
+        return session_id in self._index
+
+    @traced("storage.read_report")
+    async def read_report(self, session_id: str):
+        """Return the report of a session, or ``None`` if there is none."""
+        await self.connect()
+        location = self._index.get(session_id)
+        if location is None:
+            return None
+        segment, offset, length = location
+        return self._decode(self._map(segment, offset + length)[offset:offset + length])
+
+    async def report_ids(self) -> list:
+        await self.connect()
+        return list(self._index)
+
+    async def import_files(self, directory: str) -> int:
+        """
+        Copy the reports of a file-per-session store into the segments.
+
+        Args:
+            directory (str): Directory of ``<session_id>.json`` reports.
+
+        Returns:
+            int: Number of reports imported.
+        """
+        source = StorageManager(directory)
+        imported = 0
+        for path in sorted(Path(directory).glob("*.json")):
+            if not await self.has_report(path.stem):
+                await self.save_report(path.stem, await source.read_interview_data(str(path)))
+                imported += 1
+        return imported
+
+    def stats(self) -> dict:
+        return {
+            "store": "segmented",
+            "path": self.path,
+            "reports": len(self._index),
+            "segments": len(self._segments()),
+            "active_segment": self._segment,
+            }
+
+    def _segment_path(self, segment: int) -> Path:
+        return Path(self.path) / SEGMENT_PATTERN.format(segment)
+
+    def _segments(self):
+        return sorted(int(p.stem.split("-")[1]) for p in Path(self.path).glob("segment-*.log"))
+
+    def _encode(self, session_id: str, data: dict) -> bytes:
+        key = session_id.encode()
+        payload = json.dumps(data, separators=(",", ":")).encode()
+        flags = 0
+        if self.compress:
+            payload = zlib.compress(payload)
+            flags |= FLAG_COMPRESSED
+        header = RECORD_HEADER.pack(len(payload), zlib.crc32(key + payload), len(key), flags)
+        return header + key + payload
+
+    @staticmethod
+    def _decode(record: bytes) -> dict:
+        length, _, key_length, flags = RECORD_HEADER.unpack_from(record)
+        payload = record[RECORD_HEADER.size + key_length:RECORD_HEADER.size + key_length + length]
+        if flags & FLAG_COMPRESSED:
+            payload = zlib.decompress(payload)
+        return json.loads(payload)
+
+    def _map(self, segment: int, size: int):
+        """mmap of ``segment`` covering at least ``size`` bytes."""
+        segment_map = self._maps.get(segment)
+        if segment_map is None or len(segment_map) < size:
+            # The active segment grew since it was mapped.
+            if segment_map is not None:
+                segment_map.close()
+            with open(self._segment_path(segment), "rb") as f:
+                segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = segment_map
+        return segment_map
+
+    def _open(self):
+        index_path = Path(self.path) / INDEX_FILE
+        ends = {}
+        if index_path.exists():
+            with open(index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) != 4:
+                        continue  # torn last line
+                    session_id, segment, offset, length = fields[0], *map(int, fields[1:])
+                    self._index[session_id] = (segment, offset, length)
+                    ends[segment] = max(ends.get(segment, 0), offset + length)
+        self._index_file = open(index_path, "a", encoding="utf-8")
+
+        segments = self._segments()
+        for segment in segments:
+            self._recover(segment, ends.get(segment, 0))
+        self._segment = segments[-1] if segments else 1
+        self._segment_file = open(self._segment_path(self._segment), "ab")
+        logger.info(
+            "Report store %s: %d reports in %d segments",
+            self.path, len(self._index), max(1, len(segments))
+            )
+
+    def _recover(self, segment: int, offset: int):
+        """Index the valid records after ``offset`` and cut off a torn tail."""
+        path = self._segment_path(segment)
+        size = path.stat().st_size
+        if offset >= size:
+            return
+        recovered = 0
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            length, crc, key_length, _ = RECORD_HEADER.unpack_from(data, position)
+            end = position + RECORD_HEADER.size + key_length + length
+            body = data[position + RECORD_HEADER.size:end]
+            if end > len(data) or zlib.crc32(body) != crc:
+                break
+            session_id = body[:key_length].decode()
+            self._index[session_id] = (segment, offset + position, end - position)
+            self._write_index(session_id, self._index[session_id])
+            position = end
+            recovered += 1
+        if offset + position < size:
+            logger.warning(
+                "Truncating %d bytes of incomplete records from %s", size - offset - position, path
+                )
+            os.truncate(path, offset + position)
+        if recovered:
+            logger.info("Recovered %d unindexed reports from %s", recovered, path)
+
+    def _write_index(self, session_id: str, location):
+        self._index_file.write(f"{session_id} {location[0]} {location[1]} {location[2]}\n")
+
+    def _append(self, session_id: str, record: bytes):
+        offset = self._segment_file.tell()
+        if offset and offset + len(record) > self.segment_size:
+            self._segment_file.close()
+            self._segment += 1
+            self._segment_file = open(self._segment_path(self._segment), "ab")
+            offset = 0
+        self._segment_file.write(record)
+        self._segment_file.flush()
+        if self.fsync:
+            os.fsync(self._segment_file.fileno())
+        location = (self._segment, offset, len(record))
+        # The index is written after the data so a crash leaves at most an
+        # unindexed record, which _recover picks up.
+        self._write_index(session_id, location)
+        self._index_file.flush()
+        return location
+
+
+def create_storage(kind: str = "file", **kwargs):
+    """Build the report storage named by ``kind`` ("file" or "segmented")."""
+    if kind == "file":
+        return StorageManager(**kwargs)
+    if kind == "segmented":
+        return SegmentedStorageManager(**kwargs)
+    raise ValueError(f"Unknown report storage: {kind}")
+
+
+async def main():
+    # Imported here: the CLI builds the same storage as the service.
+    import config
+
+    parser = argparse.ArgumentParser(description="Report storage maintenance")
+    parser.add_argument("command", choices=("import",))
+    parser.add_argument("directory", help="directory of <session_id>.json reports")
+    args = parser.parse_args()
+    if config.REPORT_STORE != "segmented":
+        parser.error("reports are imported into segments: set REPORT_STORE=segmented")
+    storage = SegmentedStorageManager(
+        config.REPORT_STORE_PATH, segment_size=config.REPORT_SEGMENT_SIZE,
+        compress=config.REPORT_COMPRESSION, fsync=config.REPORT_FSYNC
+        )
+    try:
+        print(f"Imported {await storage.import_files(args.directory)} reports")
+    finally:
+        await storage.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
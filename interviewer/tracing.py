@@ -0,0 +1,271 @@
+"""
+Per-request stage timings and an on-demand sampling profiler.
+
+The HTTP middleware opens a trace for every request and code along the way
+records spans into it, either with ``with span("name"):`` or by decorating
+an async function with ``@traced("name")``. Spans recorded outside a request
+(background tasks that outlive it, the worker) are ignored, so the
+instrumentation costs next to nothing there.
+
+Each response carries the spans summed per name in a ``Server-Timing``
+header. Requests slower than ``slow_seconds`` are kept in a ring buffer
+served at ``/debug/traces``.
+
+``arm_profiler(requests)`` profiles the next ``requests`` requests: a thread
+samples the event loop thread's stack every ``interval`` seconds while the
+request runs. Samples are stored with the trace as folded stacks
+(``frame;frame;frame count``), ready for flamegraph tools. Concurrent
+requests share the event loop, so a profile shows everything the process
+did meanwhile.
+"""
+import functools
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+import config
+
+_current = ContextVar("trace", default=None)
+
+
+class Trace:
+    """
+    Spans of one request.
+
+    Attributes:
+        trace_id (str): Unique id, also sent in the ``Server-Timing`` header.
+        name (str): Method and path of the request.
+        spans (list): ``(name, start, duration)`` tuples, in seconds from
+            the start of the request.
+        duration (float): Seconds the request took, once finished.
+        profile (Counter): Sample count per folded stack, when profiled.
+    """
+    def __init__(self, name: str):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started_at = datetime.now().isoformat()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.duration = None
+        self.status = None
+        self.profile = None
+        self._profiler = None
+
+    @property
+    def finished(self) -> bool:
+        return self.duration is not None
+
+    def add(self, name: str, start: float, end: float):
+        if not self.finished:
+            self.spans.append((name, start - self.start, end - start))
+
+    def totals(self) -> dict:
+        """Total seconds and count of spans per name, in first-seen order."""
+        totals = {}
+        for name, _, duration in self.spans:
+            total = totals.setdefault(name, [0.0, 0])
+            total[0] += duration
+            total[1] += 1
+        return totals
+
+    def server_timing(self) -> str:
+        """The spans summed per name, as a ``Server-Timing`` header value."""
+        entries = [
+            f'{name};dur={total * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+            for name, (total, count) in self.totals().items()
+            ]
+        if self.finished:
+            entries.append(f"total;dur={self.duration * 1000:.1f}")
+        entries.append(f'trace;desc="{self.trace_id}"')
+        return ", ".join(entries)
+
+    def to_dict(self, top_stacks: int = 10) -> dict:
+        data = {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "stages": {
+                name: {"seconds": total, "count": count}
+                for name, (total, count) in self.totals().items()
+                },
+            "spans": [
+                {"name": name, "start": start, "duration": duration}
+                for name, start, duration in self.spans
+                ]
+            }
+        if self.profile is not None:
+            data["profile"] = {
+                "samples": sum(self.profile.values()),
+                "top_stacks": [
+                    {"stack": stack, "samples": count}
+                    for stack, count in self.profile.most_common(top_stacks)
+                    ]
+                }
+        return data
+
+
+def current_trace():
+    """The trace of the request running in the current context, if any."""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """Record the duration of the block in the current request's trace."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, start, time.perf_counter())
+
+
+def traced(name: str):
+    """Decorate an async function so every call is recorded as a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread from a background thread.
+
+    Attributes:
+        thread_id (int): The sampled thread.
+        interval (float): Seconds between samples.
+        samples (Counter): Sample count per folded stack.
+    """
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class Tracer:
+    """
+    Opens and closes request traces and keeps the slow and profiled ones.
+
+    Attributes:
+        enabled (bool): Whether requests are traced at all.
+        slow_seconds (float): Requests at least this slow are kept.
+        traces (deque): The kept traces, newest last.
+        profile_remaining (int): Requests still to be profiled.
+        profile_interval (float): Seconds between profiler samples.
+    """
+    def __init__(self, enabled: bool = True, slow_seconds: float = 1.0, buffer_size: int = 100):
+        self.enabled = enabled
+        self.slow_seconds = slow_seconds
+        self.traces = deque(maxlen=buffer_size)
+        self.profile_remaining = 0
+        self.profile_interval = 0.005
+        self._profiling = False
+
+    def arm_profiler(self, requests: int, interval: float = None):
+        """Profile the next ``requests`` requests (0 disarms)."""
+        self.profile_remaining = max(0, requests)
+        if interval is not None:
+            self.profile_interval = interval
+
+    def begin(self, name: str, profile: bool = True):
+        """
+        Start tracing a request in the current context.
+
+        Args:
+            name (str): Method and path of the request.
+            profile (bool): Whether the request may consume an armed
+                profiler run.
+
+        Returns:
+            Trace: The new trace, or ``None`` when tracing is disabled.
+        """
+        if not self.enabled:
+            return None
+        trace = Trace(name)
+        _current.set(trace)
+        if profile and self.profile_remaining and not self._profiling:
+            # One profiled request at a time: the sampler sees the whole loop.
+            self.profile_remaining -= 1
+            self._profiling = True
+            trace._profiler = SamplingProfiler(threading.get_ident(), self.profile_interval)
+            trace._profiler.start()
+        return trace
+
+    def finish(self, trace: Trace, status: int = None):
+        """Close a trace and keep it if it was slow or profiled."""
+        if trace is None or trace.finished:
+            return
+        trace.duration = time.perf_counter() - trace.start
+        trace.status = status
+        if trace._profiler is not None:
+            trace.profile = trace._profiler.stop()
+            trace._profiler = None
+            self._profiling = False
+        if trace.duration >= self.slow_seconds or trace.profile is not None:
+            self.traces.append(trace)
+
+    def recent(self, limit: int = 50, min_duration: float = 0.0) -> list:
+        """Kept traces, newest first."""
+        matching = (t for t in reversed(self.traces) if t.duration >= min_duration)
+        return [t.to_dict() for t in itertools.islice(matching, limit)]
+
+    def get(self, trace_id: str):
+        for trace in self.traces:
+            if trace.trace_id == trace_id:
+                return trace
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "slow_seconds": self.slow_seconds,
+            "kept_traces": len(self.traces),
+            "profile_remaining": self.profile_remaining,
+            "profile_interval": self.profile_interval,
+            "profiling": self._profiling
+            }
+
+
+# The process-wide tracer used by the HTTP middleware.
+tracer = Tracer(
+    enabled=config.TRACING,
+    slow_seconds=config.TRACE_SLOW_SECONDS,
+    buffer_size=config.TRACE_BUFFER_SIZE
+    )
@@ -1,13 +1,12 @@
 import logging
 
-from llm_client import LLMClient
+from conversation import build_context
+from llm_client import LLMClient, Priority
 from models import ValidationResponse
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 AGENT_TEMPLATE_SYSTEM = """
-You are an expert interviewer with deep knowledge of various roles.
 Validate the scores and provide a brief summary feedback.
 Include strengths and areas for improvement.
 Review the following interview evaluation:
@@ -24,16 +23,56 @@ class ValidationAgent:
     def __init__(self):
         self.agent_client = LLMClient(
             model='llama3.2',
-            options={'temperature': 0.6}
+            options={'temperature': 0.6},
+            priority=Priority.VALIDATION
             )
         self.agent_response_format = ValidationResponse.model_json_schema()
   
-    async def async_generate_response_validation(self, prompt):
+    async def async_generate_response_validation(
+        self, prompt, context=None, usage: dict = None
+        ):
+        """
+        Validate the scores of an interview transcript.
+
+        Args:
+            prompt (str): The interview transcript.
+            context (list): Session messages holding the job description;
+                without it the transcript must include the job.
+            usage (dict): Filled with the call's prompt token usage.
+        """
         response = await self.agent_client.generate_response(
             prompt=f"{AGENT_TEMPLATE_SYSTEM}\n\n{prompt}\n\n{AGENT_TEMPLATE_TASK}",
-            response_format=self.agent_response_format 
+            response_format=self.agent_response_format,
+            context=context or build_context(),
+            usage=usage
             )
         # Use Pydantic to validate the response
-        response = ValidationResponse.model_validate_json(response.message.content)
+        response = self.agent_client.validate_response(
+            ValidationResponse, response.message.content
+            )
         return response
 
+    async def async_stream_response_validation(
+        self, prompt, context=None, usage: dict = None
+        ):
+        """
+        Stream the validation as it is generated. Arguments are those of
+        ``async_generate_response_validation``.
+
+        Yields:
+            tuple: ``("token", str)`` for each generated chunk, then
+                   ``("result", ValidationResponse)`` once complete.
+        """
+        content = []
+        async for token in self.agent_client.stream_response(
+            prompt=f"{AGENT_TEMPLATE_SYSTEM}\n\n{prompt}\n\n{AGENT_TEMPLATE_TASK}",
+            response_format=self.agent_response_format,
+            context=context or build_context(),
+            usage=usage
+            ):
+            content.append(token)
+            yield "token", token
+        # Use Pydantic to validate the response
+        yield "result", self.agent_client.validate_response(
+            ValidationResponse, "".join(content)
+            )
@@ -0,0 +1,367 @@
+"""
+Redis Streams work queue for agent LLM calls.
+
+With AGENT_QUEUE enabled the API process does not call the LLM itself: the
+queued agents below put each call on a Redis stream and wait for the answer,
+and ``worker.py`` processes run the real agents. API replicas and workers
+then scale independently.
+
+There is one job stream per priority class (``agents:jobs:questions``,
+``...:evaluation``, ``...:validation``, ``...:background``), read by the
+``workers`` consumer group, most urgent stream first. A worker acknowledges
+and deletes a job once it has answered it. Failed jobs go back on their
+stream until ``max_attempts`` is reached, then to the ``agents:dead``
+stream, and the requester gets the error. Jobs left pending by a crashed
+worker are claimed by another worker after ``claim_idle`` seconds. Jobs
+whose requester gave up (``deadline``) are dropped unanswered.
+
+Each API process reads the answers from its own reply stream,
+``agents:replies:<consumer>``, with a single listener task.
+"""
+import asyncio
+import json
+import logging
+import math
+import socket
+import time
+import uuid
+
+import metrics
+from llm_client import LLMOverloadedError, Priority
+from models import EvaluationResponse, Question, ValidationResponse
+from question_agent import QuestionAgent
+from redis_client import AsyncRedisLocalCacheClient
+from response_evaluation_agent import ResponseEvaluationAgent
+from tracing import span
+from validation_agent import ValidationAgent
+
+logger = logging.getLogger(__name__)
+
+GROUP = "workers"
+
+
+class AgentJobError(Exception):
+    """Raised when a worker could not run a job."""
+    def __init__(self, error_type: str, message: str):
+        super().__init__(f"{error_type}: {message}")
+        self.error_type = error_type
+
+
+class WorkQueue:
+    """
+    Both ends of the agent job streams.
+
+    Attributes:
+        redis (AsyncRedisLocalCacheClient): The Redis connection.
+        prefix (str): Key prefix of the streams.
+        timeout (float): Seconds a requester waits for a job's answer.
+        max_attempts (int): Runs of a failing job before it is dead-lettered.
+        claim_idle (float): Seconds after which a job pending on a silent
+            worker is claimed by another.
+        consumer (str): Unique name of this process, for the consumer group
+            and its reply stream.
+    """
+    def __init__(
+        self, redis_url: str, prefix: str = "agents", timeout: float = 300,
+        max_attempts: int = 3, claim_idle: float = 600, max_length: int = 100000
+        ):
+        self.redis = AsyncRedisLocalCacheClient(redis_url)
+        self.prefix = prefix
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.claim_idle = claim_idle
+        self.max_length = max_length
+        self.consumer = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self.reply_stream = f"{prefix}:replies:{self.consumer}"
+        self.dead_stream = f"{prefix}:dead"
+        self._waiting = {}
+        self._listener = None
+        self._round_trip = None
+
+    def stream(self, priority: Priority) -> str:
+        return f"{self.prefix}:jobs:{priority.name.lower()}"
+
+    @property
+    def streams(self) -> list:
+        """Job streams, most urgent first."""
+        return [self.stream(p) for p in Priority]
+
+    async def connect(self, listen: bool = True):
+        """Connect, create the consumer group and, for requesters, start the reply listener."""
+        await self.redis.connect()
+        for stream in self.streams:
+            await self.redis.xgroup_create(stream, GROUP)
+        if listen and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+            await self.redis.delete(self.reply_stream)
+        for future in self._waiting.values():
+            future.cancel()
+        self._waiting.clear()
+        await self.redis.close()
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._round_trip or 1.0))
+
+    # Requester side
+
+    async def submit(self, priority: Priority, kind: str, payload: dict) -> dict:
+        """
+        Queue a job and wait for its answer.
+
+        Args:
+            priority (Priority): Selects the job stream.
+            kind (str): ``questions``, ``evaluation`` or ``validation``.
+            payload (dict): JSON-serializable arguments of the job.
+
+        Returns:
+            dict: The job's ``result`` and ``usage``.
+
+        Raises:
+            LLMOverloadedError: No answer within ``timeout``, or the
+                workers' LLM was overloaded.
+            AgentJobError: The job failed on every attempt.
+        """
+        job_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[job_id] = future
+        start = time.monotonic()
+        try:
+            await self.redis.xadd(self.stream(priority), {
+                "job_id": job_id,
+                "kind": kind,
+                "payload": json.dumps(payload),
+                "reply_to": self.reply_stream,
+                "deadline": str(time.time() + self.timeout),
+                "attempt": "1"
+                }, maxlen=self.max_length)
+            with span(f"queue.{kind}"):
+                reply = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            metrics.agent_jobs_total.labels(kind, "timeout").inc()
+            raise LLMOverloadedError(self.retry_after())
+        finally:
+            self._waiting.pop(job_id, None)
+        elapsed = time.monotonic() - start
+        metrics.agent_job_seconds.labels(kind).observe(elapsed)
+        self._round_trip = elapsed if self._round_trip is None else (
+            0.8 * self._round_trip + 0.2 * elapsed
+            )
+        if reply.get("error_type"):
+            if reply["error_type"] == LLMOverloadedError.__name__:
+                raise LLMOverloadedError(self.retry_after())
+            raise AgentJobError(reply["error_type"], reply["error"])
+        return json.loads(reply["result"])
+
+    async def _listen(self):
+        last_id = "0-0"
+        while True:
+            try:
+                for _, entries in await self.redis.xread(
+                    {self.reply_stream: last_id}, count=100, block=1000
+                    ):
+                    for entry_id, fields in entries:
+                        last_id = entry_id
+                        future = self._waiting.get(fields.get("job_id"))
+                        if future is not None and not future.done():
+                            future.set_result(fields)
+                    if entries:
+                        await self.redis.xdel(self.reply_stream, *(e[0] for e in entries))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Reading agent job replies failed")
+                await asyncio.sleep(1)
+
+    # Worker side
+
+    async def read(self, consumer: str, count: int, block: float = 5.0) -> list:
+        """
+        Up to ``count`` new jobs for ``consumer``, most urgent streams first;
+        blocks up to ``block`` seconds when there are none.
+
+        Returns:
+            list: ``(stream, entry_id, fields)`` tuples.
+        """
+        jobs = []
+        for stream in self.streams:
+            if len(jobs) >= count:
+                break
+            for _, entries in await self.redis.xreadgroup(
+                GROUP, consumer, {stream: ">"}, count=count - len(jobs)
+                ):
+                jobs.extend((stream, entry_id, fields) for entry_id, fields in entries)
+        if not jobs:
+            for stream, entries in await self.redis.xreadgroup(
+                GROUP, consumer, {s: ">" for s in self.streams},
+                count=1, block=int(block * 1000)
+                ):
+                jobs.extend((stream, entry_id, fields) for entry_id, fields in entries)
+        return jobs
+
+    async def reclaim(self, consumer: str, count: int) -> list:
+        """
+        Jobs pending on silent workers for longer than ``claim_idle``, taken
+        over by ``consumer``. Jobs delivered too often (they keep killing
+        their worker) are dead-lettered instead.
+        """
+        jobs = []
+        for stream in self.streams:
+            for entry_id, fields in await self.redis.xautoclaim(
+                stream, GROUP, consumer, int(self.claim_idle * 1000), count=count
+                ):
+                if not fields:
+                    continue  # deleted meanwhile
+                if await self.redis.xdelivery_count(stream, GROUP, entry_id) > self.max_attempts:
+                    await self.fail(stream, entry_id, fields, "WorkerLost",
+                                    "the job was delivered to workers that never answered")
+                    continue
+                jobs.append((stream, entry_id, fields))
+        return jobs
+
+    async def reply(self, stream: str, entry_id: str, fields: dict, answer: dict):
+        """Send ``answer`` to the requester and remove the job."""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xadd(fields["reply_to"], {"job_id": fields["job_id"], **answer},
+                  maxlen=self.max_length, approximate=True)
+        # Replies of a requester that went away expire with its stream.
+        pipe.expire(fields["reply_to"], int(self.timeout) * 2)
+        pipe.xack(stream, GROUP, entry_id)
+        pipe.xdel(stream, entry_id)
+        await pipe.execute()
+
+    async def drop(self, stream: str, entry_id: str):
+        """Remove a job without answering it."""
+        await self.redis.xack(stream, GROUP, entry_id)
+
+    async def retry(self, stream: str, entry_id: str, fields: dict):
+        """Put a failed job back at the end of its stream."""
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.xadd(stream, {**fields, "attempt": str(int(fields.get("attempt", 1)) + 1)})
+        pipe.xack(stream, GROUP, entry_id)
+        pipe.xdel(stream, entry_id)
+        await pipe.execute()
+
+    async def fail(self, stream: str, entry_id: str, fields: dict, error_type: str, error: str):
+        """Dead-letter a job and send the error to its requester."""
+        await self.redis.xadd(self.dead_stream, {
+            **fields, "stream": stream, "error_type": error_type, "error": error
+            }, maxlen=self.max_length)
+        await self.reply(stream, entry_id, fields, {"error_type": error_type, "error": error})
+        metrics.agent_jobs_total.labels(fields.get("kind", ""), "dead").inc()
+        logger.error("Dead-lettered agent job %s: %s: %s", fields.get("job_id"), error_type, error)
+
+    async def waiting(self) -> int:
+        """Jobs not yet read by a worker, across the job streams."""
+        waiting = 0
+        for stream in self.streams:
+            pending = await self.redis.xpending(stream, GROUP)
+            waiting += max(0, await self.redis.xlen(stream) - pending)
+        return waiting
+
+    async def stats(self) -> dict:
+        """
+        Per job stream: jobs waiting for a worker (``lag``), jobs being run
+        (``pending``) and the age of the oldest job, plus the dead letters.
+        """
+        streams = {}
+        now = time.time()
+        for priority in Priority:
+            stream = self.stream(priority)
+            length = await self.redis.xlen(stream)
+            pending = await self.redis.xpending(stream, GROUP)
+            oldest = await self.redis.xfirst(stream)
+            streams[priority.name.lower()] = {
+                # Finished jobs are deleted, so the rest of the stream is waiting.
+                "lag": max(0, length - pending),
+                "pending": pending,
+                "oldest_seconds": now - int(oldest[0].split("-")[0]) / 1000 if oldest else 0.0
+                }
+        return {"streams": streams, "dead_letters": await self.redis.xlen(self.dead_stream)}
+
+    async def update_metrics(self) -> dict:
+        stats = await self.stats()
+        for name, stream in stats["streams"].items():
+            metrics.agent_queue_lag.labels(name).set(stream["lag"])
+            metrics.agent_queue_pending.labels(name).set(stream["pending"])
+            metrics.agent_queue_oldest_seconds.labels(name).set(stream["oldest_seconds"])
+        metrics.agent_queue_dead_letters.set(stats["dead_letters"])
+        return stats
+
+    async def report_metrics(self, interval: float):
+        """Refresh the queue gauges every ``interval`` seconds."""
+        while True:
+            try:
+                await self.update_metrics()
+            except Exception:
+                logger.exception("Reading agent queue stats failed")
+            await asyncio.sleep(interval)
+
+
+class QueuedQuestionAgent(QuestionAgent):
+    """A QuestionAgent whose LLM calls run on the workers."""
+    def __init__(self, queue: WorkQueue, cache=None, priority: Priority = Priority.QUESTIONS):
+        super().__init__(cache=cache, priority=priority)
+        self.queue = queue
+
+    async def _generate_questions(self, context: list, usage: dict = None, options: dict = None):
+        answer = await self.queue.submit(
+            self.agent_client.priority, "questions", {"context": context, "options": options}
+            )
+        if usage is not None:
+            usage.update(answer["usage"])
+        return [Question(question=q) for q in answer["result"]]
+
+
+class QueuedEvaluationAgent(ResponseEvaluationAgent):
+    """A ResponseEvaluationAgent whose LLM calls run on the workers."""
+    def __init__(self, queue: WorkQueue):
+        super().__init__()
+        self.queue = queue
+
+    async def async_generate_response_evaluation(
+        self, job: str, evaluation, context=None, usage: dict = None
+        ):
+        answer = await self.queue.submit(self.agent_client.priority, "evaluation", {
+            "job": job, "question": evaluation.question, "answer": evaluation.answer,
+            "context": context
+            })
+        if usage is not None:
+            usage.update(answer["usage"])
+        return EvaluationResponse.model_validate(answer["result"])
+
+    async def async_stream_response_evaluation(
+        self, job: str, evaluation, context=None, usage: dict = None
+        ):
+        # Workers answer whole jobs: the evaluation arrives as a single token.
+        response = await self.async_generate_response_evaluation(job, evaluation, context, usage)
+        yield "token", response.model_dump_json()
+        yield "result", response
+
+
+class QueuedValidationAgent(ValidationAgent):
+    """A ValidationAgent whose LLM calls run on the workers."""
+    def __init__(self, queue: WorkQueue):
+        super().__init__()
+        self.queue = queue
+
+    async def async_generate_response_validation(self, prompt, context=None, usage: dict = None):
+        answer = await self.queue.submit(
+            self.agent_client.priority, "validation", {"prompt": prompt, "context": context}
+            )
+        if usage is not None:
+            usage.update(answer["usage"])
+        return ValidationResponse.model_validate(answer["result"])
+
+    async def async_stream_response_validation(self, prompt, context=None, usage: dict = None):
+        response = await self.async_generate_response_validation(prompt, context, usage)
+        yield "token", response.model_dump_json()
+        yield "result", response
@@ -0,0 +1,178 @@
+"""
+Agent worker: runs the LLM calls queued by the interviewer API.
+
+Start the API with AGENT_QUEUE=true and any number of workers against the
+same Redis; each worker runs up to WORKER_CONCURRENCY jobs at once through
+its own LLM scheduler and Ollama backends, and serves its Prometheus
+metrics (including the queue lag to autoscale on) on WORKER_METRICS_PORT.
+
+Usage:
+    REDIS_URL=redis://localhost:6379 OLLAMA_HOSTS=http://ollama:11434 python worker.py
+"""
+import asyncio
+import json
+import logging
+import signal
+import time
+
+from prometheus_client import start_http_server
+
+import config
+import metrics
+from llm_client import Priority, backends, close_clients, warm_up
+from models import EvaluationRequest
+from question_agent import QuestionAgent
+from response_evaluation_agent import ResponseEvaluationAgent
+from validation_agent import ValidationAgent
+from work_queue import WorkQueue
+from logging_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+class AgentWorker:
+    """
+    Consumes agent jobs and answers them with the real agents.
+
+    Attributes:
+        queue (WorkQueue): The job streams.
+        concurrency (int): Jobs run at once.
+    """
+    def __init__(self, queue: WorkQueue, concurrency: int):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.question_agents = {
+            Priority.QUESTIONS: QuestionAgent(),
+            Priority.BACKGROUND: QuestionAgent(priority=Priority.BACKGROUND)
+            }
+        self.evaluation_agent = ResponseEvaluationAgent()
+        self.validation_agent = ValidationAgent()
+        self._running = set()
+        self._stopping = asyncio.Event()
+
+    def models(self) -> set:
+        return {
+            self.question_agents[Priority.QUESTIONS].agent_client.model,
+            self.evaluation_agent.agent_client.model,
+            self.validation_agent.agent_client.model
+            }
+
+    async def run_job(self, stream: str, kind: str, payload: dict) -> dict:
+        """Run one job; returns its JSON-serializable result and prompt usage."""
+        usage = {}
+        if kind == "questions":
+            priority = (Priority.BACKGROUND if stream == self.queue.stream(Priority.BACKGROUND)
+                        else Priority.QUESTIONS)
+            questions = await self.question_agents[priority]._generate_questions(
+                payload["context"], usage, payload.get("options")
+                )
+            result = [q.question for q in questions]
+        elif kind == "evaluation":
+            result = (await self.evaluation_agent.async_generate_response_evaluation(
+                payload["job"],
+                EvaluationRequest(question=payload["question"], answer=payload["answer"]),
+                context=payload.get("context"), usage=usage
+                )).model_dump()
+        elif kind == "validation":
+            result = (await self.validation_agent.async_generate_response_validation(
+                payload["prompt"], context=payload.get("context"), usage=usage
+                )).model_dump()
+        else:
+            raise ValueError(f"Unknown job kind: {kind}")
+        return {"result": result, "usage": usage}
+
+    async def handle(self, stream: str, entry_id: str, fields: dict):
+        kind = fields.get("kind", "")
+        if time.time() > float(fields.get("deadline", "inf")):
+            # The requester stopped waiting; answering would waste the LLM.
+            await self.queue.drop(stream, entry_id)
+            metrics.agent_jobs_total.labels(kind, "expired").inc()
+            return
+        try:
+            answer = await self.run_job(stream, kind, json.loads(fields["payload"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if int(fields.get("attempt", 1)) < self.queue.max_attempts:
+                logger.warning("Agent job %s failed, retrying: %r", fields.get("job_id"), e)
+                await self.queue.retry(stream, entry_id, fields)
+                metrics.agent_jobs_total.labels(kind, "retried").inc()
+            else:
+                await self.queue.fail(stream, entry_id, fields, type(e).__name__, str(e))
+            return
+        await self.queue.reply(stream, entry_id, fields, {"result": json.dumps(answer)})
+        metrics.agent_jobs_total.labels(kind, "ok").inc()
+
+    def _start(self, jobs):
+        for job in jobs:
+            task = asyncio.create_task(self._handle_safely(*job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _handle_safely(self, stream, entry_id, fields):
+        try:
+            await self.handle(stream, entry_id, fields)
+        except Exception:
+            # Left pending: another worker claims it after claim_idle.
+            logger.exception("Agent job %s could not be settled", fields.get("job_id"))
+
+    async def run(self):
+        """Consume jobs until ``stop`` is called, then finish the running ones."""
+        last_claim = 0.0
+        while not self._stopping.is_set():
+            try:
+                free = self.concurrency - len(self._running)
+                if free <= 0:
+                    await asyncio.wait(self._running, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                if time.monotonic() - last_claim >= self.queue.claim_idle / 2:
+                    last_claim = time.monotonic()
+                    reclaimed = await self.queue.reclaim(self.queue.consumer, free)
+                    self._start(reclaimed)
+                    free -= len(reclaimed)
+                    if free <= 0:
+                        continue
+                self._start(await self.queue.read(self.queue.consumer, free, block=1.0))
+            except Exception:
+                logger.exception("Reading agent jobs failed")
+                await asyncio.sleep(1)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    def stop(self):
+        self._stopping.set()
+
+
+async def main():
+    setup_logging()
+    queue = WorkQueue(
+        config.REDIS_URL,
+        timeout=config.AGENT_QUEUE_TIMEOUT,
+        max_attempts=config.AGENT_QUEUE_ATTEMPTS,
+        claim_idle=config.AGENT_QUEUE_CLAIM_IDLE
+        )
+    worker = AgentWorker(queue, config.WORKER_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    start_http_server(config.WORKER_METRICS_PORT)
+    await queue.connect(listen=False)
+    backends.start()
+    if config.LLM_WARMUP:
+        try:
+            await asyncio.wait_for(warm_up(worker.models()), config.LLM_WARMUP_TIMEOUT)
+        except Exception as e:
+            logger.warning("LLM warm-up failed, first jobs will load the model: %r", e)
+    reporter = asyncio.create_task(queue.report_metrics(config.AGENT_QUEUE_METRICS_INTERVAL))
+    logger.info("Agent worker %s running %d jobs at once", queue.consumer, worker.concurrency)
+    try:
+        await worker.run()
+    finally:
+        reporter.cancel()
+        await backends.stop()
+        await queue.close()
+        await close_clients()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())